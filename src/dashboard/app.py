@@ -6,14 +6,17 @@ This is the main module for visualizing data with streamlit.
 
 import os
 
+import cube as cb
+import duckdb_queries as dq
 import load_resources as loader
 import plots as ps
 import queries as qs
 import sidebar as sb
+import sql_queries as sq
 import streamlit as st
-from load_data import load_data
-from load_defaults import load_defaults
-from pre_processing import pre_processing
+from cached_queries import CachedQueries
+from load_data import data_version, load_country_jobs, load_data
+from load_defaults import load_defaults, load_query_backend
 from tables import create_df_latest_jobs
 
 if __name__ == "__main__":
@@ -43,8 +46,6 @@ if __name__ == "__main__":
         unsafe_allow_html=True,
     )
 
-    df = load_data()
-
     countries = loader.load_countries(app_path)
     default_country = "finland"
     default_country_index = (
@@ -52,7 +53,28 @@ if __name__ == "__main__":
     )
     selected_country = sb.sidebar_selectbox_country(countries, default_country_index)
 
-    df = pre_processing(df, selected_country)
+    # The rows behind the sidebar filters and the aggregates behind the charts
+    # come from the jobs loaded into the application, from the database, or
+    # from DuckDB
+    query_backend = load_query_backend(app_path)
+    if query_backend == "sql":
+        rows = aggregates = sq.JobsTable(sq.load_db_engine(), selected_country)
+        version = rows.data_version()
+        row_queries = aggregate_queries = sq
+    elif query_backend == "duckdb":
+        rows = aggregates = dq.DuckDBJobs(dq.load_duckdb(), selected_country)
+        version = rows.data_version()
+        row_queries = aggregate_queries = dq
+    else:
+        df = load_data()
+        version = data_version(df)
+        rows = load_country_jobs(df, selected_country, version)
+        aggregates = cb.load_job_cube(rows, selected_country, version)
+        row_queries, aggregate_queries = qs, cb
+
+    # Reruns that do not change a filter, e.g. switching tabs, reuse the results
+    row_queries = CachedQueries(row_queries, selected_country, version)
+    aggregate_queries = CachedQueries(aggregate_queries, selected_country, version)
 
     regions = loader.load_regions(app_path, selected_country)
     job_fields = loader.load_job_fields(app_path, selected_country)
@@ -100,8 +122,8 @@ if __name__ == "__main__":
         default_time_period_index,
     )
 
-    filtered_df = qs.filter_jobs_by_selectbox(
-        df,
+    filtered_df = row_queries.filter_jobs_by_selectbox(
+        rows,
         selected_region,
         selected_job_field,
         selected_seniority_level,
@@ -111,28 +133,38 @@ if __name__ == "__main__":
 
     filtered_df_past_week = qs.filter_by_time_period(filtered_df, "week", 1)
 
-    job_counts = qs.total_jobs_per_time_frequency(df, selected_time_period)
+    job_counts = aggregate_queries.total_jobs_per_time_frequency(
+        aggregates, selected_time_period
+    )
 
-    count_seniority_levels = qs.separate_for_seniority_levels(
-        df, selected_region, selected_job_field, seniority_levels, selected_time_period
+    count_seniority_levels = aggregate_queries.separate_for_seniority_levels(
+        aggregates,
+        selected_region,
+        selected_job_field,
+        seniority_levels,
+        selected_time_period,
     )
 
     top_10_companies_selectbox = qs.top_10_companies_by_selectbox(filtered_df)
-    top_10_companies_field = qs.top_10_companies_by_job_field_and_time_period(
-        df, selected_job_field, selected_time_period
+    top_10_companies_field = (
+        aggregate_queries.top_10_companies_by_job_field_and_time_period(
+            aggregates, selected_job_field, selected_time_period
+        )
     )
-    top_10_companies_region = qs.top_10_companies_by_region_and_time_period(
-        df, selected_region, selected_time_period
+    top_10_companies_region = (
+        aggregate_queries.top_10_companies_by_region_and_time_period(
+            aggregates, selected_region, selected_time_period
+        )
     )
 
     job_counts_by_field, sorted_job_fields = (
-        qs.total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels(
-            df, selected_region, selected_time_period, seniority_levels
+        aggregate_queries.total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels(
+            aggregates, selected_region, selected_time_period, seniority_levels
         )
     )
     job_counts_by_region, sorted_regions = (
-        qs.total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
-            df, selected_job_field, selected_time_period, seniority_levels
+        aggregate_queries.total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
+            aggregates, selected_job_field, selected_time_period, seniority_levels
         )
     )
 
@@ -0,0 +1,108 @@
+"""
+Benchmark of the DuckDB query engine against the pandas queries.
+
+For each size, synthetic jobs, or the first jobs of --input, are written to a Parquet snapshot like the one
+load_data keeps. The pandas engine reads it and pre-processes it like the
+app does; the DuckDB engine opens it with duckdb_queries.load_jobs. Both
+load times, the time of each query and the memory each engine holds once
+the queries have run (the pre-processed DataFrame, and DuckDB's buffers)
+are reported, and the results of the two engines are checked to be
+identical.
+
+Run from src/dashboard:
+
+    python -m benchmarks.duckdb_engine --rows 100000 1000000 10000000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import duckdb_queries as dq
+import pandas as pd
+import queries as qs
+from benchmarks.job_cube import query_cases
+from benchmarks.job_field_index import (
+    add_input_argument,
+    assert_same,
+    benchmark_jobs,
+    timed,
+)
+from pre_processing import pre_processing
+
+
+def write_snapshot(df, snapshot_path):
+    df.assign(
+        title=df["title"] if "title" in df.columns else "Software Engineer",
+        job_fields=df["job_fields"].map(json.dumps),
+        job_url=[f"https://example.com/jobs/{index}" for index in range(len(df))],
+    ).to_parquet(snapshot_path, index=False)
+
+
+def duckdb_memory(connection):
+    return connection.execute(
+        "SELECT SUM(memory_usage_bytes) FROM duckdb_memory()"
+    ).fetchone()[0]
+
+
+def run(args, n_rows, tmp_dir):
+    country, time_period, repeat = args.country, args.time_period, args.repeat
+    df, seniority_levels = benchmark_jobs(args, n_rows)
+    region = df["region"].iloc[0]
+    job_field = df["job_fields"].iloc[0][0]
+    snapshot_path = os.path.join(tmp_dir, f"jobs_{n_rows}.parquet")
+    write_snapshot(df, snapshot_path)
+    del df
+
+    start = time.perf_counter()
+    pandas_jobs = pre_processing(pd.read_parquet(snapshot_path), country)
+    pandas_load_time = time.perf_counter() - start
+    pandas_memory = pandas_jobs.memory_usage(deep=True).sum()
+
+    start = time.perf_counter()
+    connection = dq.load_jobs(snapshot_path)
+    duckdb_load_time = time.perf_counter() - start
+    duckdb_jobs = dq.DuckDBJobs(connection, country)
+
+    print(f"{n_rows} rows")
+    print(
+        f"  {'loading':<32} pandas {pandas_load_time * 1000:>9.1f} ms"
+        f"   duckdb {duckdb_load_time * 1000:>9.1f} ms"
+    )
+    pandas_cases = query_cases(qs, region, job_field, seniority_levels, time_period)
+    duckdb_cases = query_cases(dq, region, job_field, seniority_levels, time_period)
+    for name, pandas_function in pandas_cases.items():
+        pandas_time, expected = timed(pandas_function, pandas_jobs, repeat)
+        duckdb_time, result = timed(duckdb_cases[name], duckdb_jobs, repeat)
+        assert_same(expected, result)
+        print(
+            f"  {name:<32} pandas {pandas_time * 1000:>9.1f} ms"
+            f"   duckdb {duckdb_time * 1000:>9.1f} ms"
+            f"   x{pandas_time / duckdb_time:.1f}"
+        )
+    print(
+        f"  {'memory':<32} pandas {pandas_memory / 2**20:>9.1f} MB"
+        f"   duckdb {duckdb_memory(connection) / 2**20:>9.1f} MB"
+    )
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--country", default="finland")
+    parser.add_argument("--time-period", default="month")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    add_input_argument(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_rows in args.rows:
+            run(args, n_rows, tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark for the memory of the pre-processed jobs.
+
+Builds a synthetic frame shaped like the one load_data returns (strings, and
+job_fields as JSON text), pre-processes it with the previous pre_processing
+(job_fields parsed into lists plus a boolean column per job field) and with
+the current one (compact dtypes), prints the bytes per column of both, and
+checks that the chart queries return identical results on both.
+
+Run from src/dashboard:
+
+    python -m benchmarks.frame_memory --rows 500000
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import queries as qs
+from benchmarks.job_cube import query_cases
+from benchmarks.job_field_index import (
+    add_input_argument,
+    assert_same,
+    read_jobs,
+    synthetic_jobs,
+)
+from pre_processing import memory_report, pre_processing
+
+JOB_FIELD_COLUMN_PREFIX = "job_field:"
+
+
+def legacy_pre_processing(df, selected_country):
+    """pre_processing before the compact dtypes."""
+    df = df.copy()
+    df["job_fields"] = df["job_fields"].apply(
+        lambda x: json.loads(x) if isinstance(x, str) else x
+    )
+    df["date_posted"] = pd.to_datetime(df["date_posted"])
+    df = df[
+        (df["country"].str.lower() == selected_country.lower())
+        & (df["region"] != "Unspecified")
+    ]
+    lengths = df["job_fields"].map(len).to_numpy(dtype=np.int64)
+    job_fields = [field for fields in df["job_fields"] for field in fields]
+    codes, names = pd.factorize(pd.Series(job_fields, dtype=object))
+    matrix = np.zeros((len(df), len(names)), dtype=bool)
+    matrix[np.repeat(np.arange(len(df)), lengths), codes] = True
+    index = pd.DataFrame(
+        matrix,
+        index=df.index,
+        columns=[JOB_FIELD_COLUMN_PREFIX + name for name in names],
+    )
+    return pd.concat([df, index], axis=1)
+
+
+def loaded_jobs(n_rows, country, seed, input_path=None):
+    """A frame shaped like the output of load_data before it converted the jobs to
+    compact dtypes, read from input_path or synthetic."""
+    if input_path is not None:
+        return read_jobs(input_path, n_rows, country)
+    df, seniority_levels = synthetic_jobs(n_rows, country, seed)
+    rng = np.random.default_rng(seed)
+    titles = np.array([f"Job title {i}" for i in range(2000)])
+    return (
+        df.assign(
+            title=titles[rng.zipf(1.3, n_rows) % len(titles)],
+            job_fields=df["job_fields"].map(json.dumps),
+            job_url=[f"https://www.linkedin.com/jobs/view/{i}" for i in range(n_rows)],
+        ),
+        seniority_levels,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--country", default="finland")
+    parser.add_argument("--seed", type=int, default=0)
+    add_input_argument(parser)
+    args = parser.parse_args()
+
+    df, seniority_levels = loaded_jobs(args.rows, args.country, args.seed, args.input)
+
+    start = time.perf_counter()
+    before = legacy_pre_processing(df, args.country)
+    before_time = time.perf_counter() - start
+    start = time.perf_counter()
+    after = pre_processing(df, args.country)
+    after_time = time.perf_counter() - start
+
+    before_report = memory_report(before).set_index("column")
+    after_report = memory_report(after).set_index("column")
+    # One row for all the columns of the job field index, before the total
+    index_columns = before_report.index.str.startswith(JOB_FIELD_COLUMN_PREFIX)
+    index_report = pd.DataFrame(
+        {"dtype": ["bool"], "bytes": [before_report["bytes"][index_columns].sum()]},
+        index=["job field index"],
+    )
+    before_report = before_report[~index_columns]
+    before_report = pd.concat(
+        [before_report.iloc[:-1], index_report, before_report.iloc[-1:]]
+    )
+
+    print(f"{args.rows} rows")
+    print(f"  {'column':<18} {'before':>14} {'after':>14}")
+    for column in before_report.index:
+        before_bytes = before_report.loc[column, "bytes"]
+        after_bytes = after_report["bytes"].get(column, 0)
+        print(
+            f"  {column:<18} {before_bytes / 2**20:>11.1f} MB {after_bytes / 2**20:>11.1f} MB"
+        )
+    print(
+        f"  x{before_report.loc['Total', 'bytes'] / after_report.loc['Total', 'bytes']:.1f}"
+        f" less memory; pre_processing {before_time:.2f}s before, {after_time:.2f}s after"
+    )
+
+    # The same chart output from both layouts
+    region = after["region"].iloc[0]
+    job_field = qs.explode_job_fields(after.head(1))["job_fields"].iloc[0]
+    cases = query_cases(qs, region, job_field, seniority_levels, "month")
+    for function in cases.values():
+        assert_same(function(before), function(after))
+    print("  identical chart output")
+
+
+if __name__ == "__main__":
+    main()
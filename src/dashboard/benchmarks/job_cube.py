@@ -0,0 +1,100 @@
+"""
+Benchmark for answering the chart queries from the daily job cube.
+
+Times the queries app.py answers from the cube, once on the raw rows with
+queries.py and once on a JobCube built from them, and checks that both
+return identical results. The cube is built once per data refresh, so its
+build time is reported separately.
+
+Run from src/dashboard:
+
+    python -m benchmarks.job_cube --rows 1000000
+"""
+
+import argparse
+import time
+
+import cube as cb
+import queries as qs
+from benchmarks.job_field_index import (
+    add_input_argument,
+    assert_same,
+    benchmark_jobs,
+    timed,
+)
+
+
+def query_cases(module, region, job_field, seniority_levels, time_period):
+    return {
+        "total_jobs_per_time_frequency": lambda data: (
+            module.total_jobs_per_time_frequency(data, time_period)
+        ),
+        "separate_for_seniority_levels": lambda data: (
+            module.separate_for_seniority_levels(
+                data, region, job_field, seniority_levels, time_period
+            )
+        ),
+        "top_10_companies_by_job_field": lambda data: (
+            module.top_10_companies_by_job_field_and_time_period(
+                data, job_field, time_period
+            )
+        ),
+        "top_10_companies_by_region": lambda data: (
+            module.top_10_companies_by_region_and_time_period(data, region, time_period)
+        ),
+        "total_jobs_by_region": lambda data: (
+            module.total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels(
+                data, region, time_period, seniority_levels
+            )
+        ),
+        "total_jobs_by_job_field": lambda data: (
+            module.total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
+                data, job_field, time_period, seniority_levels
+            )
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--country", default="finland")
+    parser.add_argument("--time-period", default="month")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    add_input_argument(parser)
+    args = parser.parse_args()
+
+    df, seniority_levels = benchmark_jobs(args, args.rows)
+
+    start = time.perf_counter()
+    job_cube = cb.JobCube(df)
+    print(
+        f"building the cube: {time.perf_counter() - start:.3f}s ({args.rows} rows,"
+        f" {len(job_cube.jobs)} + {len(job_cube.jobs_by_field)} cells)"
+    )
+
+    region = df["region"].iloc[0]
+    job_field = df["job_fields"].iloc[0][0]
+    raw_cases = query_cases(qs, region, job_field, seniority_levels, args.time_period)
+    cube_cases = query_cases(cb, region, job_field, seniority_levels, args.time_period)
+    total_before = total_after = 0
+    for name, raw_function in raw_cases.items():
+        before_time, before = timed(raw_function, df, args.repeat)
+        after_time, after = timed(cube_cases[name], job_cube, args.repeat)
+        assert_same(before, after)
+        total_before += before_time
+        total_after += after_time
+        print(
+            f"{name:<32} before {before_time * 1000:>9.1f} ms"
+            f"   after {after_time * 1000:>9.1f} ms"
+            f"   x{before_time / after_time:.1f}"
+        )
+    print(
+        f"{'all six queries':<32} before {total_before * 1000:>9.1f} ms"
+        f"   after {total_after * 1000:>9.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Benchmark for filtering on the job field codes of pre_processing.
+
+Times the queries that filter on a job field, once on a frame of job_fields
+lists (scanning every list) and once on the compact dtypes of pre_processing,
+where only the combinations of job fields are scanned, and checks that both
+return identical results.
+
+Run from src/dashboard:
+
+    python -m benchmarks.job_field_index --rows 1000000
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import queries as qs
+from pre_processing import compact_dtypes
+
+RESOURCES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "../../../resources"
+)
+
+
+# The columns of the jobs returned by load_data.read_jobs_from_db
+LOADED_COLUMNS = [
+    "date_posted",
+    "title",
+    "company",
+    "region",
+    "country",
+    "seniority_level",
+    "job_fields",
+    "job_url",
+]
+
+
+def read_seniority_levels(country):
+    with open(f"{RESOURCES_PATH}/{country}/seniority_levels_{country}.json") as file:
+        return [item["level"] for item in json.load(file)]
+
+
+def synthetic_jobs(n_rows, country, seed):
+    """A frame of job_fields lists, shaped like the output of pre_processing
+    before it stored the jobs in compact dtypes."""
+    with open(f"{RESOURCES_PATH}/{country}/cities_and_regions_{country}.json") as file:
+        regions = sorted({item["region_en"] for item in json.load(file)})
+    with open(f"{RESOURCES_PATH}/{country}/job_fields_{country}.json") as file:
+        job_fields = [item["name"] for item in json.load(file)]
+    seniority_levels = read_seniority_levels(country)
+
+    rng = np.random.default_rng(seed)
+    n_fields = rng.integers(1, 4, size=n_rows)
+    field_choices = rng.integers(0, len(job_fields), size=(n_rows, 3))
+    return (
+        pd.DataFrame(
+            {
+                "date_posted": pd.Timestamp.now()
+                - pd.to_timedelta(
+                    rng.integers(0, 3 * 365 * 24 * 3600, n_rows), unit="s"
+                ),
+                "company": [f"Company {i}" for i in rng.zipf(1.5, n_rows) % 5000],
+                "region": np.array(regions)[rng.integers(0, len(regions), n_rows)],
+                "country": country.capitalize(),
+                "seniority_level": np.array(seniority_levels)[
+                    rng.integers(0, len(seniority_levels), n_rows)
+                ],
+                "job_fields": [
+                    list(dict.fromkeys(job_fields[i] for i in choices[:n]))
+                    for choices, n in zip(field_choices, n_fields)
+                ],
+            }
+        ),
+        seniority_levels,
+    )
+
+
+def read_jobs(path, n_rows, country):
+    """The first n_rows jobs of a country in a Parquet or CSV file written by
+    tools/generate_jobs.py, filtered and shaped like the output of load_data
+    before it converted the jobs to compact dtypes."""
+    if path.endswith(".csv"):
+        df = pd.read_csv(path, usecols=LOADED_COLUMNS, parse_dates=["date_posted"])
+    else:
+        df = pd.read_parquet(path, columns=LOADED_COLUMNS)
+    df = df[
+        (df["seniority_level"] != "Not Applicable")
+        & (df["region"] != "Unspecified")
+        & (df["country"].str.lower() == country.lower())
+    ]
+    return df.head(n_rows).reset_index(drop=True), read_seniority_levels(country)
+
+
+def add_input_argument(parser):
+    parser.add_argument(
+        "--input",
+        help="Read the jobs from a file written by tools/generate_jobs.py "
+        "instead of synthesizing them; --rows takes the first rows of it.",
+    )
+
+
+def benchmark_jobs(args, n_rows):
+    """The jobs to benchmark on, from --input or synthetic, in the shape of
+    synthetic_jobs."""
+    if args.input is None:
+        return synthetic_jobs(n_rows, args.country, args.seed)
+    df, seniority_levels = read_jobs(args.input, n_rows, args.country)
+    return df.assign(job_fields=df["job_fields"].map(json.loads)), seniority_levels
+
+
+def query_cases(region, job_field, seniority_levels):
+    return {
+        "filter_jobs_by_selectbox": lambda df: qs.filter_jobs_by_selectbox(
+            df, region, job_field, seniority_levels[0]
+        ),
+        "separate_for_seniority_levels": lambda df: qs.separate_for_seniority_levels(
+            df, region, job_field, seniority_levels, "month"
+        ),
+        "top_10_companies_by_job_field": lambda df: (
+            qs.top_10_companies_by_job_field_and_time_period(df, job_field, "year")
+        ),
+        "total_jobs_by_job_field": lambda df: (
+            qs.total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
+                df, job_field, "year", seniority_levels
+            )
+        ),
+    }
+
+
+def timed(function, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def assert_same(before, after):
+    if isinstance(before, pd.DataFrame) and "job_fields" in before.columns:
+        # Rows of the jobs, whose dtypes differ between the two layouts
+        pd.testing.assert_index_equal(after.index, before.index)
+    elif isinstance(before, pd.DataFrame):
+        pd.testing.assert_frame_equal(after, before)
+    elif isinstance(before, pd.Series):
+        pd.testing.assert_series_equal(after, before)
+    else:
+        for before_part, after_part in zip(before, after, strict=True):
+            assert_same(before_part, after_part)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--country", default="finland")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    add_input_argument(parser)
+    args = parser.parse_args()
+
+    df, seniority_levels = benchmark_jobs(args, args.rows)
+
+    start = time.perf_counter()
+    compact_df = compact_dtypes(df)
+    print(f"encoding: {time.perf_counter() - start:.3f}s ({args.rows} rows)")
+
+    region = df["region"].iloc[0]
+    job_field = df["job_fields"].iloc[0][0]
+    for name, function in query_cases(region, job_field, seniority_levels).items():
+        before_time, before = timed(function, df, args.repeat)
+        after_time, after = timed(function, compact_df, args.repeat)
+        assert_same(before, after)
+        print(
+            f"{name:<32} before {before_time * 1000:>9.1f} ms"
+            f"   after {after_time * 1000:>9.1f} ms"
+            f"   x{before_time / after_time:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark of the work a rerun of the dashboard does to get the jobs of a country.
+
+Before, load_data was an st.cache_data function, which hands every rerun a
+fresh copy of the raw jobs by unpickling them, and pre_processing then parsed
+the job fields and dates of that copy. Now load_data is an st.cache_resource
+function that converts the jobs once per refresh and hands every rerun the
+same frame, so pre_processing only filters it by country. Both are timed on
+a synthetic frame, and their results are checked to be identical.
+
+Run from src/dashboard:
+
+    python -m benchmarks.rerun_latency --rows 500000
+"""
+
+import argparse
+import pickle
+import time
+
+import pandas as pd
+from benchmarks.frame_memory import loaded_jobs
+from benchmarks.job_field_index import add_input_argument
+from pre_processing import compact_dtypes, pre_processing
+
+
+def timed_rerun(rerun, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = rerun()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--country", default="finland")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    add_input_argument(parser)
+    args = parser.parse_args()
+
+    df, _ = loaded_jobs(args.rows, args.country, args.seed, args.input)
+
+    # What each cache keeps between reruns
+    start = time.perf_counter()
+    pickled_jobs = pickle.dumps(df)
+    before_load_time = time.perf_counter() - start
+    start = time.perf_counter()
+    jobs = compact_dtypes(df)
+    after_load_time = time.perf_counter() - start
+
+    before_time, expected = timed_rerun(
+        lambda: pre_processing(pickle.loads(pickled_jobs), args.country), args.repeat
+    )
+    after_time, result = timed_rerun(
+        lambda: pre_processing(jobs, args.country), args.repeat
+    )
+    pd.testing.assert_frame_equal(
+        result, expected, check_categorical=False, check_index_type=False
+    )
+
+    print(f"{args.rows} rows")
+    print(
+        f"  {'once per refresh':<18} before {before_load_time * 1000:>9.1f} ms"
+        f"   after {after_load_time * 1000:>9.1f} ms"
+    )
+    print(
+        f"  {'every rerun':<18} before {before_time * 1000:>9.1f} ms"
+        f"   after {after_time * 1000:>9.1f} ms   x{before_time / after_time:.1f}"
+    )
+    print("  identical pre-processed jobs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Benchmark suite for the query layer of the dashboard.
+
+Times every function of queries.py and cube.py that app.py calls, the two
+stages of pre_processing.py and all the queries of an app.py rerun with the
+pandas backend, at several sizes of jobs, with the default filters of
+configs/streamlit_config.json. The median and
+minimum time of each case are printed and, with --output, written as JSON
+together with the commit they were measured at.
+
+With --compare, the minimum times, which vary least between runs, are
+compared to those of an earlier JSON result, and the suite fails when a
+case got slower by more than --threshold and by more than --noise-ms, so
+results can be compared across commits:
+
+    python -m benchmarks.suite --output /tmp/before.json
+    git checkout my-branch
+    python -m benchmarks.suite --compare /tmp/before.json --threshold 0.2
+
+Run from src/dashboard.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from functools import partial
+
+import cube as cb
+import load_resources as loader
+import pandas as pd
+import queries as qs
+from benchmarks.frame_memory import loaded_jobs
+from benchmarks.job_field_index import add_input_argument
+from load_defaults import load_defaults
+from pre_processing import compact_dtypes, pre_processing
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../..")
+
+
+def rerun_queries(rows, job_cube, filters):
+    """The queries of an app.py rerun with the pandas backend and a cold query
+    cache. Loading the jobs, pre-processing them for the country and building
+    the cube are cached across reruns, and rendering the results needs a
+    running Streamlit app, so neither is timed."""
+    _, region, job_field, seniority_level, time_period, seniority_levels = filters
+    filtered_df = qs.filter_jobs_by_selectbox(rows, region, job_field, seniority_level)
+    filtered_df = qs.filter_by_time_period(filtered_df, time_period)
+    qs.filter_by_time_period(filtered_df, "week", 1)
+    qs.top_10_companies_by_selectbox(filtered_df)
+    cb.total_jobs_per_time_frequency(job_cube, time_period)
+    cb.separate_for_seniority_levels(
+        job_cube, region, job_field, seniority_levels, time_period
+    )
+    cb.top_10_companies_by_job_field_and_time_period(job_cube, job_field, time_period)
+    cb.top_10_companies_by_region_and_time_period(job_cube, region, time_period)
+    cb.total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels(
+        job_cube, region, time_period, seniority_levels
+    )
+    cb.total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
+        job_cube, job_field, time_period, seniority_levels
+    )
+
+
+def benchmark_cases(df, filters):
+    """The cases of the suite on the jobs df, as loaded from the snapshot."""
+    country, region, job_field, seniority_level, time_period, seniority_levels = filters
+    jobs = compact_dtypes(df)
+    rows = pre_processing(jobs, country)
+    job_cube = cb.JobCube(rows)
+    filtered_df = qs.filter_jobs_by_selectbox(rows, region, job_field, seniority_level)
+
+    cases = {
+        "pre_processing.compact_dtypes": partial(compact_dtypes, df),
+        "pre_processing.pre_processing": partial(pre_processing, jobs, country),
+        "cube.JobCube": partial(cb.JobCube, rows),
+        "queries.filter_jobs_by_selectbox": partial(
+            qs.filter_jobs_by_selectbox, rows, region, job_field, seniority_level
+        ),
+        "queries.filter_by_time_period": partial(
+            qs.filter_by_time_period, filtered_df, time_period
+        ),
+        "queries.top_10_companies_by_selectbox": partial(
+            qs.top_10_companies_by_selectbox, filtered_df
+        ),
+    }
+    # The queries app.py answers from the cube, on the rows and on the cube
+    aggregate_arguments = {
+        "total_jobs_per_time_frequency": (time_period,),
+        "separate_for_seniority_levels": (
+            region,
+            job_field,
+            seniority_levels,
+            time_period,
+        ),
+        "top_10_companies_by_job_field_and_time_period": (job_field, time_period),
+        "top_10_companies_by_region_and_time_period": (region, time_period),
+        "total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels": (
+            region,
+            time_period,
+            seniority_levels,
+        ),
+        "total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels": (
+            job_field,
+            time_period,
+            seniority_levels,
+        ),
+    }
+    for module, data in ((qs, rows), (cb, job_cube)):
+        for name, arguments in aggregate_arguments.items():
+            cases[f"{module.__name__}.{name}"] = partial(
+                getattr(module, name), data, *arguments
+            )
+    cases["app rerun queries"] = partial(rerun_queries, rows, job_cube, filters)
+    return cases
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), min(timings)
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold, noise):
+    """
+    Compares the minimum times of results with those of baseline.
+
+    Args:
+    results (list): The results of this run, as written to the JSON output.
+    baseline (list): The results of an earlier run.
+    threshold (float): The relative slowdown beyond which a case is a regression.
+    noise (float): Slowdowns of fewer seconds than this are never regressions.
+
+    Returns:
+    list: The (case, rows, ratio) of the regressions.
+    """
+    baseline_times = {
+        (result["case"], result["rows"]): result["min_s"] for result in baseline
+    }
+    regressions = []
+    print(f"\ncompared to the baseline (regression beyond x{1 + threshold:.2f}):")
+    for result in results:
+        key = (result["case"], result["rows"])
+        if key not in baseline_times:
+            continue
+        ratio = result["min_s"] / baseline_times[key]
+        regressed = (
+            ratio > 1 + threshold and result["min_s"] - baseline_times[key] > noise
+        )
+        if regressed:
+            regressions.append((*key, ratio))
+        print(
+            f"  {result['case']:<84} {result['rows']:>9}   x{ratio:.2f}"
+            f"{'   REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--country", default="finland")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cases", help="Only run the cases whose name contains this.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="A JSON result to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--noise-ms", type=float, default=1.0)
+    add_input_argument(parser)
+    args = parser.parse_args()
+
+    region, job_field, seniority_level, time_period = load_defaults(
+        APP_PATH, args.country
+    )
+    seniority_levels = loader.load_seniority_levels(APP_PATH, args.country)
+    filters = (
+        args.country,
+        region,
+        job_field,
+        seniority_level,
+        time_period,
+        seniority_levels,
+    )
+
+    results = []
+    for n_rows in args.rows:
+        df, _ = loaded_jobs(n_rows, args.country, args.seed, args.input)
+        print(f"{len(df)} rows")
+        for case, function in benchmark_cases(df, filters).items():
+            if args.cases and args.cases not in case:
+                continue
+            median, minimum = measure(function, args.repeat)
+            results.append(
+                {"case": case, "rows": n_rows, "median_s": median, "min_s": minimum}
+            )
+            print(
+                f"  {case:<84} median {median * 1000:>9.1f} ms"
+                f"   min {minimum * 1000:>9.1f} ms"
+            )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "commit": current_commit(),
+                    "created": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "pandas": pd.__version__,
+                    "machine": platform.platform(),
+                    "input": args.input,
+                    "repeat": args.repeat,
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        print(f"baseline: commit {baseline['commit']}, {baseline['created']}")
+        regressions = compare(
+            results, baseline["results"], args.threshold, args.noise_ms / 1000
+        )
+        if regressions:
+            print(f"{len(regressions)} regression(s)")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
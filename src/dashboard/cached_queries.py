@@ -0,0 +1,132 @@
+# cached_queries.py
+"""
+This module provides a cache around the query functions, so that a rerun of the dashboard that
+does not change a filter, such as switching tabs, does not run the queries again.
+
+The cache key is the query, its filter arguments, the selected country and a data version token,
+such as load_data.data_version, instead of the data itself, which would take as long to hash as
+to query. The entries expire with the data loaded by load_data. The results of the queries given
+a time period that is cut off relative to the current time are also keyed on the time, rounded
+down to QUERY_CACHE_CUTOFF_BUCKET seconds, so that they follow the cutoff as it moves.
+"""
+
+import importlib
+from collections import Counter
+
+import pandas as pd
+import streamlit as st
+
+QUERY_CACHE_TTL = 43200  # 12 hours, like load_data
+QUERY_CACHE_MAX_ENTRIES = 512
+QUERY_CACHE_CUTOFF_BUCKET = 600  # 10 minutes
+
+# The time periods cut off relative to the current time, see queries.time_period_cutoff
+RELATIVE_TIME_PERIODS = ("year", "month", "week", "day")
+
+# The number of calls and of cache misses per query, in this process
+query_calls = Counter()
+query_misses = Counter()
+
+
+@st.cache_data(
+    ttl=QUERY_CACHE_TTL, max_entries=QUERY_CACHE_MAX_ENTRIES, show_spinner=False
+)
+def run_cached_query(
+    module_name, query_name, country, data_version, cutoff_bucket, _data, *args
+):
+    """
+    Runs a query, unless it has been run with the same arguments on the same version of the data.
+
+    Args:
+    module_name (str): The module of the query, e.g. "queries" or "cube".
+    query_name (str): The name of the query function.
+    country (str): The selected country.
+    data_version (tuple): The version of the data the query runs on.
+    cutoff_bucket (pandas.Timestamp): The time the cutoff of its time period is taken from,
+                                      see cutoff_bucket.
+    _data: The data the query runs on, not hashed.
+    args: The rest of the arguments of the query.
+
+    Returns:
+    The result of the query.
+    """
+    query_misses[query_name] += 1
+    query = getattr(importlib.import_module(module_name), query_name)
+    return query(_data, *args)
+
+
+def cutoff_bucket(args, now=None):
+    """
+    The time bucket the results of a query with the given arguments are cached for.
+
+    Args:
+    args (tuple): The arguments of the query, after the data.
+    now (pandas.Timestamp): The current time, by default pandas.Timestamp.now().
+
+    Returns:
+    pandas.Timestamp: The current time rounded down to QUERY_CACHE_CUTOFF_BUCKET seconds if one
+                      of the arguments is a relative time period, or None.
+    """
+    if not any(isinstance(arg, str) and arg in RELATIVE_TIME_PERIODS for arg in args):
+        return None
+    now = pd.Timestamp.now() if now is None else now
+    return now.floor(f"{QUERY_CACHE_CUTOFF_BUCKET}s")
+
+
+class CachedQueries:
+    """
+    The query functions of a module, with their results cached.
+
+    For example, CachedQueries(cube, "finland", version).top_10_companies_by_region_and_time_period(
+    job_cube, "Uusimaa", "month") runs cube.top_10_companies_by_region_and_time_period only once
+    per version of the data.
+
+    Attributes:
+    queries (module): The module of the queries, e.g. queries, cube or sql_queries.
+    country (str): The selected country.
+    data_version (tuple): The version of the data the queries run on.
+    """
+
+    def __init__(self, queries, country, data_version):
+        self.queries = queries
+        self.country = country
+        self.data_version = data_version
+
+    def __getattr__(self, query_name):
+        # Fail here rather than inside the cache for a name the module does not have
+        getattr(self.queries, query_name)
+
+        def cached_query(data, *args):
+            query_calls[query_name] += 1
+            return run_cached_query(
+                self.queries.__name__,
+                query_name,
+                self.country,
+                self.data_version,
+                cutoff_bucket(args),
+                data,
+                *args,
+            )
+
+        return cached_query
+
+
+def query_cache_stats():
+    """
+    Collects the cache hits and misses of each query since the process started.
+
+    Returns:
+    pandas.DataFrame: A DataFrame with the columns 'query', 'calls', 'hits' and 'misses'.
+    """
+    return pd.DataFrame(
+        [
+            {
+                "query": query_name,
+                "calls": calls,
+                "hits": calls - query_misses[query_name],
+                "misses": query_misses[query_name],
+            }
+            for query_name, calls in sorted(query_calls.items())
+        ],
+        columns=["query", "calls", "hits", "misses"],
+    )
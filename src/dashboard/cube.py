@@ -0,0 +1,313 @@
+# cube.py
+"""
+This module provides a pre-aggregated cube of the job postings and the queries that the charts
+require, answered from the cube instead of the raw rows.
+
+The cube holds the number of jobs per (day, region, seniority level, company), and per
+(day, region, job field, seniority level, company). The charts group by day, week, month or
+year, all of which are made of whole days, so they can be rolled up from the daily counts.
+The time period filters start at an arbitrary time of day; the whole days after that time are
+read from the cube and the rest of the first day from the raw rows, so the results are the same
+as those of the functions in queries.py.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from queries import (
+    TIME_FREQUENCIES,
+    decode_categoricals,
+    explode_job_fields,
+    order_by_total_count,
+    time_period_cutoff,
+)
+
+JOB_DIMENSIONS = ["region", "seniority_level", "company"]
+JOB_FIELD_DIMENSIONS = ["region", "job_fields", "seniority_level", "company"]
+
+
+class JobCube:
+    """
+    Daily job counts of a pre-processed DataFrame.
+
+    Attributes:
+    rows (pandas.DataFrame): The raw rows needed by the queries, sorted by 'date_posted'.
+    rows_by_field (pandas.DataFrame): rows repeated once per job field, still sorted by
+                                      'date_posted', so that the rows of a partial day are counted
+                                      per job field without decoding the job fields again.
+    jobs (pandas.DataFrame): Job counts per 'day', region, seniority level and company.
+    jobs_by_field (pandas.DataFrame): Job counts per 'day', region, job field, seniority level
+                                      and company. A job is counted once in each of its fields,
+                                      as the pipeline never lists a field twice.
+    trends (pandas.DataFrame): jobs_by_field summed over the companies, for the line charts.
+    """
+
+    def __init__(self, df):
+        self.rows = df[
+            ["date_posted", "region", "job_fields", "seniority_level", "company"]
+        ].sort_values("date_posted", kind="stable", ignore_index=True)
+        self.rows_by_field = explode_job_fields(self.rows)
+        # The dimensions are stored as categoricals so that slicing the cube compares integer
+        # codes instead of strings
+        self.jobs = encode(count_per_day(self.rows, JOB_DIMENSIONS))
+        self.jobs_by_field = encode(
+            count_per_day(self.rows_by_field, JOB_FIELD_DIMENSIONS)
+        )
+        self.trends = (
+            self.jobs_by_field.groupby(
+                ["day", "region", "job_fields", "seniority_level"],
+                observed=True,
+                sort=False,
+            )["count"]
+            .sum()
+            .reset_index()
+        )
+
+    def select_time_period(self, selected_time_period, by_job_field):
+        """
+        Selects the job counts of the jobs posted within the selected time period.
+
+        Args:
+        selected_time_period (str): The time period to filter the job postings (e.g., "year", "month").
+        by_job_field (bool): Select from jobs_by_field instead of jobs.
+
+        Returns:
+        pandas.DataFrame: The counts of the whole days in the time period, followed by a count of
+                          one for each job posted on its first, partial day.
+        """
+        counts = self.jobs_by_field if by_job_field else self.jobs
+        if selected_time_period == "Any time":
+            return counts
+
+        cutoff = time_period_cutoff(selected_time_period)
+        first_day = cutoff.floor("D")
+        # The counts are in the order of the sorted rows, so by day
+        selected = counts.iloc[counts["day"].searchsorted(cutoff) :]
+        if cutoff == first_day:
+            return selected
+
+        if by_job_field:
+            rows, dimensions = self.rows_by_field, JOB_FIELD_DIMENSIONS
+        else:
+            rows, dimensions = self.rows, JOB_DIMENSIONS
+        # numpy compares at the finer resolution of the cutoff and the column
+        start, end = np.searchsorted(
+            rows["date_posted"].to_numpy(),
+            np.array(
+                [cutoff, first_day + pd.Timedelta(days=1)], dtype="datetime64[ns]"
+            ),
+        )
+        # One count per row: the queries sum the counts, so they need not be grouped first
+        partial_day = (
+            rows.iloc[start:end][dimensions]
+            .assign(day=first_day, count=1)[counts.columns]
+            .astype(counts.dtypes.to_dict())
+        )
+        return pd.concat([selected, partial_day], ignore_index=True)
+
+
+def count_per_day(rows, dimensions):
+    """
+    Counts the rows per day and cube dimensions.
+
+    Args:
+    rows (pandas.DataFrame): Rows with a 'date_posted' column and the dimension columns, with one
+                             job field per row if 'job_fields' is one of them.
+    dimensions (list): The dimension columns, JOB_DIMENSIONS or JOB_FIELD_DIMENSIONS.
+
+    Returns:
+    pandas.DataFrame: A DataFrame with a 'day' column, the dimension columns and a 'count' column.
+    """
+    return (
+        rows.assign(day=rows["date_posted"].dt.floor("D"))
+        .groupby(["day", *dimensions], dropna=False, observed=True, sort=False)
+        .size()
+        .reset_index(name="count")
+    )
+
+
+def encode(counts):
+    """Turns the dimension columns of counts into categoricals."""
+    dimensions = counts.columns.drop(["day", "count"])
+    return counts.astype({dimension: "category" for dimension in dimensions})
+
+
+@st.cache_resource(ttl=43200, max_entries=8)
+def load_job_cube(_df, selected_country, data_version):
+    """
+    Builds the job cube of the pre-processed data of a country once per data refresh.
+
+    Args:
+    _df (pandas.DataFrame): The pre-processed DataFrame of the selected country. It is not hashed.
+    selected_country (str): The selected country.
+    data_version (tuple): The version of the loaded data, see load_data.data_version.
+
+    Returns:
+    JobCube: The job cube of _df.
+    """
+    return JobCube(_df)
+
+
+def total_jobs_per_time_frequency(cube, selected_time_period):
+    """
+    A query to calculate the total number of jobs posted, grouped by the specified time period, from the cube.
+    See queries.total_jobs_per_time_frequency.
+
+    Args:
+    cube (JobCube): The job cube.
+    selected_time_period (str): The time period to group the data by ("day", "week", "month", "year" or "Any time").
+
+    Returns:
+    pandas.DataFrame: A DataFrame with the columns `selected_time_period` and `job_count`.
+    """
+    return count_per_time_frequency(cube.jobs, selected_time_period)
+
+
+def count_per_time_frequency(counts, selected_time_period):
+    job_counts = (
+        counts.groupby(
+            pd.Grouper(key="day", freq=TIME_FREQUENCIES[selected_time_period])
+        )["count"]
+        .sum()
+        .reset_index(name="job_count")
+    )
+
+    job_counts.rename(columns={"day": selected_time_period}, inplace=True)
+    job_counts = job_counts.sort_values(selected_time_period).reset_index(drop=True)
+
+    return job_counts
+
+
+def separate_for_seniority_levels(
+    cube, selected_region, selected_job_field, seniority_levels, selected_time_period
+):
+    """
+    A query to separate job counts by seniority level for a selected region, job field, and time period, from the cube.
+    See queries.separate_for_seniority_levels.
+
+    Args:
+    cube (JobCube): The job cube.
+    selected_region (str): The region to filter the jobs by.
+    selected_job_field (str): The job field to filter the jobs by.
+    seniority_levels (list): A list of seniority levels to analyze.
+    selected_time_period (str): The time period for aggregating job counts (e.g., "day", "week", "month", "year").
+
+    Returns:
+    list: A list of DataFrames, where each DataFrame contains job counts for a specific seniority level.
+    """
+    counts = cube.trends
+    counts = counts[
+        (counts["region"] == selected_region)
+        & (counts["job_fields"] == selected_job_field)
+    ]
+    return [
+        count_per_time_frequency(
+            counts[counts["seniority_level"] == level], selected_time_period
+        )
+        for level in seniority_levels
+    ]
+
+
+def top_10_companies_by_job_field_and_time_period(
+    cube, selected_job_field, selected_time_period
+):
+    """
+    A query to retrieve the top 10 companies posting jobs in the selected job field within a specified
+    time period, from the cube. See queries.top_10_companies_by_job_field_and_time_period.
+
+    Args:
+    cube (JobCube): The job cube.
+    selected_job_field (str): The job field to filter the data by.
+    selected_time_period (str): The time period for filtering job postings (e.g., "year", "month").
+
+    Returns:
+    pandas.DataFrame: A DataFrame containing the top 10 companies with the most job postings.
+    """
+    counts = cube.select_time_period(selected_time_period, by_job_field=True)
+    counts = counts[counts["job_fields"] == selected_job_field]
+    return top_10_companies(counts)
+
+
+def top_10_companies_by_region_and_time_period(
+    cube, selected_region, selected_time_period
+):
+    """
+    A query to retrieve the top 10 companies posting jobs in the selected region within a specified
+    time period, from the cube. See queries.top_10_companies_by_region_and_time_period.
+
+    Args:
+    cube (JobCube): The job cube.
+    selected_region (str): The region to filter the data by.
+    selected_time_period (str): The time period for filtering job postings (e.g., "year", "month").
+
+    Returns:
+    pandas.DataFrame: A DataFrame containing the top 10 companies with the most job postings.
+    """
+    counts = cube.select_time_period(selected_time_period, by_job_field=False)
+    counts = counts[counts["region"] == selected_region]
+    return top_10_companies(counts)
+
+
+def top_10_companies(counts):
+    company_job_counts = counts.groupby("company", observed=True)["count"].sum()
+    return decode_categoricals(
+        company_job_counts.reset_index(name="job_count")
+    ).nlargest(10, "job_count")
+
+
+def total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels(
+    cube, selected_region, selected_time_period, seniority_levels
+):
+    """
+    A query to calculate the total number of jobs for a selected region and time period across all job
+    fields and seniority levels, from the cube.
+    See queries.total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels.
+
+    Args:
+    cube (JobCube): The job cube.
+    selected_region (str): The region to filter the data by.
+    selected_time_period (str): The time period to filter the job postings (e.g., "year", "month").
+    seniority_levels (list): The list of seniority levels for ordering the data.
+
+    Returns:
+    pandas.DataFrame: A DataFrame with job counts for each job field and seniority level.
+    list: A sorted list of job fields based on the total number of job postings.
+    """
+    counts = cube.select_time_period(selected_time_period, by_job_field=True)
+    counts = counts[counts["region"] == selected_region]
+    job_counts_by_field = (
+        counts.groupby(["job_fields", "seniority_level"], observed=True)["count"]
+        .sum()
+        .reset_index(name="count")
+        .pipe(decode_categoricals)
+    )
+    return order_by_total_count(job_counts_by_field, "job_fields", seniority_levels)
+
+
+def total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
+    cube, selected_job_field, selected_time_period, seniority_levels
+):
+    """
+    A query to calculate the total number of jobs for a given job field and time period across all
+    regions and seniority levels, from the cube.
+    See queries.total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels.
+
+    Args:
+    cube (JobCube): The job cube.
+    selected_job_field (str): The job field to filter the data by.
+    selected_time_period (str): The time period to filter the job postings (e.g., "year", "month").
+    seniority_levels (list): The list of seniority levels for ordering the data.
+
+    Returns:
+    pandas.DataFrame: A DataFrame with job counts for each region and seniority level.
+    list: A sorted list of regions based on the total number of job postings.
+    """
+    counts = cube.select_time_period(selected_time_period, by_job_field=True)
+    counts = counts[counts["job_fields"] == selected_job_field]
+    job_counts_by_region = (
+        counts.groupby(["region", "seniority_level"], observed=True)["count"]
+        .sum()
+        .reset_index(name="count")
+        .pipe(decode_categoricals)
+    )
+    return order_by_total_count(job_counts_by_region, "region", seniority_levels)
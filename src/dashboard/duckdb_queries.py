@@ -0,0 +1,364 @@
+# duckdb_queries.py
+"""
+This module provides the queries of queries.py as SQL run by an in-process DuckDB database over
+the Parquet snapshot of the jobs.
+
+DuckDB queries the Parquet file in place and runs the queries on all cores, without
+materializing a DataFrame of every job, let alone one exploded by job field. The functions have
+the same names and arguments as those in queries.py, except that the DataFrame is replaced by a
+DuckDBJobs, and return the same DataFrames. The engine is selected with the "query_backend" key
+of configs/streamlit_config.json.
+"""
+
+import duckdb
+import streamlit as st
+from load_data import SNAPSHOT_PATH, refresh_snapshot
+from queries import order_by_total_count, time_period_cutoff
+from sql_queries import TIME_BUCKETS, fill_time_periods
+
+# The jobs of the selected country, see load_data.read_jobs_from_db and pre_processing
+JOBS_CONDITION = """
+    seniority_level != 'Not Applicable'
+    AND region != 'Unspecified'
+    AND LOWER(country) = LOWER($country)
+"""
+
+
+class DuckDBJobs:
+    """
+    The jobs of a country in a DuckDB database.
+
+    Attributes:
+    connection (duckdb.DuckDBPyConnection): A connection to a database with a `jobs` view, see
+                                            load_jobs.
+    country (str): The selected country.
+    """
+
+    def __init__(self, connection, country):
+        self.connection = connection
+        self.country = country
+
+    def read(self, query, **params):
+        """
+        Runs a query on the jobs of the country.
+
+        Args:
+        query (str): An SQL query, in which {jobs} stands for the condition that selects the
+                     jobs of the country.
+        params: The values of the parameters of the query.
+
+        Returns:
+        pandas.DataFrame: The result of the query.
+        """
+        # A cursor is a connection of its own to the same database, so that the sessions of the
+        # dashboard can query it at the same time
+        with self.connection.cursor() as cursor:
+            return cursor.execute(
+                query.format(jobs=JOBS_CONDITION),
+                {"country": self.country, **params},
+            ).df()
+
+    def data_version(self):
+        """
+        A cheap token that changes whenever jobs are added, like load_data.data_version.
+
+        Returns:
+        tuple: The number of jobs of the country and their newest date_posted.
+        """
+        version = self.read(
+            "SELECT COUNT(*) AS row_count, MAX(date_posted) AS date_posted FROM jobs WHERE {jobs}"
+        )
+        return tuple(version.iloc[0])
+
+
+def load_jobs(snapshot_path):
+    """
+    Opens an in-memory DuckDB database over the Parquet snapshot of the jobs.
+
+    The jobs are not copied into the database: `jobs` is a view that reads the columns a query
+    needs from the snapshot each time it is queried.
+
+    Args:
+    snapshot_path (str): The path of the Parquet snapshot, see load_data.refresh_snapshot.
+
+    Returns:
+    duckdb.DuckDBPyConnection: A connection to a database with a `jobs` view, in which
+                               job_fields is parsed into a list.
+    """
+    connection = duckdb.connect()
+    # A view cannot take parameters, so the path is quoted as an SQL string literal
+    snapshot_literal = "'" + str(snapshot_path).replace("'", "''") + "'"
+    connection.execute(f"""
+        CREATE VIEW jobs AS
+        SELECT
+        CAST(date_posted AS TIMESTAMP) AS date_posted,
+        title, company, region, country, seniority_level,
+        CAST(FROM_JSON(job_fields, '["VARCHAR"]') AS VARCHAR[]) AS job_fields,
+        job_url
+        FROM READ_PARQUET({snapshot_literal})
+        """)
+    return connection
+
+
+@st.cache_resource(ttl=43200)  # Refresh the snapshot every 12 hours, like load_data
+def load_duckdb():
+    """
+    Brings the Parquet snapshot up to date and opens DuckDB over it.
+
+    Returns:
+    duckdb.DuckDBPyConnection: A connection to a database with a `jobs` view.
+    """
+    refresh_snapshot(SNAPSHOT_PATH)
+    return load_jobs(SNAPSHOT_PATH)
+
+
+def time_period_condition(selected_time_period):
+    """
+    The DuckDB counterpart of queries.filter_by_time_period.
+
+    Args:
+    selected_time_period (str): The time period to filter the job postings (e.g., "year", "month").
+
+    Returns:
+    str: A condition to AND to a WHERE clause, empty for "Any time".
+    dict: The parameters of the condition.
+    """
+    if selected_time_period == "Any time":
+        return "", {}
+    return "AND date_posted >= $cutoff", {
+        "cutoff": time_period_cutoff(selected_time_period).to_pydatetime()
+    }
+
+
+def total_jobs_per_time_frequency(jobs, selected_time_period):
+    """
+    A query to calculate the total number of jobs posted, grouped by the specified time period, in DuckDB.
+    See queries.total_jobs_per_time_frequency.
+
+    Args:
+    jobs (DuckDBJobs): The jobs in DuckDB.
+    selected_time_period (str): The time period to group the data by ("day", "week", "month", "year" or "Any time").
+
+    Returns:
+    pandas.DataFrame: A DataFrame with the columns `selected_time_period` and `job_count`.
+    """
+    job_counts = jobs.read(f"""
+        SELECT {TIME_BUCKETS[selected_time_period]} AS period, COUNT(*) AS job_count
+        FROM jobs
+        WHERE {{jobs}}
+        GROUP BY period
+        ORDER BY period
+    """)
+    return fill_time_periods(job_counts, selected_time_period)
+
+
+def filter_jobs_by_selectbox(
+    jobs, selected_region, selected_job_field, selected_seniority_level
+):
+    """
+    A query to read the jobs that match the selected filters from the selectbox: region, job field, and seniority level.
+    See queries.filter_jobs_by_selectbox.
+
+    Args:
+    jobs (DuckDBJobs): The jobs in DuckDB.
+    selected_region (str): The region to filter the jobs by.
+    selected_job_field (str): The job field to filter the jobs by.
+    selected_seniority_level (str): The seniority level to filter the jobs by.
+
+    Returns:
+    pandas.DataFrame: A DataFrame containing only jobs that match the selected region, job field, and seniority level,
+                      pre-processed like pre_processing does.
+    """
+    filtered_df = jobs.read(
+        """
+        SELECT date_posted, title, company, region, country, seniority_level, job_fields, job_url
+        FROM jobs
+        WHERE {jobs}
+        AND region = $region
+        AND LIST_CONTAINS(job_fields, $job_field)
+        AND seniority_level = $seniority_level
+        """,
+        region=selected_region,
+        job_field=selected_job_field,
+        seniority_level=selected_seniority_level,
+    )
+    filtered_df["job_fields"] = filtered_df["job_fields"].apply(list)
+    filtered_df["date_posted"] = filtered_df["date_posted"].astype("datetime64[ns]")
+    return filtered_df
+
+
+def separate_for_seniority_levels(
+    jobs, selected_region, selected_job_field, seniority_levels, selected_time_period
+):
+    """
+    A query to separate job counts by seniority level for a selected region, job field, and time period, in DuckDB.
+    See queries.separate_for_seniority_levels.
+
+    Args:
+    jobs (DuckDBJobs): The jobs in DuckDB.
+    selected_region (str): The region to filter the jobs by.
+    selected_job_field (str): The job field to filter the jobs by.
+    seniority_levels (list): A list of seniority levels to analyze.
+    selected_time_period (str): The time period for aggregating job counts (e.g., "day", "week", "month", "year").
+
+    Returns:
+    list: A list of DataFrames, where each DataFrame contains job counts for a specific seniority level.
+    """
+    job_counts = jobs.read(
+        f"""
+        SELECT
+        seniority_level, {TIME_BUCKETS[selected_time_period]} AS period, COUNT(*) AS job_count
+        FROM jobs
+        WHERE {{jobs}}
+        AND region = $region
+        AND LIST_CONTAINS(job_fields, $job_field)
+        GROUP BY seniority_level, period
+        ORDER BY seniority_level, period
+        """,
+        region=selected_region,
+        job_field=selected_job_field,
+    )
+    return [
+        fill_time_periods(
+            job_counts[job_counts["seniority_level"] == level], selected_time_period
+        )
+        for level in seniority_levels
+    ]
+
+
+def top_10_companies(jobs, condition, **params):
+    # See sql_queries.top_10_companies for why every company is read
+    company_job_counts = jobs.read(
+        f"""
+        SELECT company, COUNT(*) AS job_count
+        FROM jobs
+        WHERE {{jobs}}
+        AND company IS NOT NULL
+        {condition}
+        GROUP BY company
+        ORDER BY company
+        """,
+        **params,
+    )
+    company_job_counts["job_count"] = company_job_counts["job_count"].astype("int64")
+    return company_job_counts.nlargest(10, "job_count")
+
+
+def top_10_companies_by_job_field_and_time_period(
+    jobs, selected_job_field, selected_time_period
+):
+    """
+    A query to retrieve the top 10 companies posting jobs in the selected job field within a specified
+    time period, in DuckDB. See queries.top_10_companies_by_job_field_and_time_period.
+
+    Args:
+    jobs (DuckDBJobs): The jobs in DuckDB.
+    selected_job_field (str): The job field to filter the data by.
+    selected_time_period (str): The time period for filtering job postings (e.g., "year", "month").
+
+    Returns:
+    pandas.DataFrame: A DataFrame containing the top 10 companies with the most job postings.
+    """
+    condition, params = time_period_condition(selected_time_period)
+    return top_10_companies(
+        jobs,
+        f"AND LIST_CONTAINS(job_fields, $job_field) {condition}",
+        job_field=selected_job_field,
+        **params,
+    )
+
+
+def top_10_companies_by_region_and_time_period(
+    jobs, selected_region, selected_time_period
+):
+    """
+    A query to retrieve the top 10 companies posting jobs in the selected region within a specified
+    time period, in DuckDB. See queries.top_10_companies_by_region_and_time_period.
+
+    Args:
+    jobs (DuckDBJobs): The jobs in DuckDB.
+    selected_region (str): The region to filter the data by.
+    selected_time_period (str): The time period for filtering job postings (e.g., "year", "month").
+
+    Returns:
+    pandas.DataFrame: A DataFrame containing the top 10 companies with the most job postings.
+    """
+    condition, params = time_period_condition(selected_time_period)
+    return top_10_companies(
+        jobs, f"AND region = $region {condition}", region=selected_region, **params
+    )
+
+
+def total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels(
+    jobs, selected_region, selected_time_period, seniority_levels
+):
+    """
+    A query to calculate the total number of jobs for a selected region and time period across all job
+    fields and seniority levels, in DuckDB.
+    See queries.total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels.
+
+    Args:
+    jobs (DuckDBJobs): The jobs in DuckDB.
+    selected_region (str): The region to filter the data by.
+    selected_time_period (str): The time period to filter the job postings (e.g., "year", "month").
+    seniority_levels (list): The list of seniority levels for ordering the data.
+
+    Returns:
+    pandas.DataFrame: A DataFrame with job counts for each job field and seniority level.
+    list: A sorted list of job fields based on the total number of job postings.
+    """
+    condition, params = time_period_condition(selected_time_period)
+    job_counts_by_field = jobs.read(
+        f"""
+        SELECT job_field AS job_fields, seniority_level, COUNT(*) AS count
+        FROM (
+            SELECT UNNEST(job_fields) AS job_field, seniority_level
+            FROM jobs
+            WHERE {{jobs}}
+            AND region = $region
+            {condition}
+        )
+        GROUP BY job_field, seniority_level
+        ORDER BY job_field, seniority_level
+        """,
+        region=selected_region,
+        **params,
+    )
+    job_counts_by_field["count"] = job_counts_by_field["count"].astype("int64")
+    return order_by_total_count(job_counts_by_field, "job_fields", seniority_levels)
+
+
+def total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
+    jobs, selected_job_field, selected_time_period, seniority_levels
+):
+    """
+    A query to calculate the total number of jobs for a given job field and time period across all
+    regions and seniority levels, in DuckDB.
+    See queries.total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels.
+
+    Args:
+    jobs (DuckDBJobs): The jobs in DuckDB.
+    selected_job_field (str): The job field to filter the data by.
+    selected_time_period (str): The time period to filter the job postings (e.g., "year", "month").
+    seniority_levels (list): The list of seniority levels for ordering the data.
+
+    Returns:
+    pandas.DataFrame: A DataFrame with job counts for each region and seniority level.
+    list: A sorted list of regions based on the total number of job postings.
+    """
+    condition, params = time_period_condition(selected_time_period)
+    job_counts_by_region = jobs.read(
+        f"""
+        SELECT region, seniority_level, COUNT(*) AS count
+        FROM jobs
+        WHERE {{jobs}}
+        AND LIST_CONTAINS(job_fields, $job_field)
+        {condition}
+        GROUP BY region, seniority_level
+        ORDER BY region, seniority_level
+        """,
+        job_field=selected_job_field,
+        **params,
+    )
+    job_counts_by_region["count"] = job_counts_by_region["count"].astype("int64")
+    return order_by_total_count(job_counts_by_region, "region", seniority_levels)
@@ -3,26 +3,46 @@
 """
 This module provides function(s) for loading data from the database
 to Pandas data frame.
+
+The jobs are kept in a local Parquet snapshot under data/, which is what the
+dashboard reads. Each refresh only pulls the rows that were stored in the
+database after the snapshot's newest row and appends them; a full rebuild can
+be run with:
+
+    python src/dashboard/load_data.py --full-rebuild
 """
 
+import argparse
+import os
+
 import pandas as pd
 import streamlit as st
+from pre_processing import compact_dtypes, pre_processing
 from sqlalchemy import create_engine
 
+SNAPSHOT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "../../data/jobs_snapshot.parquet"
+)
 
-@st.cache_data(ttl=43200)  # Cache data for 12 hours
-def load_data():
+# When each row was stored. The scraper backdates date_posted ("3 days ago"), so
+# the rows are pulled by the time they were inserted instead, falling back to
+# date_posted for the rows inserted before the stored_at column was added.
+STORED_AT = "COALESCE(stored_at, date_posted)"
+
+# How far before the newest stored_at of the snapshot a refresh reads again. A
+# row is stamped when its batch's transaction starts, so a batch committed after
+# the snapshot was refreshed can hold rows stamped before its newest row.
+REFRESH_OVERLAP = pd.Timedelta(minutes=10)
+
+
+def create_db_engine():
     """
-    Loads data from the postgres database on the cloud.
+    Creates an SQLAlchemy engine for the postgres database on the cloud.
 
-    This function does not have any parameters. It retrives the database
-    information from .streamlit/secrets.toml.
+    The database information is retrieved from .streamlit/secrets.toml.
 
     Returns:
-    pd.DataFrame: A Dataframe containing the date_posted, job_fields, region,
-                  country, seniority_level, and company from the job table and
-                    filters out rows in which the region and seniority_level
-                    is not defined.
+    sqlalchemy.engine.Engine: The engine connected to the jobs database.
     """
     user = st.secrets["postgres"]["user"]
     password = st.secrets["postgres"]["password"]
@@ -32,15 +52,143 @@ def load_data():
 
     connection_url = f"postgresql://{user}:{password}@{host}:{port}/{dbname}"
 
-    engine = create_engine(connection_url)
+    return create_engine(connection_url)
+
+
+def read_jobs_from_db(since=None):
+    """
+    Reads the jobs from the database.
+
+    Args:
+    since (pd.Timestamp, optional): If given, only the rows stored at or after
+                                    this time are read.
+
+    Returns:
+    pd.DataFrame: A Dataframe containing the date_posted, title, company,
+                  region, country, seniority_level, job_fields, job_url and
+                  stored_at of the jobs in which the region and seniority_level
+                  are defined.
+    """
+    engine = create_db_engine()
 
-    query = """
+    query = f"""
         SELECT
-        date_posted, title, company, region, country, seniority_level, job_fields, job_url
+        date_posted, title, company, region, country, seniority_level, job_fields, job_url,
+        {STORED_AT} AS stored_at
         FROM jobs
         WHERE seniority_level != 'Not Applicable' AND region != 'Unspecified'
     """
 
-    df = pd.read_sql(query, engine)
+    if since is None:
+        return pd.read_sql(query, engine)
+
+    query += f" AND {STORED_AT} >= %(since)s"
+    return pd.read_sql(query, engine, params={"since": since})
+
+
+def refresh_snapshot(snapshot_path=SNAPSHOT_PATH, full_rebuild=False):
+    """
+    Brings the local Parquet snapshot of the jobs up to date.
+
+    Rows stored from REFRESH_OVERLAP before the newest stored_at in the
+    snapshot on are read from the database and appended, and rows that end up
+    in the snapshot twice are dropped. When there is no snapshot yet, it was
+    written before stored_at was kept, or full_rebuild is set, the snapshot is
+    rebuilt from the whole table.
+
+    Args:
+    snapshot_path (str): The path of the Parquet snapshot.
+    full_rebuild (bool): Rebuild the snapshot from scratch.
+
+    Returns:
+    pd.DataFrame: The refreshed snapshot.
+    """
+    snapshot = None
+    if not full_rebuild and os.path.exists(snapshot_path):
+        snapshot = pd.read_parquet(snapshot_path, memory_map=True)
+    if snapshot is None or "stored_at" not in snapshot.columns:
+        df = read_jobs_from_db()
+    else:
+        since = (
+            snapshot["stored_at"].max() - REFRESH_OVERLAP
+            if not snapshot.empty
+            else None
+        )
+        new_rows = read_jobs_from_db(since)
+        df = pd.concat([snapshot, new_rows], ignore_index=True).drop_duplicates(
+            subset=["job_url", "date_posted"], keep="last", ignore_index=True
+        )
+
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    tmp_path = f"{snapshot_path}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, snapshot_path)
 
     return df
+
+
+def data_version(df):
+    """
+    A cheap token that changes whenever a snapshot refresh adds jobs.
+
+    Args:
+    df (pd.DataFrame): The loaded jobs.
+
+    Returns:
+    tuple: The number of rows and the newest date_posted of df.
+    """
+    return len(df), df["date_posted"].max()
+
+
+# Keep the jobs for 12 hours. The same frame is shared by every session and rerun, so it is
+# converted only once per refresh and must not be modified, see pre_processing
+@st.cache_resource(ttl=43200)
+def load_data():
+    """
+    Loads the jobs for the dashboard from the local Parquet snapshot, after
+    appending the rows that were added to the postgres database on the cloud
+    since the last refresh, and converts them to compact dtypes.
+
+    This function does not have any parameters. It retrives the database
+    information from .streamlit/secrets.toml.
+
+    Returns:
+    pd.DataFrame: A Dataframe containing the date_posted, job_fields, region,
+                  country, seniority_level, and company from the job table and
+                    filters out rows in which the region and seniority_level
+                    is not defined, in the dtypes of pre_processing.compact_dtypes.
+    """
+    return compact_dtypes(refresh_snapshot(SNAPSHOT_PATH).drop(columns="stored_at"))
+
+
+# Filtered once per country and refresh, like the cube of cube.load_job_cube
+@st.cache_resource(ttl=43200, max_entries=8)
+def load_country_jobs(_df, selected_country, data_version):
+    """
+    Pre-processes the loaded jobs for a country once per data refresh.
+
+    Args:
+    _df (pandas.DataFrame): The jobs returned by load_data. It is not hashed.
+    selected_country (str): The selected country.
+    data_version (tuple): The version of the loaded data, see data_version.
+
+    Returns:
+    pandas.DataFrame: The jobs of the country, see pre_processing.pre_processing. The same frame
+                      is shared by every session and rerun and must not be modified.
+    """
+    return pre_processing(_df, selected_country)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Refresh the local Parquet snapshot of the jobs table."
+    )
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="Rebuild the snapshot from the whole table instead of appending.",
+    )
+    args = parser.parse_args()
+
+    snapshot = refresh_snapshot(SNAPSHOT_PATH, full_rebuild=args.full_rebuild)
+    print(f"Snapshot at {SNAPSHOT_PATH} holds {len(snapshot)} jobs")
@@ -32,3 +32,19 @@ def load_defaults(app_path, country):
                 item["default_seniority_level"],
                 item["default_time_period"],
             )
+
+
+def load_query_backend(app_path):
+    """Loads the backend that answers the queries of the dashboard.
+
+    Args:
+    app_path (str): The base path to the application directory.
+
+    Returns:
+    str: "pandas" to query the jobs loaded into the application, "sql" to
+         run the queries in the postgres database, or "duckdb" to run them
+         in DuckDB over the Parquet snapshot. Defaults to "pandas".
+    """
+    with open(f"{app_path}/configs/streamlit_config.json") as file:
+        defaults_data = json.load(file)
+    return defaults_data.get("query_backend", "pandas")
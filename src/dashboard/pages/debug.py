@@ -0,0 +1,41 @@
+# debug.py
+"""
+This page of the dashboard shows diagnostics for the maintainers, such as
+the hits and misses of the query cache and the memory used by the jobs.
+"""
+
+import os
+
+import load_resources as loader
+import streamlit as st
+from cached_queries import QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_TTL, query_cache_stats
+from load_data import load_data
+from pre_processing import memory_report, pre_processing
+
+if __name__ == "__main__":
+    app_path = os.path.dirname(os.path.abspath(__file__))
+    app_path += "/../../.."
+
+    st.set_page_config(page_title="Debug", layout="wide")
+
+    st.header("Query cache")
+    st.caption(
+        f"Up to {QUERY_CACHE_MAX_ENTRIES} results are kept, each for "
+        f"{QUERY_CACHE_TTL // 3600} hours. The counts are per server process."
+    )
+    st.dataframe(query_cache_stats(), hide_index=True)
+
+    st.header("Memory")
+    st.caption(
+        "The bytes of each column of the jobs as loaded, and of the jobs of a "
+        "country after pre-processing."
+    )
+    df = load_data()
+    selected_country = st.selectbox("Country", loader.load_countries(app_path))
+    loaded_column, pre_processed_column = st.columns(2)
+    loaded_column.subheader("Loaded")
+    loaded_column.dataframe(memory_report(df), hide_index=True)
+    pre_processed_column.subheader("Pre-processed")
+    pre_processed_column.dataframe(
+        memory_report(pre_processing(df, selected_country)), hide_index=True
+    )
@@ -5,9 +5,16 @@ information from it.
 """
 
 import json
+import weakref
 
 import pandas as pd
 
+# Columns with few distinct values, which are stored once per value as categoricals
+CATEGORY_COLUMNS = ["title", "company", "region", "country", "seniority_level"]
+
+# The decoded job fields of each categories Index still in use, by its id, see job_field_lists
+decoded_job_fields = {}
+
 
 def pre_processing(df, selected_country):
     """
@@ -18,15 +25,111 @@ def pre_processing(df, selected_country):
     selected_country (str): The country to filter.
 
     Returns:
-    pandas.DataFrame: A filtered and cleaned DataFrame.
+    pandas.DataFrame: A filtered and cleaned DataFrame in the compact layout of compact_dtypes.
+                      df itself is not modified. When df is already in that layout, as the
+                      jobs returned by load_data are, only the rows are filtered.
     """
-    df["job_fields"] = df["job_fields"].apply(
-        lambda x: json.loads(x) if isinstance(x, str) else x
-    )
-    df["date_posted"] = pd.to_datetime(df["date_posted"])
-
     df = df[
         (df["country"].str.lower() == selected_country.lower())
         & (df["region"] != "Unspecified")
     ]
-    return df
+    return compact_dtypes(df)
+
+
+def compact_dtypes(df):
+    """
+    Converts the columns of the jobs to compact dtypes: CATEGORY_COLUMNS to categoricals,
+    'date_posted' to datetimes and 'job_fields' to the categorical of encode_job_fields.
+    Columns that already have their compact dtype are kept as they are.
+
+    Args:
+    df (pandas.DataFrame): A DataFrame containing job data.
+
+    Returns:
+    pandas.DataFrame: A copy of df with the compact dtypes.
+    """
+    dtypes = {
+        column: "category"
+        for column in CATEGORY_COLUMNS
+        if column in df.columns
+        and not isinstance(df[column].dtype, pd.CategoricalDtype)
+    }
+    date_posted = df["date_posted"]
+    if date_posted.dtype != "datetime64[ns]":
+        # In nanoseconds, like the time periods of the SQL and DuckDB queries
+        date_posted = pd.to_datetime(date_posted).astype("datetime64[ns]")
+    return df.astype(dtypes).assign(
+        date_posted=date_posted, job_fields=encode_job_fields(df["job_fields"])
+    )
+
+
+def encode_job_fields(job_fields):
+    """
+    Encodes the job fields of each job as an integer code of its combination of job fields.
+
+    A few hundred combinations of job fields cover all the jobs, so the job fields are stored as
+    a categorical whose categories are the combinations, as JSON arrays like the ones in the
+    database, and whose codes are small integers. Queries decode the categories, not the rows,
+    see job_field_lists.
+
+    Args:
+    job_fields (pandas.Series): JSON arrays of job field names, or lists of job field names.
+
+    Returns:
+    pandas.Series: A categorical Series with the same index as job_fields.
+    """
+    if isinstance(job_fields.dtype, pd.CategoricalDtype):
+        return job_fields
+    if pd.api.types.infer_dtype(job_fields, skipna=True) != "string":
+        job_fields = job_fields.map(
+            lambda x: x if isinstance(x, str) else json.dumps(list(x))
+        )
+    return job_fields.astype("category")
+
+
+def job_field_lists(job_fields):
+    """
+    Decodes the combinations of job fields of an encoded job_fields column.
+
+    The jobs of every rerun share the categories of the loaded jobs, so they are decoded once
+    and kept for as long as the categories are in use.
+
+    Args:
+    job_fields (pandas.Series): A job_fields column encoded by encode_job_fields.
+
+    Returns:
+    list: The list of job field names of each category, in the order of the category codes.
+          It is shared between the calls and must not be modified.
+    """
+    categories = job_fields.cat.categories
+    key = id(categories)
+    if key in decoded_job_fields:
+        reference, lists = decoded_job_fields[key]
+        if reference() is categories:
+            return lists
+    lists = [json.loads(fields) for fields in categories]
+    decoded_job_fields[key] = (
+        weakref.ref(categories, lambda _: decoded_job_fields.pop(key, None)),
+        lists,
+    )
+    return lists
+
+
+def memory_report(df):
+    """
+    Reports the memory used by each column of a DataFrame.
+
+    Args:
+    df (pandas.DataFrame): Any DataFrame.
+
+    Returns:
+    pandas.DataFrame: A DataFrame with the columns 'column', 'dtype' and 'bytes', one row per
+                      column of df plus one for its index, and a last 'Total' row.
+    """
+    usage = df.memory_usage(deep=True)
+    dtypes = df.dtypes.astype(str).reindex(usage.index, fill_value="")
+    report = pd.DataFrame(
+        {"column": usage.index, "dtype": dtypes.to_numpy(), "bytes": usage.to_numpy()}
+    )
+    total = pd.DataFrame({"column": ["Total"], "dtype": [""], "bytes": [usage.sum()]})
+    return pd.concat([report, total], ignore_index=True)
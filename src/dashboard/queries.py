@@ -1,7 +1,18 @@
 # queries.py
 """This module provides functions for different queries that the application requires."""
 
+import numpy as np
 import pandas as pd
+from pre_processing import job_field_lists
+
+# The pandas frequency each time period is grouped by
+TIME_FREQUENCIES = {
+    "day": "D",
+    "week": "W",
+    "month": "ME",
+    "year": "YE",
+    "Any time": "YE",
+}
 
 
 def total_jobs_per_time_frequency(df, selected_time_period):
@@ -22,30 +33,13 @@ def total_jobs_per_time_frequency(df, selected_time_period):
                         - `selected_time_period`: The time period (e.g., day, week, month, year).
                         - `job_count`: The number of jobs posted in that time period.
     """
-    if selected_time_period == "day":
-        job_counts = (
-            df.groupby(pd.Grouper(key="date_posted", freq="D"))
-            .size()
-            .reset_index(name="job_count")
-        )
-    elif selected_time_period == "week":
-        job_counts = (
-            df.groupby(pd.Grouper(key="date_posted", freq="W"))
-            .size()
-            .reset_index(name="job_count")
-        )
-    elif selected_time_period == "month":
-        job_counts = (
-            df.groupby(pd.Grouper(key="date_posted", freq="ME"))
-            .size()
-            .reset_index(name="job_count")
-        )
-    elif selected_time_period == "year" or selected_time_period == "Any time":
-        job_counts = (
-            df.groupby(pd.Grouper(key="date_posted", freq="YE"))
-            .size()
-            .reset_index(name="job_count")
+    job_counts = (
+        df.groupby(
+            pd.Grouper(key="date_posted", freq=TIME_FREQUENCIES[selected_time_period])
         )
+        .size()
+        .reset_index(name="job_count")
+    )
 
     job_counts.rename(columns={"date_posted": selected_time_period}, inplace=True)
     job_counts = job_counts.sort_values(selected_time_period).reset_index(drop=True)
@@ -53,6 +47,85 @@ def total_jobs_per_time_frequency(df, selected_time_period):
     return job_counts
 
 
+def job_field_mask(df, selected_job_field):
+    """
+    A query to find the rows whose job fields contain the selected job field.
+
+    If the job fields are encoded by pre_processing.encode_job_fields, only the combinations of job
+    fields are searched and the mask is read through the codes; otherwise the job_fields lists are scanned.
+
+    Args:
+    df (pandas.DataFrame): The DataFrame containing job data with a 'job_fields' column.
+    selected_job_field (str): The job field to look for.
+
+    Returns:
+    pandas.Series: A boolean Series aligned with df, True for the rows in the selected job field.
+    """
+    job_fields = df["job_fields"]
+    if not isinstance(job_fields.dtype, pd.CategoricalDtype):
+        return job_fields.apply(lambda x: selected_job_field in x)
+
+    # The code of a missing value, -1, picks the last, False, element
+    contains = np.array(
+        [selected_job_field in fields for fields in job_field_lists(job_fields)]
+        + [False]
+    )
+    return pd.Series(contains[job_fields.cat.codes.to_numpy()], index=df.index)
+
+
+def explode_job_fields(df):
+    """
+    A query to repeat each row once per job field, like df.explode("job_fields").
+
+    Args:
+    df (pandas.DataFrame): The DataFrame containing job data with a 'job_fields' column, either lists
+                           or encoded by pre_processing.encode_job_fields.
+
+    Returns:
+    pandas.DataFrame: A DataFrame with one row per job and job field, in which 'job_fields' holds a single
+                      job field, or NaN for the jobs without any.
+    """
+    job_fields = df["job_fields"]
+    if not isinstance(job_fields.dtype, pd.CategoricalDtype):
+        return df.explode("job_fields")
+
+    # Lay out the job fields of every combination, plus one for missing values, in one array and
+    # gather each row's slice of it
+    combinations = [fields or [np.nan] for fields in job_field_lists(job_fields)]
+    combinations.append([np.nan])
+    lengths = np.array([len(fields) for fields in combinations])
+    starts = np.cumsum(lengths) - lengths
+    flat = np.array(
+        [field for fields in combinations for field in fields], dtype=object
+    )
+
+    codes = job_fields.cat.codes.to_numpy()
+    counts = lengths[codes]
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    exploded = df.iloc[np.repeat(np.arange(len(df)), counts)]
+    return exploded.assign(job_fields=flat[np.repeat(starts[codes], counts) + offsets])
+
+
+def decode_categoricals(df):
+    """
+    A query to turn the categorical columns of a result back into the dtype of their values, so
+    that results are the same whether the jobs are stored as categoricals or not.
+
+    Args:
+    df (pandas.DataFrame): A query result.
+
+    Returns:
+    pandas.DataFrame: df without categorical columns.
+    """
+    return df.astype(
+        {
+            column: dtype.categories.dtype
+            for column, dtype in df.dtypes.items()
+            if isinstance(dtype, pd.CategoricalDtype)
+        }
+    )
+
+
 def filter_by_time_period(df, time_period, quantity=1):
     """
     A query to filter the DataFrame based on the selected time period, returning only rows where the 'date_posted'
@@ -72,22 +145,28 @@ def filter_by_time_period(df, time_period, quantity=1):
     """
     if time_period == "Any time":
         return df
-    elif time_period == "year":
-        return df[
-            df["date_posted"] >= pd.Timestamp.now() - pd.DateOffset(years=quantity)
-        ]
+    return df[df["date_posted"] >= time_period_cutoff(time_period, quantity)]
+
+
+def time_period_cutoff(time_period, quantity=1):
+    """
+    A query to calculate the earliest posting time included in the selected time period.
+
+    Args:
+    time_period (str): The time period ("year", "month", "week" or "day").
+    quantity (int): The number of time periods to go back.
+
+    Returns:
+    pandas.Timestamp: The current time minus the selected time period.
+    """
+    if time_period == "year":
+        return pd.Timestamp.now() - pd.DateOffset(years=quantity)
     elif time_period == "month":
-        return df[
-            df["date_posted"] >= pd.Timestamp.now() - pd.DateOffset(months=quantity)
-        ]
+        return pd.Timestamp.now() - pd.DateOffset(months=quantity)
     elif time_period == "week":
-        return df[
-            df["date_posted"] >= pd.Timestamp.now() - pd.DateOffset(weeks=quantity)
-        ]
+        return pd.Timestamp.now() - pd.DateOffset(weeks=quantity)
     elif time_period == "day":
-        return df[
-            df["date_posted"] >= pd.Timestamp.now() - pd.DateOffset(days=quantity)
-        ]
+        return pd.Timestamp.now() - pd.DateOffset(days=quantity)
 
 
 def filter_jobs_by_selectbox(
@@ -107,7 +186,7 @@ def filter_jobs_by_selectbox(
     """
     filtered_df = df[
         (df["region"] == selected_region)
-        & (df["job_fields"].apply(lambda x: selected_job_field in x))
+        & job_field_mask(df, selected_job_field)
         & (df["seniority_level"] == selected_seniority_level)
     ]
     return filtered_df
@@ -129,11 +208,12 @@ def separate_for_seniority_levels(
     Returns:
     list: A list of DataFrames, where each DataFrame contains job counts for a specific seniority level.
     """
+    df_selected = df[
+        (df["region"] == selected_region) & job_field_mask(df, selected_job_field)
+    ]
     count_seniority_levels = []
     for level in seniority_levels:
-        df_seniority_level = filter_jobs_by_selectbox(
-            df, selected_region, selected_job_field, level
-        )
+        df_seniority_level = df_selected[df_selected["seniority_level"] == level]
         level_count = total_jobs_per_time_frequency(
             df_seniority_level, selected_time_period
         )
@@ -151,8 +231,10 @@ def top_10_companies_by_selectbox(filtered_df):
     Returns:
     pandas.DataFrame: A DataFrame containing the top 10 companies with the highest job counts.
     """
-    company_job_counts_field = (
-        filtered_df.groupby("company").size().reset_index(name="job_count")
+    company_job_counts_field = decode_categoricals(
+        filtered_df.groupby("company", observed=True)
+        .size()
+        .reset_index(name="job_count")
     )
     top_10_companies_selectbox = company_job_counts_field.nlargest(10, "job_count")
 
@@ -177,15 +259,17 @@ def top_10_companies_by_job_field_and_time_period(
     pandas.DataFrame: A DataFrame containing the top 10 companies with the most job postings
                        in the selected job field and time period.
     """
-    company_job_counts_field = df[
-        df["job_fields"].apply(lambda x: selected_job_field in x)
-    ][["company", "date_posted"]]
+    company_job_counts_field = df[job_field_mask(df, selected_job_field)][
+        ["company", "date_posted"]
+    ]
 
     company_job_counts_field = filter_by_time_period(
         company_job_counts_field, selected_time_period
     )
-    company_job_counts_field = (
-        company_job_counts_field.groupby("company").size().reset_index(name="job_count")
+    company_job_counts_field = decode_categoricals(
+        company_job_counts_field.groupby("company", observed=True)
+        .size()
+        .reset_index(name="job_count")
     )
     top_10_companies_field = company_job_counts_field.nlargest(10, "job_count")
 
@@ -217,8 +301,8 @@ def top_10_companies_by_region_and_time_period(
     company_job_counts_region = filter_by_time_period(
         company_job_counts_region, selected_time_period
     )
-    company_job_counts_region = (
-        company_job_counts_region.groupby("company")
+    company_job_counts_region = decode_categoricals(
+        company_job_counts_region.groupby("company", observed=True)
         .size()
         .reset_index(name="job_count")
     )
@@ -252,32 +336,14 @@ def total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels(
 
     region_job_counts = filter_by_time_period(region_job_counts, selected_time_period)
 
-    job_counts_by_field = region_job_counts.explode("job_fields")
-    job_counts_by_field = (
-        job_counts_by_field.groupby(["job_fields", "seniority_level"])
+    job_counts_by_field = explode_job_fields(region_job_counts)
+    job_counts_by_field = decode_categoricals(
+        job_counts_by_field.groupby(["job_fields", "seniority_level"], observed=True)
         .size()
         .reset_index(name="count")
     )
 
-    total_job_counts_by_field = (
-        job_counts_by_field.groupby("job_fields")["count"]
-        .sum()
-        .reset_index(name="total_count")
-    )
-    sorted_job_fields = total_job_counts_by_field.sort_values(
-        by="total_count", ascending=False
-    )["job_fields"]
-
-    job_counts_by_field["job_fields"] = pd.Categorical(
-        job_counts_by_field["job_fields"], categories=sorted_job_fields, ordered=True
-    )
-    job_counts_by_field["seniority_level"] = pd.Categorical(
-        job_counts_by_field["seniority_level"],
-        categories=seniority_levels,
-        ordered=True,
-    )
-
-    return job_counts_by_field, sorted_job_fields
+    return order_by_total_count(job_counts_by_field, "job_fields", seniority_levels)
 
 
 def total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
@@ -299,32 +365,47 @@ def total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
                        job field and time period.
     list: A sorted list of regions based on the total number of job postings.
     """
-    field_job_counts = df[(df["job_fields"].apply(lambda x: selected_job_field in x))][
+    field_job_counts = df[job_field_mask(df, selected_job_field)][
         ["region", "seniority_level", "date_posted"]
     ]
 
     field_job_counts = filter_by_time_period(field_job_counts, selected_time_period)
-    job_counts_by_region = (
-        field_job_counts.groupby(["region", "seniority_level"])
+    job_counts_by_region = decode_categoricals(
+        field_job_counts.groupby(["region", "seniority_level"], observed=True)
         .size()
         .reset_index(name="count")
     )
-    total_job_counts_by_region = (
-        job_counts_by_region.groupby("region")["count"]
-        .sum()
-        .reset_index(name="total_count")
+    return order_by_total_count(job_counts_by_region, "region", seniority_levels)
+
+
+def order_by_total_count(job_counts, column, seniority_levels):
+    """
+    A query to order job counts per (column, seniority level) by the total job count of each value
+    of column, for the stacked bar charts.
+
+    Args:
+    job_counts (pandas.DataFrame): A DataFrame with columns column, 'seniority_level' and 'count'.
+    column (str): The column the bars are drawn for (e.g. "region" or "job_fields").
+    seniority_levels (list): The list of seniority levels for ordering the data.
+
+    Returns:
+    pandas.DataFrame: job_counts with column and 'seniority_level' turned into ordered categoricals.
+    list: The values of column sorted by their total number of job postings, descending.
+    """
+    total_job_counts = (
+        job_counts.groupby(column)["count"].sum().reset_index(name="total_count")
     )
-    sorted_regions = total_job_counts_by_region.sort_values(
-        by="total_count", ascending=False
-    )["region"]
+    sorted_values = total_job_counts.sort_values(by="total_count", ascending=False)[
+        column
+    ]
 
-    job_counts_by_region["region"] = pd.Categorical(
-        job_counts_by_region["region"], categories=sorted_regions, ordered=True
+    job_counts[column] = pd.Categorical(
+        job_counts[column], categories=sorted_values, ordered=True
     )
-    job_counts_by_region["seniority_level"] = pd.Categorical(
-        job_counts_by_region["seniority_level"],
+    job_counts["seniority_level"] = pd.Categorical(
+        job_counts["seniority_level"],
         categories=seniority_levels,
         ordered=True,
     )
 
-    return job_counts_by_region, sorted_regions
+    return job_counts, sorted_values
@@ -0,0 +1,375 @@
+# sql_queries.py
+"""
+This module provides the queries of queries.py as aggregate SQL that runs in the postgres
+database, so that only the small result frames are read into the application instead of
+every job.
+
+The functions have the same names and arguments as those in queries.py, except that the
+DataFrame is replaced by a JobsTable, and return the same DataFrames. The backend is selected
+with the "query_backend" key of configs/streamlit_config.json.
+"""
+
+import json
+
+import pandas as pd
+import streamlit as st
+from load_data import create_db_engine
+from queries import TIME_FREQUENCIES, order_by_total_count, time_period_cutoff
+from sqlalchemy import text
+
+# The jobs the dashboard shows, see load_data.read_jobs_from_db and pre_processing
+JOBS_CONDITION = """
+    seniority_level != 'Not Applicable'
+    AND region != 'Unspecified'
+    AND LOWER(country) = LOWER(:country)
+"""
+
+# The time period bins of TIME_FREQUENCIES, labeled like pandas labels them: a week by its
+# Sunday, a month and a year by their last day
+TIME_BUCKETS = {
+    "day": "DATE_TRUNC('day', date_posted)",
+    "week": "DATE_TRUNC('week', date_posted) + INTERVAL '6 days'",
+    "month": "DATE_TRUNC('month', date_posted) + INTERVAL '1 month' - INTERVAL '1 day'",
+    "year": "DATE_TRUNC('year', date_posted) + INTERVAL '1 year' - INTERVAL '1 day'",
+    "Any time": "DATE_TRUNC('year', date_posted) + INTERVAL '1 year' - INTERVAL '1 day'",
+}
+
+JOB_FIELDS = "CAST(job_fields AS JSONB)"
+
+
+class JobsTable:
+    """
+    The jobs of a country in the postgres database.
+
+    Attributes:
+    engine (sqlalchemy.engine.Engine): The engine connected to the jobs database.
+    country (str): The selected country.
+    """
+
+    def __init__(self, engine, country):
+        self.engine = engine
+        self.country = country
+
+    def read(self, query, **params):
+        """
+        Runs a query on the jobs of the country.
+
+        Args:
+        query (str): An SQL query, in which {jobs} stands for the condition that selects the
+                     jobs of the country.
+        params: The values of the bind parameters of the query.
+
+        Returns:
+        pandas.DataFrame: The result of the query.
+        """
+        return pd.read_sql(
+            text(query.format(jobs=JOBS_CONDITION)),
+            self.engine,
+            params={"country": self.country, **params},
+        )
+
+    def data_version(self):
+        """
+        A cheap token that changes whenever jobs are added, like load_data.data_version.
+
+        Returns:
+        tuple: The number of jobs of the country and their newest date_posted.
+        """
+        version = self.read(
+            "SELECT COUNT(*) AS row_count, MAX(date_posted) AS date_posted FROM jobs WHERE {jobs}"
+        )
+        return tuple(version.iloc[0])
+
+
+@st.cache_resource
+def load_db_engine():
+    """
+    Creates the engine of the postgres database once, so that its connection pool is shared
+    between the sessions.
+
+    Returns:
+    sqlalchemy.engine.Engine: The engine connected to the jobs database.
+    """
+    return create_db_engine()
+
+
+def time_period_condition(selected_time_period):
+    """
+    The SQL counterpart of queries.filter_by_time_period.
+
+    Args:
+    selected_time_period (str): The time period to filter the job postings (e.g., "year", "month").
+
+    Returns:
+    str: A condition to AND to a WHERE clause, empty for "Any time".
+    dict: The bind parameters of the condition.
+    """
+    if selected_time_period == "Any time":
+        return "", {}
+    return "AND date_posted >= :cutoff", {
+        "cutoff": time_period_cutoff(selected_time_period).to_pydatetime()
+    }
+
+
+def fill_time_periods(job_counts, selected_time_period):
+    """
+    Adds the time periods without any jobs to job counts read from the database, with a count
+    of zero, like pandas does when grouping by time.
+
+    Args:
+    job_counts (pandas.DataFrame): A DataFrame with the columns 'period' and 'job_count'.
+    selected_time_period (str): The time period the jobs were grouped by.
+
+    Returns:
+    pandas.DataFrame: A DataFrame with the columns `selected_time_period` and `job_count`.
+    """
+    periods = pd.to_datetime(job_counts["period"]).astype("datetime64[ns]")
+    if job_counts.empty:
+        all_periods = pd.DatetimeIndex([], dtype="datetime64[ns]")
+    else:
+        all_periods = pd.date_range(
+            periods.min(), periods.max(), freq=TIME_FREQUENCIES[selected_time_period]
+        )
+    job_counts = (
+        job_counts["job_count"]
+        .astype("int64")
+        .set_axis(pd.DatetimeIndex(periods))
+        .reindex(all_periods, fill_value=0)
+    )
+    return job_counts.rename_axis(selected_time_period).reset_index(name="job_count")
+
+
+def total_jobs_per_time_frequency(jobs, selected_time_period):
+    """
+    A query to calculate the total number of jobs posted, grouped by the specified time period, in the database.
+    See queries.total_jobs_per_time_frequency.
+
+    Args:
+    jobs (JobsTable): The jobs in the database.
+    selected_time_period (str): The time period to group the data by ("day", "week", "month", "year" or "Any time").
+
+    Returns:
+    pandas.DataFrame: A DataFrame with the columns `selected_time_period` and `job_count`.
+    """
+    job_counts = jobs.read(f"""
+        SELECT {TIME_BUCKETS[selected_time_period]} AS period, COUNT(*) AS job_count
+        FROM jobs
+        WHERE {{jobs}}
+        GROUP BY period
+        ORDER BY period
+    """)
+    return fill_time_periods(job_counts, selected_time_period)
+
+
+def filter_jobs_by_selectbox(
+    jobs, selected_region, selected_job_field, selected_seniority_level
+):
+    """
+    A query to read the jobs that match the selected filters from the selectbox: region, job field, and seniority level.
+    See queries.filter_jobs_by_selectbox.
+
+    Args:
+    jobs (JobsTable): The jobs in the database.
+    selected_region (str): The region to filter the jobs by.
+    selected_job_field (str): The job field to filter the jobs by.
+    selected_seniority_level (str): The seniority level to filter the jobs by.
+
+    Returns:
+    pandas.DataFrame: A DataFrame containing only jobs that match the selected region, job field, and seniority level,
+                      pre-processed like pre_processing does.
+    """
+    filtered_df = jobs.read(
+        f"""
+        SELECT date_posted, title, company, region, country, seniority_level, job_fields, job_url
+        FROM jobs
+        WHERE {{jobs}}
+        AND region = :region
+        AND {JOB_FIELDS} ? :job_field
+        AND seniority_level = :seniority_level
+        """,
+        region=selected_region,
+        job_field=selected_job_field,
+        seniority_level=selected_seniority_level,
+    )
+    filtered_df["job_fields"] = filtered_df["job_fields"].apply(
+        lambda x: json.loads(x) if isinstance(x, str) else x
+    )
+    filtered_df["date_posted"] = pd.to_datetime(filtered_df["date_posted"])
+    return filtered_df
+
+
+def separate_for_seniority_levels(
+    jobs, selected_region, selected_job_field, seniority_levels, selected_time_period
+):
+    """
+    A query to separate job counts by seniority level for a selected region, job field, and time period, in the database.
+    See queries.separate_for_seniority_levels.
+
+    Args:
+    jobs (JobsTable): The jobs in the database.
+    selected_region (str): The region to filter the jobs by.
+    selected_job_field (str): The job field to filter the jobs by.
+    seniority_levels (list): A list of seniority levels to analyze.
+    selected_time_period (str): The time period for aggregating job counts (e.g., "day", "week", "month", "year").
+
+    Returns:
+    list: A list of DataFrames, where each DataFrame contains job counts for a specific seniority level.
+    """
+    job_counts = jobs.read(
+        f"""
+        SELECT
+        seniority_level, {TIME_BUCKETS[selected_time_period]} AS period, COUNT(*) AS job_count
+        FROM jobs
+        WHERE {{jobs}}
+        AND region = :region
+        AND {JOB_FIELDS} ? :job_field
+        GROUP BY seniority_level, period
+        ORDER BY seniority_level, period
+        """,
+        region=selected_region,
+        job_field=selected_job_field,
+    )
+    return [
+        fill_time_periods(
+            job_counts[job_counts["seniority_level"] == level], selected_time_period
+        )
+        for level in seniority_levels
+    ]
+
+
+def top_10_companies(jobs, condition, **params):
+    # The ties of pandas.DataFrame.nlargest depend on the order of all of its input rows, so the
+    # counts of every company, sorted by name like pandas groups them, are read and the top 10
+    # are picked the same way queries.py picks them
+    company_job_counts = jobs.read(
+        f"""
+        SELECT company, COUNT(*) AS job_count
+        FROM jobs
+        WHERE {{jobs}}
+        AND company IS NOT NULL
+        {condition}
+        GROUP BY company
+        ORDER BY company COLLATE "C"
+        """,
+        **params,
+    )
+    company_job_counts["job_count"] = company_job_counts["job_count"].astype("int64")
+    return company_job_counts.nlargest(10, "job_count")
+
+
+def top_10_companies_by_job_field_and_time_period(
+    jobs, selected_job_field, selected_time_period
+):
+    """
+    A query to retrieve the top 10 companies posting jobs in the selected job field within a specified
+    time period, in the database. See queries.top_10_companies_by_job_field_and_time_period.
+
+    Args:
+    jobs (JobsTable): The jobs in the database.
+    selected_job_field (str): The job field to filter the data by.
+    selected_time_period (str): The time period for filtering job postings (e.g., "year", "month").
+
+    Returns:
+    pandas.DataFrame: A DataFrame containing the top 10 companies with the most job postings.
+    """
+    condition, params = time_period_condition(selected_time_period)
+    return top_10_companies(
+        jobs,
+        f"AND {JOB_FIELDS} ? :job_field {condition}",
+        job_field=selected_job_field,
+        **params,
+    )
+
+
+def top_10_companies_by_region_and_time_period(
+    jobs, selected_region, selected_time_period
+):
+    """
+    A query to retrieve the top 10 companies posting jobs in the selected region within a specified
+    time period, in the database. See queries.top_10_companies_by_region_and_time_period.
+
+    Args:
+    jobs (JobsTable): The jobs in the database.
+    selected_region (str): The region to filter the data by.
+    selected_time_period (str): The time period for filtering job postings (e.g., "year", "month").
+
+    Returns:
+    pandas.DataFrame: A DataFrame containing the top 10 companies with the most job postings.
+    """
+    condition, params = time_period_condition(selected_time_period)
+    return top_10_companies(
+        jobs, f"AND region = :region {condition}", region=selected_region, **params
+    )
+
+
+def total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels(
+    jobs, selected_region, selected_time_period, seniority_levels
+):
+    """
+    A query to calculate the total number of jobs for a selected region and time period across all job
+    fields and seniority levels, in the database.
+    See queries.total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels.
+
+    Args:
+    jobs (JobsTable): The jobs in the database.
+    selected_region (str): The region to filter the data by.
+    selected_time_period (str): The time period to filter the job postings (e.g., "year", "month").
+    seniority_levels (list): The list of seniority levels for ordering the data.
+
+    Returns:
+    pandas.DataFrame: A DataFrame with job counts for each job field and seniority level.
+    list: A sorted list of job fields based on the total number of job postings.
+    """
+    condition, params = time_period_condition(selected_time_period)
+    job_counts_by_field = jobs.read(
+        f"""
+        SELECT job_field AS job_fields, seniority_level, COUNT(*) AS count
+        FROM jobs
+        CROSS JOIN LATERAL JSONB_ARRAY_ELEMENTS_TEXT({JOB_FIELDS}) AS job_field
+        WHERE {{jobs}}
+        AND region = :region
+        {condition}
+        GROUP BY job_field, seniority_level
+        ORDER BY job_field COLLATE "C", seniority_level COLLATE "C"
+        """,
+        region=selected_region,
+        **params,
+    )
+    job_counts_by_field["count"] = job_counts_by_field["count"].astype("int64")
+    return order_by_total_count(job_counts_by_field, "job_fields", seniority_levels)
+
+
+def total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
+    jobs, selected_job_field, selected_time_period, seniority_levels
+):
+    """
+    A query to calculate the total number of jobs for a given job field and time period across all
+    regions and seniority levels, in the database.
+    See queries.total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels.
+
+    Args:
+    jobs (JobsTable): The jobs in the database.
+    selected_job_field (str): The job field to filter the data by.
+    selected_time_period (str): The time period to filter the job postings (e.g., "year", "month").
+    seniority_levels (list): The list of seniority levels for ordering the data.
+
+    Returns:
+    pandas.DataFrame: A DataFrame with job counts for each region and seniority level.
+    list: A sorted list of regions based on the total number of job postings.
+    """
+    condition, params = time_period_condition(selected_time_period)
+    job_counts_by_region = jobs.read(
+        f"""
+        SELECT region, seniority_level, COUNT(*) AS count
+        FROM jobs
+        WHERE {{jobs}}
+        AND {JOB_FIELDS} ? :job_field
+        {condition}
+        GROUP BY region, seniority_level
+        ORDER BY region COLLATE "C", seniority_level COLLATE "C"
+        """,
+        job_field=selected_job_field,
+        **params,
+    )
+    job_counts_by_region["count"] = job_counts_by_region["count"].astype("int64")
+    return order_by_total_count(job_counts_by_region, "region", seniority_levels)
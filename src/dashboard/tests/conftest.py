@@ -1,6 +1,8 @@
 import pandas as pd
 import pytest
 
+from queries import time_period_cutoff
+
 
 @pytest.fixture
 def sample_jobs_df():
@@ -47,3 +49,38 @@ def sample_jobs_df():
         },
     ]
     return pd.DataFrame(data)
+
+
+@pytest.fixture
+def boundary_jobs_df(sample_jobs_df):
+    """sample_jobs_df plus jobs posted just before and after the start of each
+    time period, and at midnight, so that the first, partial day of a period
+    is exercised."""
+    now = pd.Timestamp.now()
+    rows = []
+    for time_period in ["day", "week", "month", "year"]:
+        cutoff = time_period_cutoff(time_period)
+        for offset, company in [
+            (pd.Timedelta(minutes=-5), "Early Oy"),
+            (pd.Timedelta(minutes=5), "Late Oy"),
+            (cutoff.floor("D") - cutoff, "Midnight Oy"),
+        ]:
+            rows.append(
+                {
+                    "date_posted": cutoff + offset,
+                    "company": company,
+                    "region": "Uusimaa",
+                    "job_fields": ["Software Development"],
+                    "seniority_level": "Entry level",
+                }
+            )
+    rows.append(
+        {
+            "date_posted": now - pd.Timedelta(days=3),
+            "company": "Epsilon Ab",
+            "region": "Uusimaa",
+            "job_fields": [],
+            "seniority_level": "Mid-Senior level",
+        }
+    )
+    return pd.concat([sample_jobs_df, pd.DataFrame(rows)], ignore_index=True)
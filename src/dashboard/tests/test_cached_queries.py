@@ -0,0 +1,112 @@
+import pandas as pd
+import pytest
+
+import cached_queries as cq
+import queries as qs
+from cached_queries import CachedQueries, query_cache_stats
+from load_data import data_version
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    cq.run_cached_query.clear()
+    cq.query_calls.clear()
+    cq.query_misses.clear()
+    yield
+    cq.run_cached_query.clear()
+
+
+class TestCachedQueries:
+    def test_returns_the_result_of_the_query(self, sample_jobs_df):
+        cached = CachedQueries(qs, "finland", data_version(sample_jobs_df))
+        result = cached.top_10_companies_by_region_and_time_period(
+            sample_jobs_df, "Uusimaa", "Any time"
+        )
+        expected = qs.top_10_companies_by_region_and_time_period(
+            sample_jobs_df, "Uusimaa", "Any time"
+        )
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_repeated_call_is_a_hit(self, sample_jobs_df):
+        cached = CachedQueries(qs, "finland", data_version(sample_jobs_df))
+        for _ in range(3):
+            cached.total_jobs_per_time_frequency(sample_jobs_df, "month")
+        stats = query_cache_stats().set_index("query")
+        assert stats.loc["total_jobs_per_time_frequency"].to_dict() == {
+            "calls": 3,
+            "hits": 2,
+            "misses": 1,
+        }
+
+    def test_other_filter_arguments_are_a_miss(self, sample_jobs_df):
+        cached = CachedQueries(qs, "finland", data_version(sample_jobs_df))
+        cached.total_jobs_per_time_frequency(sample_jobs_df, "month")
+        cached.total_jobs_per_time_frequency(sample_jobs_df, "year")
+        assert cq.query_misses["total_jobs_per_time_frequency"] == 2
+
+    def test_new_data_version_is_a_miss(self, sample_jobs_df):
+        CachedQueries(qs, "finland", (5, 1)).total_jobs_per_time_frequency(
+            sample_jobs_df, "month"
+        )
+        result = CachedQueries(qs, "finland", (4, 1)).total_jobs_per_time_frequency(
+            sample_jobs_df.head(4), "month"
+        )
+        assert cq.query_misses["total_jobs_per_time_frequency"] == 2
+        assert result["job_count"].sum() == 4
+
+    def test_other_country_is_a_miss(self, sample_jobs_df):
+        version = data_version(sample_jobs_df)
+        CachedQueries(qs, "finland", version).total_jobs_per_time_frequency(
+            sample_jobs_df, "month"
+        )
+        CachedQueries(qs, "sweden", version).total_jobs_per_time_frequency(
+            sample_jobs_df.head(0), "month"
+        )
+        assert cq.query_misses["total_jobs_per_time_frequency"] == 2
+
+    def test_data_is_not_hashed(self, sample_jobs_df):
+        cached = CachedQueries(qs, "finland", (1, 1))
+        cached.total_jobs_per_time_frequency(sample_jobs_df, "month")
+        # Same version token, different frame: the cached result is returned
+        result = cached.total_jobs_per_time_frequency(sample_jobs_df.head(1), "month")
+        assert result["job_count"].sum() == len(sample_jobs_df)
+
+    def test_relative_time_period_is_a_miss_once_its_cutoff_moves(
+        self, sample_jobs_df, monkeypatch
+    ):
+        cached = CachedQueries(qs, "finland", data_version(sample_jobs_df))
+        buckets = iter(
+            [pd.Timestamp("2026-07-01 12:00"), pd.Timestamp("2026-07-01 12:10")]
+        )
+        monkeypatch.setattr(cq, "cutoff_bucket", lambda args: next(buckets))
+        for _ in range(2):
+            cached.top_10_companies_by_region_and_time_period(
+                sample_jobs_df, "Uusimaa", "day"
+            )
+        assert cq.query_misses["top_10_companies_by_region_and_time_period"] == 2
+
+    def test_unknown_query_raises(self):
+        with pytest.raises(AttributeError):
+            CachedQueries(qs, "finland", (1, 1)).no_such_query
+
+
+class TestCutoffBucket:
+    def test_rounds_the_time_down_for_a_relative_time_period(self):
+        bucket = cq.cutoff_bucket(
+            ("Uusimaa", "day"), now=pd.Timestamp("2026-07-01 12:34:56")
+        )
+        assert bucket == pd.Timestamp("2026-07-01 12:30")
+
+    def test_same_within_a_bucket(self):
+        first = cq.cutoff_bucket(("week",), now=pd.Timestamp("2026-07-01 12:30:01"))
+        second = cq.cutoff_bucket(("week",), now=pd.Timestamp("2026-07-01 12:39:59"))
+        assert first == second
+
+    def test_none_without_a_relative_time_period(self):
+        assert cq.cutoff_bucket(("Uusimaa", "Any time", ["Entry level"])) is None
+
+
+class TestQueryCacheStats:
+    def test_empty(self):
+        assert list(query_cache_stats().columns) == ["query", "calls", "hits", "misses"]
+        assert query_cache_stats().empty
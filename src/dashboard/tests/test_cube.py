@@ -0,0 +1,131 @@
+import pandas as pd
+import pytest
+
+import cube as cb
+import queries as qs
+from load_data import data_version
+from pre_processing import compact_dtypes
+
+SENIORITY_LEVELS = ["Entry level", "Mid-Senior level"]
+TIME_PERIODS = ["day", "week", "month", "year", "Any time"]
+
+
+@pytest.fixture
+def job_cube(boundary_jobs_df):
+    return cb.JobCube(boundary_jobs_df)
+
+
+@pytest.fixture(params=["lists", "compact dtypes"])
+def cube_and_jobs(request, boundary_jobs_df):
+    """A cube and the jobs it must agree with, built from the job_fields lists
+    or from the compact dtypes of pre_processing."""
+    if request.param == "lists":
+        return cb.JobCube(boundary_jobs_df), boundary_jobs_df
+    return cb.JobCube(compact_dtypes(boundary_jobs_df)), boundary_jobs_df
+
+
+class TestJobCubeParity:
+    """Every query answered from the cube must equal the one on the raw rows."""
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_total_jobs_per_time_frequency(self, cube_and_jobs, time_period):
+        job_cube, boundary_jobs_df = cube_and_jobs
+        expected = qs.total_jobs_per_time_frequency(boundary_jobs_df, time_period)
+        result = cb.total_jobs_per_time_frequency(job_cube, time_period)
+        pd.testing.assert_frame_equal(result, expected)
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_separate_for_seniority_levels(self, cube_and_jobs, time_period):
+        job_cube, boundary_jobs_df = cube_and_jobs
+        expected = qs.separate_for_seniority_levels(
+            boundary_jobs_df,
+            "Uusimaa",
+            "Software Development",
+            SENIORITY_LEVELS,
+            time_period,
+        )
+        result = cb.separate_for_seniority_levels(
+            job_cube, "Uusimaa", "Software Development", SENIORITY_LEVELS, time_period
+        )
+        for result_level, expected_level in zip(result, expected, strict=True):
+            pd.testing.assert_frame_equal(result_level, expected_level)
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    @pytest.mark.parametrize("job_field", ["Software Development", "Accounting"])
+    def test_top_10_companies_by_job_field(self, cube_and_jobs, job_field, time_period):
+        job_cube, boundary_jobs_df = cube_and_jobs
+        expected = qs.top_10_companies_by_job_field_and_time_period(
+            boundary_jobs_df, job_field, time_period
+        )
+        result = cb.top_10_companies_by_job_field_and_time_period(
+            job_cube, job_field, time_period
+        )
+        pd.testing.assert_frame_equal(result, expected)
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    @pytest.mark.parametrize("region", ["Uusimaa", "Pirkanmaa"])
+    def test_top_10_companies_by_region(self, cube_and_jobs, region, time_period):
+        job_cube, boundary_jobs_df = cube_and_jobs
+        expected = qs.top_10_companies_by_region_and_time_period(
+            boundary_jobs_df, region, time_period
+        )
+        result = cb.top_10_companies_by_region_and_time_period(
+            job_cube, region, time_period
+        )
+        pd.testing.assert_frame_equal(result, expected)
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_total_jobs_by_region(self, cube_and_jobs, time_period):
+        job_cube, boundary_jobs_df = cube_and_jobs
+        expected = qs.total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels(
+            boundary_jobs_df, "Uusimaa", time_period, SENIORITY_LEVELS
+        )
+        result = cb.total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels(
+            job_cube, "Uusimaa", time_period, SENIORITY_LEVELS
+        )
+        pd.testing.assert_frame_equal(result[0], expected[0])
+        pd.testing.assert_series_equal(result[1], expected[1])
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_total_jobs_by_job_field(self, cube_and_jobs, time_period):
+        job_cube, boundary_jobs_df = cube_and_jobs
+        expected = qs.total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
+            boundary_jobs_df, "Software Development", time_period, SENIORITY_LEVELS
+        )
+        result = cb.total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
+            job_cube, "Software Development", time_period, SENIORITY_LEVELS
+        )
+        pd.testing.assert_frame_equal(result[0], expected[0])
+        pd.testing.assert_series_equal(result[1], expected[1])
+
+
+class TestJobCube:
+    def test_counts_every_job_once(self, boundary_jobs_df, job_cube):
+        assert job_cube.jobs["count"].sum() == len(boundary_jobs_df)
+
+    def test_counts_a_job_once_per_field(self, sample_jobs_df):
+        job_cube = cb.JobCube(sample_jobs_df)
+        assert job_cube.jobs_by_field["count"].sum() == 6
+
+    def test_days_are_midnights(self, job_cube):
+        assert (job_cube.jobs["day"] == job_cube.jobs["day"].dt.floor("D")).all()
+
+    def test_does_not_modify_the_input(self, sample_jobs_df):
+        before = sample_jobs_df.copy()
+        cb.JobCube(sample_jobs_df)
+        pd.testing.assert_frame_equal(sample_jobs_df, before)
+
+
+class TestDataVersion:
+    def test_changes_when_rows_are_added(self, sample_jobs_df):
+        newer = pd.concat(
+            [
+                sample_jobs_df,
+                sample_jobs_df.head(1).assign(date_posted=pd.Timestamp.now()),
+            ],
+            ignore_index=True,
+        )
+        assert data_version(newer) != data_version(sample_jobs_df)
+
+    def test_is_stable_for_the_same_data(self, sample_jobs_df):
+        assert data_version(sample_jobs_df) == data_version(sample_jobs_df.copy())
@@ -0,0 +1,126 @@
+import json
+
+import pandas as pd
+import pytest
+
+import duckdb_queries as dq
+import queries as qs
+
+SENIORITY_LEVELS = ["Entry level", "Mid-Senior level"]
+TIME_PERIODS = ["day", "week", "month", "year", "Any time"]
+
+
+@pytest.fixture
+def duckdb_jobs(boundary_jobs_df, tmp_path):
+    # The rows the dashboard never shows, which the queries must leave out
+    hidden_rows = pd.concat(
+        [
+            boundary_jobs_df.head(3).assign(country="Sweden"),
+            boundary_jobs_df.head(1).assign(
+                country="Finland", seniority_level="Not Applicable"
+            ),
+            boundary_jobs_df.head(1).assign(country="Finland", region="Unspecified"),
+        ]
+    )
+    rows = pd.concat([boundary_jobs_df.assign(country="Finland"), hidden_rows])
+    rows = rows.assign(
+        job_fields=rows["job_fields"].apply(json.dumps),
+        title="Developer",
+        job_url=[f"https://example.com/jobs/{index}" for index in range(len(rows))],
+    )
+    snapshot_path = str(tmp_path / "jobs_snapshot.parquet")
+    rows.to_parquet(snapshot_path, index=False)
+    return dq.DuckDBJobs(dq.load_jobs(snapshot_path), "finland")
+
+
+class TestDuckDBQueriesParity:
+    """Every query run in DuckDB must equal the one on the DataFrame."""
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_total_jobs_per_time_frequency(
+        self, boundary_jobs_df, duckdb_jobs, time_period
+    ):
+        expected = qs.total_jobs_per_time_frequency(boundary_jobs_df, time_period)
+        result = dq.total_jobs_per_time_frequency(duckdb_jobs, time_period)
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_filter_jobs_by_selectbox(self, boundary_jobs_df, duckdb_jobs):
+        expected = qs.filter_jobs_by_selectbox(
+            boundary_jobs_df, "Uusimaa", "Software Development", "Entry level"
+        )
+        result = dq.filter_jobs_by_selectbox(
+            duckdb_jobs, "Uusimaa", "Software Development", "Entry level"
+        )
+        pd.testing.assert_frame_equal(
+            result[expected.columns].sort_values("date_posted", ignore_index=True),
+            expected.sort_values("date_posted", ignore_index=True),
+        )
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_separate_for_seniority_levels(
+        self, boundary_jobs_df, duckdb_jobs, time_period
+    ):
+        expected = qs.separate_for_seniority_levels(
+            boundary_jobs_df,
+            "Uusimaa",
+            "Software Development",
+            SENIORITY_LEVELS,
+            time_period,
+        )
+        result = dq.separate_for_seniority_levels(
+            duckdb_jobs,
+            "Uusimaa",
+            "Software Development",
+            SENIORITY_LEVELS,
+            time_period,
+        )
+        for result_level, expected_level in zip(result, expected, strict=True):
+            pd.testing.assert_frame_equal(result_level, expected_level)
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    @pytest.mark.parametrize("job_field", ["Software Development", "Accounting"])
+    def test_top_10_companies_by_job_field(
+        self, boundary_jobs_df, duckdb_jobs, job_field, time_period
+    ):
+        expected = qs.top_10_companies_by_job_field_and_time_period(
+            boundary_jobs_df, job_field, time_period
+        )
+        result = dq.top_10_companies_by_job_field_and_time_period(
+            duckdb_jobs, job_field, time_period
+        )
+        pd.testing.assert_frame_equal(result, expected)
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    @pytest.mark.parametrize("region", ["Uusimaa", "Pirkanmaa"])
+    def test_top_10_companies_by_region(
+        self, boundary_jobs_df, duckdb_jobs, region, time_period
+    ):
+        expected = qs.top_10_companies_by_region_and_time_period(
+            boundary_jobs_df, region, time_period
+        )
+        result = dq.top_10_companies_by_region_and_time_period(
+            duckdb_jobs, region, time_period
+        )
+        pd.testing.assert_frame_equal(result, expected)
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_total_jobs_by_region(self, boundary_jobs_df, duckdb_jobs, time_period):
+        expected = qs.total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels(
+            boundary_jobs_df, "Uusimaa", time_period, SENIORITY_LEVELS
+        )
+        result = dq.total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels(
+            duckdb_jobs, "Uusimaa", time_period, SENIORITY_LEVELS
+        )
+        pd.testing.assert_frame_equal(result[0], expected[0])
+        pd.testing.assert_series_equal(result[1], expected[1])
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_total_jobs_by_job_field(self, boundary_jobs_df, duckdb_jobs, time_period):
+        expected = qs.total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
+            boundary_jobs_df, "Software Development", time_period, SENIORITY_LEVELS
+        )
+        result = dq.total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
+            duckdb_jobs, "Software Development", time_period, SENIORITY_LEVELS
+        )
+        pd.testing.assert_frame_equal(result[0], expected[0])
+        pd.testing.assert_series_equal(result[1], expected[1])
@@ -1,55 +1,92 @@
 from unittest.mock import MagicMock
 
 import pandas as pd
+import pytest
 import streamlit as st
 
 import load_data
 
 
-class TestLoadData:
-    def test_queries_with_expected_filters_and_columns(self, monkeypatch):
-        monkeypatch.setattr(
-            st,
-            "secrets",
+def jobs_frame(rows):
+    """The jobs of rows of (date_posted, job_url) or (date_posted, job_url,
+    stored_at); stored_at defaults to date_posted."""
+    return pd.DataFrame(
+        [
             {
-                "postgres": {
-                    "user": "test_user",
-                    "password": "test_password",
-                    "dbname": "test_db",
-                    "host": "localhost",
-                    "port": "5432",
-                }
-            },
-        )
-        fake_engine = MagicMock()
-        monkeypatch.setattr(load_data, "create_engine", lambda url: fake_engine)
-
-        captured_query = {}
-
-        def fake_read_sql(query, engine):
-            captured_query["query"] = query
-            captured_query["engine"] = engine
-            return pd.DataFrame(
-                {
-                    "date_posted": ["2026-07-01"],
-                    "title": ["Software Engineer"],
-                    "company": ["Acme Oy"],
-                    "region": ["Uusimaa"],
-                    "country": ["Finland"],
-                    "seniority_level": ["Entry level"],
-                    "job_fields": ['["Software Development"]'],
-                    "job_url": ["https://example.com/1"],
-                }
-            )
-
-        monkeypatch.setattr(pd, "read_sql", fake_read_sql)
-        load_data.load_data.clear()
+                "date_posted": pd.Timestamp(row[0]),
+                "title": "Software Engineer",
+                "company": "Acme Oy",
+                "region": "Uusimaa",
+                "country": "Finland",
+                "seniority_level": "Entry level",
+                "job_fields": '["Software Development"]',
+                "job_url": row[1],
+                "stored_at": pd.Timestamp(row[2] if len(row) > 2 else row[0]),
+            }
+            for row in rows
+        ],
+        columns=[
+            "date_posted",
+            "title",
+            "company",
+            "region",
+            "country",
+            "seniority_level",
+            "job_fields",
+            "job_url",
+            "stored_at",
+        ],
+    )
+
+
+@pytest.fixture
+def fake_db(monkeypatch, tmp_path):
+    """Points load_data at a snapshot under tmp_path and replaces the
+    database with a fake whose rows can be set per test."""
+    monkeypatch.setattr(
+        st,
+        "secrets",
+        {
+            "postgres": {
+                "user": "test_user",
+                "password": "test_password",
+                "dbname": "test_db",
+                "host": "localhost",
+                "port": "5432",
+            }
+        },
+    )
+    fake_engine = MagicMock()
+    monkeypatch.setattr(load_data, "create_engine", lambda url: fake_engine)
+    monkeypatch.setattr(
+        load_data, "SNAPSHOT_PATH", str(tmp_path / "jobs_snapshot.parquet")
+    )
+
+    db = {"engine": fake_engine, "rows": jobs_frame([]), "calls": []}
+
+    def fake_read_sql(query, engine, params=None):
+        db["calls"].append({"query": query, "engine": engine, "params": params})
+        rows = db["rows"]
+        if params is not None:
+            rows = rows[rows["stored_at"] >= params["since"]]
+        return rows.reset_index(drop=True)
+
+    monkeypatch.setattr(pd, "read_sql", fake_read_sql)
+    load_data.load_data.clear()
+    return db
+
+
+class TestLoadData:
+    def test_queries_with_expected_filters_and_columns(self, fake_db):
+        fake_db["rows"] = jobs_frame([("2026-07-01", "https://example.com/1")])
 
         result = load_data.load_data()
 
-        assert "seniority_level != 'Not Applicable'" in captured_query["query"]
-        assert "region != 'Unspecified'" in captured_query["query"]
-        assert captured_query["engine"] is fake_engine
+        query = fake_db["calls"][0]["query"]
+        assert "seniority_level != 'Not Applicable'" in query
+        assert "region != 'Unspecified'" in query
+        assert "COALESCE(stored_at, date_posted) AS stored_at" in query
+        assert fake_db["calls"][0]["engine"] is fake_db["engine"]
         assert list(result.columns) == [
             "date_posted",
             "title",
@@ -60,3 +97,107 @@ class TestLoadData:
             "job_fields",
             "job_url",
         ]
+
+    def test_converts_the_jobs_once_per_refresh(self, fake_db):
+        fake_db["rows"] = jobs_frame([("2026-07-01", "https://example.com/1")])
+
+        result = load_data.load_data()
+
+        assert isinstance(result["job_fields"].dtype, pd.CategoricalDtype)
+        assert result["date_posted"].dtype == "datetime64[ns]"
+        assert load_data.load_data() is result
+        assert len(fake_db["calls"]) == 1
+
+
+class TestLoadCountryJobs:
+    def test_pre_processes_once_per_country_and_version(self, fake_db):
+        fake_db["rows"] = jobs_frame([("2026-07-01", "https://example.com/1")])
+        load_data.load_country_jobs.clear()
+        jobs = load_data.load_data()
+
+        result = load_data.load_country_jobs(jobs, "finland", (1, 1))
+
+        assert len(result) == 1
+        assert load_data.load_country_jobs(jobs, "finland", (1, 1)) is result
+        assert load_data.load_country_jobs(jobs, "finland", (2, 1)) is not result
+
+
+class TestRefreshSnapshot:
+    def test_first_refresh_reads_whole_table_and_writes_snapshot(self, fake_db):
+        fake_db["rows"] = jobs_frame([("2026-07-01", "https://example.com/1")])
+
+        result = load_data.refresh_snapshot(load_data.SNAPSHOT_PATH)
+
+        assert fake_db["calls"][0]["params"] is None
+        pd.testing.assert_frame_equal(pd.read_parquet(load_data.SNAPSHOT_PATH), result)
+
+    def test_later_refresh_only_reads_rows_stored_since_and_appends(self, fake_db):
+        fake_db["rows"] = jobs_frame([("2026-07-01", "https://example.com/1")])
+        load_data.refresh_snapshot(load_data.SNAPSHOT_PATH)
+        fake_db["rows"] = jobs_frame(
+            [
+                ("2026-07-01", "https://example.com/1"),
+                ("2026-07-02", "https://example.com/2"),
+            ]
+        )
+
+        result = load_data.refresh_snapshot(load_data.SNAPSHOT_PATH)
+
+        assert fake_db["calls"][-1]["params"] == {
+            "since": pd.Timestamp("2026-07-01") - load_data.REFRESH_OVERLAP
+        }
+        assert "COALESCE(stored_at, date_posted) >=" in fake_db["calls"][-1]["query"]
+        assert list(result["job_url"]) == [
+            "https://example.com/1",
+            "https://example.com/2",
+        ]
+
+    def test_full_rebuild_replaces_snapshot(self, fake_db):
+        fake_db["rows"] = jobs_frame([("2026-07-01", "https://example.com/1")])
+        load_data.refresh_snapshot(load_data.SNAPSHOT_PATH)
+        fake_db["rows"] = jobs_frame([("2026-07-02", "https://example.com/2")])
+
+        result = load_data.refresh_snapshot(load_data.SNAPSHOT_PATH, full_rebuild=True)
+
+        assert fake_db["calls"][-1]["params"] is None
+        assert list(result["job_url"]) == ["https://example.com/2"]
+
+    def test_backdated_row_stored_after_the_snapshot_is_appended(self, fake_db):
+        first = ("2026-07-02 10:00", "https://example.com/1", "2026-07-02 10:00")
+        fake_db["rows"] = jobs_frame([first])
+        load_data.refresh_snapshot(load_data.SNAPSHOT_PATH)
+        # Posted "3 days ago", so well before the newest row of the snapshot
+        backdated = ("2026-06-29 11:00", "https://example.com/2", "2026-07-02 11:00")
+        fake_db["rows"] = jobs_frame([first, backdated])
+
+        result = load_data.refresh_snapshot(load_data.SNAPSHOT_PATH)
+
+        assert list(result["job_url"]) == [
+            "https://example.com/1",
+            "https://example.com/2",
+        ]
+
+    def test_row_of_a_batch_committed_late_is_appended_once(self, fake_db):
+        first = ("2026-07-02 10:05", "https://example.com/1", "2026-07-02 10:05")
+        fake_db["rows"] = jobs_frame([first])
+        load_data.refresh_snapshot(load_data.SNAPSHOT_PATH)
+        # Stamped before the newest row of the snapshot, but committed after it
+        late = ("2026-07-02 10:00", "https://example.com/2", "2026-07-02 10:00")
+        fake_db["rows"] = jobs_frame([first, late])
+
+        load_data.refresh_snapshot(load_data.SNAPSHOT_PATH)
+        result = load_data.refresh_snapshot(load_data.SNAPSHOT_PATH)
+
+        assert sorted(result["job_url"]) == [
+            "https://example.com/1",
+            "https://example.com/2",
+        ]
+
+    def test_snapshot_without_stored_at_is_rebuilt(self, fake_db):
+        fake_db["rows"] = jobs_frame([("2026-07-01", "https://example.com/1")])
+        fake_db["rows"].drop(columns="stored_at").to_parquet(load_data.SNAPSHOT_PATH)
+
+        result = load_data.refresh_snapshot(load_data.SNAPSHOT_PATH)
+
+        assert fake_db["calls"][-1]["params"] is None
+        assert "stored_at" in result.columns
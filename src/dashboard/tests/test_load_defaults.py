@@ -2,7 +2,7 @@ import json
 
 import pytest
 
-from load_defaults import load_defaults
+from load_defaults import load_defaults, load_query_backend
 
 
 @pytest.fixture
@@ -39,3 +39,15 @@ class TestLoadDefaults:
     def test_unknown_country_returns_none(self, app_dir):
         result = load_defaults(str(app_dir), "sweden")
         assert result is None
+
+
+class TestLoadQueryBackend:
+    def test_defaults_to_pandas(self, app_dir):
+        assert load_query_backend(str(app_dir)) == "pandas"
+
+    def test_reads_the_configured_backend(self, app_dir):
+        config_path = app_dir / "configs" / "streamlit_config.json"
+        config = json.loads(config_path.read_text())
+        config["query_backend"] = "sql"
+        config_path.write_text(json.dumps(config))
+        assert load_query_backend(str(app_dir)) == "sql"
@@ -1,6 +1,12 @@
 import pandas as pd
 
-from pre_processing import pre_processing
+from pre_processing import (
+    compact_dtypes,
+    encode_job_fields,
+    job_field_lists,
+    memory_report,
+    pre_processing,
+)
 
 
 def raw_df():
@@ -29,13 +35,24 @@ def raw_df():
 
 
 class TestPreProcessing:
-    def test_parses_job_fields_string_into_list(self):
+    def test_encodes_job_fields_as_codes_of_their_combinations(self):
         result = pre_processing(raw_df(), "finland")
-        assert result.iloc[0]["job_fields"] == ["Software Development"]
+        assert isinstance(result["job_fields"].dtype, pd.CategoricalDtype)
+        assert job_field_lists(result["job_fields"]) == [["Software Development"]]
 
     def test_converts_date_posted_to_datetime(self):
         result = pre_processing(raw_df(), "finland")
-        assert pd.api.types.is_datetime64_any_dtype(result["date_posted"])
+        assert result["date_posted"].dtype == "datetime64[ns]"
+
+    def test_converts_low_cardinality_columns_to_categoricals(self):
+        result = pre_processing(raw_df(), "finland")
+        assert isinstance(result["region"].dtype, pd.CategoricalDtype)
+        assert isinstance(result["country"].dtype, pd.CategoricalDtype)
+
+    def test_does_not_modify_the_input(self):
+        df = raw_df()
+        pre_processing(df, "finland")
+        pd.testing.assert_frame_equal(df, raw_df())
 
     def test_filters_by_country_matching_lowercase_directory_name(self):
         # selected_country is always a lowercase resources/<country> directory
@@ -56,8 +73,68 @@ class TestPreProcessing:
         result = pre_processing(raw_df(), "finland")
         assert "Sweden" not in set(result["country"])
 
-    def test_leaves_already_parsed_job_fields_untouched(self):
+    def test_accepts_already_parsed_job_fields(self):
         df = raw_df()
         df.loc[0, "job_fields"] = ["Software Development"]
         result = pre_processing(df, "finland")
-        assert result.iloc[0]["job_fields"] == ["Software Development"]
+        assert job_field_lists(result["job_fields"]) == [["Software Development"]]
+
+    def test_is_idempotent(self):
+        once = pre_processing(raw_df(), "finland")
+        pd.testing.assert_frame_equal(pre_processing(once, "finland"), once)
+
+    def test_only_filters_compact_jobs(self):
+        jobs = compact_dtypes(raw_df())
+        result = pre_processing(jobs, "finland")
+        assert result["job_fields"].cat.categories is jobs["job_fields"].cat.categories
+        assert result["region"].cat.categories is jobs["region"].cat.categories
+
+
+class TestEncodeJobFields:
+    def test_one_code_per_combination_of_job_fields(self):
+        job_fields = pd.Series(
+            [["Accounting"], ["Accounting", "Consulting"], [], ["Accounting"]],
+            index=[10, 11, 12, 13],
+        )
+
+        encoded = encode_job_fields(job_fields)
+
+        assert list(encoded.index) == [10, 11, 12, 13]
+        lists = job_field_lists(encoded)
+        assert [lists[code] for code in encoded.cat.codes] == list(job_fields)
+        assert len(lists) == 3
+
+    def test_json_strings_are_not_parsed_per_row(self):
+        encoded = encode_job_fields(pd.Series(['["Accounting"]', '["Accounting"]']))
+        assert list(encoded.cat.categories) == ['["Accounting"]']
+
+    def test_missing_job_fields_stay_missing(self):
+        encoded = encode_job_fields(pd.Series(['["Accounting"]', None]))
+        assert list(encoded.cat.codes) == [0, -1]
+
+    def test_encoded_job_fields_are_left_as_they_are(self):
+        encoded = encode_job_fields(pd.Series(['["Accounting"]']))
+        assert encode_job_fields(encoded) is encoded
+
+    def test_job_fields_are_decoded_once_per_categories(self):
+        encoded = encode_job_fields(pd.Series(['["Accounting"]', '["Consulting"]']))
+        other = encode_job_fields(pd.Series(['["Marketing"]']))
+
+        assert job_field_lists(encoded.iloc[:1]) is job_field_lists(encoded)
+        assert job_field_lists(other) == [["Marketing"]]
+
+
+class TestCompactDtypes:
+    def test_takes_less_memory(self, sample_jobs_df):
+        jobs = pd.concat([sample_jobs_df] * 100, ignore_index=True)
+        before = jobs.memory_usage(deep=True).sum()
+        after = compact_dtypes(jobs).memory_usage(deep=True).sum()
+        assert after * 4 <= before
+
+
+class TestMemoryReport:
+    def test_reports_bytes_per_column_and_total(self, sample_jobs_df):
+        report = memory_report(sample_jobs_df)
+        assert list(report["column"]) == ["Index", *sample_jobs_df.columns, "Total"]
+        assert report["bytes"].iloc[-1] == report["bytes"].iloc[:-1].sum()
+        assert (report["bytes"].iloc[:-1] > 0).all()
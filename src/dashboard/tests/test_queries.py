@@ -1,8 +1,13 @@
 import pandas as pd
+import pytest
 
+from pre_processing import compact_dtypes
 from queries import (
+    explode_job_fields,
     filter_by_time_period,
     filter_jobs_by_selectbox,
+    job_field_mask,
+    separate_for_seniority_levels,
     top_10_companies_by_job_field_and_time_period,
     top_10_companies_by_region_and_time_period,
     top_10_companies_by_selectbox,
@@ -120,3 +125,132 @@ class TestTotalJobsByJobFieldAcrossRegionsAndSeniority:
         )
         assert set(sorted_regions) == {"Uusimaa", "Pirkanmaa"}
         assert job_counts_by_region["region"].dtype.name == "category"
+
+
+TIME_PERIODS = ["day", "week", "month", "year", "Any time"]
+
+
+@pytest.fixture
+def compact_jobs_df(boundary_jobs_df):
+    return compact_dtypes(boundary_jobs_df)
+
+
+class TestCompactDtypesParity:
+    """The compact dtypes of pre_processing must not change any query result."""
+
+    @pytest.mark.parametrize(
+        "job_field", ["Software Development", "Accounting", "Consulting", "Astronaut"]
+    )
+    def test_job_field_mask(self, boundary_jobs_df, compact_jobs_df, job_field):
+        expected = job_field_mask(boundary_jobs_df, job_field)
+        result = job_field_mask(compact_jobs_df, job_field)
+        pd.testing.assert_series_equal(result, expected, check_names=False)
+
+    def test_explode_job_fields(self, boundary_jobs_df, compact_jobs_df):
+        expected = boundary_jobs_df.explode("job_fields")
+        result = explode_job_fields(compact_jobs_df)
+        pd.testing.assert_index_equal(result.index, expected.index)
+        pd.testing.assert_series_equal(result["job_fields"], expected["job_fields"])
+
+    def test_filter_jobs_by_selectbox(self, boundary_jobs_df, compact_jobs_df):
+        expected = filter_jobs_by_selectbox(
+            boundary_jobs_df, "Uusimaa", "Software Development", "Entry level"
+        )
+        result = filter_jobs_by_selectbox(
+            compact_jobs_df, "Uusimaa", "Software Development", "Entry level"
+        )
+        pd.testing.assert_index_equal(result.index, expected.index)
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_total_jobs_per_time_frequency(
+        self, boundary_jobs_df, compact_jobs_df, time_period
+    ):
+        pd.testing.assert_frame_equal(
+            total_jobs_per_time_frequency(compact_jobs_df, time_period),
+            total_jobs_per_time_frequency(boundary_jobs_df, time_period),
+        )
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_separate_for_seniority_levels(
+        self, boundary_jobs_df, compact_jobs_df, time_period
+    ):
+        expected = separate_for_seniority_levels(
+            boundary_jobs_df,
+            "Uusimaa",
+            "Software Development",
+            SENIORITY_LEVELS,
+            time_period,
+        )
+        result = separate_for_seniority_levels(
+            compact_jobs_df,
+            "Uusimaa",
+            "Software Development",
+            SENIORITY_LEVELS,
+            time_period,
+        )
+        for result_level, expected_level in zip(result, expected, strict=True):
+            pd.testing.assert_frame_equal(result_level, expected_level)
+
+    def test_top_10_companies_by_selectbox(self, boundary_jobs_df, compact_jobs_df):
+        pd.testing.assert_frame_equal(
+            top_10_companies_by_selectbox(compact_jobs_df),
+            top_10_companies_by_selectbox(boundary_jobs_df),
+        )
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_top_10_companies_by_job_field(
+        self, boundary_jobs_df, compact_jobs_df, time_period
+    ):
+        pd.testing.assert_frame_equal(
+            top_10_companies_by_job_field_and_time_period(
+                compact_jobs_df, "Software Development", time_period
+            ),
+            top_10_companies_by_job_field_and_time_period(
+                boundary_jobs_df, "Software Development", time_period
+            ),
+        )
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_top_10_companies_by_region(
+        self, boundary_jobs_df, compact_jobs_df, time_period
+    ):
+        pd.testing.assert_frame_equal(
+            top_10_companies_by_region_and_time_period(
+                compact_jobs_df, "Uusimaa", time_period
+            ),
+            top_10_companies_by_region_and_time_period(
+                boundary_jobs_df, "Uusimaa", time_period
+            ),
+        )
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_total_jobs_by_region(self, boundary_jobs_df, compact_jobs_df, time_period):
+        expected = (
+            total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels(
+                boundary_jobs_df, "Uusimaa", time_period, SENIORITY_LEVELS
+            )
+        )
+        result = (
+            total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels(
+                compact_jobs_df, "Uusimaa", time_period, SENIORITY_LEVELS
+            )
+        )
+        pd.testing.assert_frame_equal(result[0], expected[0])
+        pd.testing.assert_series_equal(result[1], expected[1])
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_total_jobs_by_job_field(
+        self, boundary_jobs_df, compact_jobs_df, time_period
+    ):
+        expected = (
+            total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
+                boundary_jobs_df, "Software Development", time_period, SENIORITY_LEVELS
+            )
+        )
+        result = (
+            total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
+                compact_jobs_df, "Software Development", time_period, SENIORITY_LEVELS
+            )
+        )
+        pd.testing.assert_frame_equal(result[0], expected[0])
+        pd.testing.assert_series_equal(result[1], expected[1])
@@ -0,0 +1,155 @@
+"""Parity tests of sql_queries against queries.py.
+
+They need a PostgreSQL database, given as an SQLAlchemy URL in the
+DASHBOARD_TEST_DATABASE_URL environment variable, and are skipped without
+one. The fixture jobs are written to a `jobs` table in a throwaway schema,
+which is dropped afterwards.
+"""
+
+import json
+import os
+import uuid
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+import queries as qs
+import sql_queries as sq
+
+SENIORITY_LEVELS = ["Entry level", "Mid-Senior level"]
+TIME_PERIODS = ["day", "week", "month", "year", "Any time"]
+
+DATABASE_URL = os.environ.get("DASHBOARD_TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    DATABASE_URL is None, reason="DASHBOARD_TEST_DATABASE_URL is not set"
+)
+
+
+@pytest.fixture
+def jobs_table(boundary_jobs_df):
+    schema = f"test_{uuid.uuid4().hex}"
+    with create_engine(DATABASE_URL).begin() as connection:
+        connection.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_engine(
+        DATABASE_URL, connect_args={"options": f"-csearch_path={schema}"}
+    )
+
+    # The rows the dashboard never shows, which the queries must leave out
+    hidden_rows = boundary_jobs_df.head(3).assign(country="Sweden")
+    hidden_rows = pd.concat(
+        [
+            hidden_rows,
+            boundary_jobs_df.head(1).assign(
+                country="Finland", seniority_level="Not Applicable"
+            ),
+            boundary_jobs_df.head(1).assign(country="Finland", region="Unspecified"),
+        ]
+    )
+    rows = pd.concat([boundary_jobs_df.assign(country="Finland"), hidden_rows])
+    rows = rows.assign(
+        job_fields=rows["job_fields"].apply(json.dumps),
+        title="Developer",
+        job_url=[f"https://example.com/jobs/{index}" for index in range(len(rows))],
+    )
+    rows.to_sql("jobs", engine, index=False)
+
+    yield sq.JobsTable(engine, "finland")
+
+    engine.dispose()
+    with create_engine(DATABASE_URL).begin() as connection:
+        connection.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+
+
+class TestSqlQueriesParity:
+    """Every query run in the database must equal the one on the DataFrame."""
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_total_jobs_per_time_frequency(
+        self, boundary_jobs_df, jobs_table, time_period
+    ):
+        expected = qs.total_jobs_per_time_frequency(boundary_jobs_df, time_period)
+        result = sq.total_jobs_per_time_frequency(jobs_table, time_period)
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_filter_jobs_by_selectbox(self, boundary_jobs_df, jobs_table):
+        expected = qs.filter_jobs_by_selectbox(
+            boundary_jobs_df, "Uusimaa", "Software Development", "Entry level"
+        )
+        result = sq.filter_jobs_by_selectbox(
+            jobs_table, "Uusimaa", "Software Development", "Entry level"
+        )
+        pd.testing.assert_frame_equal(
+            result[expected.columns].sort_values("date_posted", ignore_index=True),
+            expected.sort_values("date_posted", ignore_index=True),
+        )
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_separate_for_seniority_levels(
+        self, boundary_jobs_df, jobs_table, time_period
+    ):
+        expected = qs.separate_for_seniority_levels(
+            boundary_jobs_df,
+            "Uusimaa",
+            "Software Development",
+            SENIORITY_LEVELS,
+            time_period,
+        )
+        result = sq.separate_for_seniority_levels(
+            jobs_table,
+            "Uusimaa",
+            "Software Development",
+            SENIORITY_LEVELS,
+            time_period,
+        )
+        for result_level, expected_level in zip(result, expected, strict=True):
+            pd.testing.assert_frame_equal(result_level, expected_level)
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    @pytest.mark.parametrize("job_field", ["Software Development", "Accounting"])
+    def test_top_10_companies_by_job_field(
+        self, boundary_jobs_df, jobs_table, job_field, time_period
+    ):
+        expected = qs.top_10_companies_by_job_field_and_time_period(
+            boundary_jobs_df, job_field, time_period
+        )
+        result = sq.top_10_companies_by_job_field_and_time_period(
+            jobs_table, job_field, time_period
+        )
+        pd.testing.assert_frame_equal(result, expected)
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    @pytest.mark.parametrize("region", ["Uusimaa", "Pirkanmaa"])
+    def test_top_10_companies_by_region(
+        self, boundary_jobs_df, jobs_table, region, time_period
+    ):
+        expected = qs.top_10_companies_by_region_and_time_period(
+            boundary_jobs_df, region, time_period
+        )
+        result = sq.top_10_companies_by_region_and_time_period(
+            jobs_table, region, time_period
+        )
+        pd.testing.assert_frame_equal(result, expected)
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_total_jobs_by_region(self, boundary_jobs_df, jobs_table, time_period):
+        expected = qs.total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels(
+            boundary_jobs_df, "Uusimaa", time_period, SENIORITY_LEVELS
+        )
+        result = sq.total_jobs_by_region_and_time_period_across_job_fields_and_seniority_levels(
+            jobs_table, "Uusimaa", time_period, SENIORITY_LEVELS
+        )
+        pd.testing.assert_frame_equal(result[0], expected[0])
+        pd.testing.assert_series_equal(result[1], expected[1])
+
+    @pytest.mark.parametrize("time_period", TIME_PERIODS)
+    def test_total_jobs_by_job_field(self, boundary_jobs_df, jobs_table, time_period):
+        expected = qs.total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
+            boundary_jobs_df, "Software Development", time_period, SENIORITY_LEVELS
+        )
+        result = sq.total_jobs_by_job_field_and_time_period_across_regions_and_seniority_levels(
+            jobs_table, "Software Development", time_period, SENIORITY_LEVELS
+        )
+        pd.testing.assert_frame_equal(result[0], expected[0])
+        pd.testing.assert_series_equal(result[1], expected[1])
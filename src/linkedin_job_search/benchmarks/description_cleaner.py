@@ -0,0 +1,81 @@
+"""
+Benchmark for the description cleaners of LinkedinJobSearchPipeline.
+
+The job pages of benchmarks.parse_replay go through JobScraperSpider.parse_job,
+and each cleaner of description_cleaners.py turns the HTML descriptions it
+extracts into text. The time per description of each cleaner is printed, and
+their text is checked to be identical to that of beautifulsoup_text, the
+cleaner the pipeline used before.
+
+Run from src/linkedin_job_search:
+
+    python -m benchmarks.description_cleaner --items 2000
+    python -m benchmarks.description_cleaner --input ../../data/synthetic_jobs.parquet --items 20000
+"""
+
+import argparse
+import time
+
+from benchmarks.generated_jobs import add_input_argument
+from benchmarks.parse_replay import (
+    fixture_pages,
+    generated_pages,
+    make_responses,
+    recorded_pages,
+)
+from linkedin_job_search.description_cleaners import (
+    DESCRIPTION_CLEANERS,
+    beautifulsoup_text,
+)
+from linkedin_job_search.spiders.job_scraper import JobScraperSpider
+
+
+def timed_cleaner(cleaner, descriptions, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        texts = [cleaner(description) for description in descriptions]
+        best = min(best, time.perf_counter() - start)
+    return best, texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--country", default="finland")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--httpcache", help="A Scrapy HTTP cache directory to replay.")
+    add_input_argument(parser)
+    args = parser.parse_args()
+
+    spider = JobScraperSpider(country=args.country, period="past_24_hours")
+    if args.httpcache:
+        pages = recorded_pages(args.httpcache, spider.name)
+    elif args.input:
+        pages = generated_pages(args.input, args.items, spider.base_url)
+    else:
+        pages = fixture_pages(args.items, spider.base_url)
+    _, responses = make_responses(pages)
+    items = [item for response in responses for item in spider.parse_job(response)]
+    descriptions = [
+        item["description"]
+        for item in items
+        if isinstance(item, dict) and item["description"] is not None
+    ]
+
+    expected = [beautifulsoup_text(description) for description in descriptions]
+    print(f"{len(descriptions)} descriptions")
+    baseline_time = None
+    for name, cleaner in DESCRIPTION_CLEANERS.items():
+        elapsed, texts = timed_cleaner(cleaner, descriptions, args.repeat)
+        assert texts == expected, f"{name} cleaned descriptions differently"
+        baseline_time = baseline_time or elapsed
+        print(
+            f"  {name:<14} {elapsed / len(descriptions) * 1e6:>8.1f} us/description"
+            f"   x{baseline_time / elapsed:.1f}"
+        )
+    print("  identical text")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Reads the job postings written by tools/generate_jobs.py, for the benchmarks
+that take them with --input instead of building their own inputs.
+"""
+
+import pandas as pd
+
+
+def add_input_argument(parser):
+    parser.add_argument(
+        "--input",
+        help="Read the inputs from a Parquet or CSV file written by "
+        "tools/generate_jobs.py; --items takes the first rows of it.",
+    )
+
+
+def read_jobs(path, n_items, columns):
+    """The given columns of the first n_items postings of the file."""
+    if path.endswith(".csv"):
+        df = pd.read_csv(path, usecols=columns, nrows=n_items)
+    else:
+        df = pd.read_parquet(path, columns=columns).head(n_items)
+    if "date_posted" in df.columns:
+        # As LinkedinJobSearchPipeline.normalize_date formats it
+        df["date_posted"] = pd.to_datetime(df["date_posted"]).dt.strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )
+    return df
@@ -0,0 +1,100 @@
+"""
+Benchmark for LinkedinJobSearchPipeline.normalize_job_function.
+
+Compares the Aho-Corasick matcher against the previous implementation, which
+ran a substring test for every alternative, and checks that both produce the
+same JSON for every input. --extra-synonyms pads the alternatives list with
+synthetic synonyms to show how each approach scales with its size.
+
+Run from src/linkedin_job_search so the relative resource paths resolve:
+
+    python -m benchmarks.normalize_job_function --items 20000 --extra-synonyms 5000
+"""
+
+import argparse
+import json
+import random
+import string
+import time
+
+from benchmarks.generated_jobs import add_input_argument, read_jobs
+from linkedin_job_search.aho_corasick import AhoCorasick
+from linkedin_job_search.pipelines import LinkedinJobSearchPipeline
+
+
+def legacy_normalize_job_function(pipeline, job_function):
+    job_function_lower = job_function.lower()
+    matched_fields = []
+
+    if job_function_lower in pipeline.alternative_to_field:
+        matched_fields.append(pipeline.alternative_to_field[job_function_lower])
+    else:
+        for alt, field_name in pipeline.alternative_to_field.items():
+            if alt in job_function_lower and field_name not in matched_fields:
+                matched_fields.append(field_name)
+
+    return json.dumps(matched_fields if matched_fields else ["Other"])
+
+
+def add_synonyms(pipeline, n_synonyms, rng):
+    field_names = sorted(set(pipeline.alternative_to_field.values()))
+    for _ in range(n_synonyms):
+        synonym = "".join(rng.choice(string.ascii_lowercase) for _ in range(8))
+        pipeline.alternative_to_field[synonym] = rng.choice(field_names)
+    pipeline.alternative_fields = list(pipeline.alternative_to_field.values())
+    pipeline.alternative_matcher = AhoCorasick(list(pipeline.alternative_to_field))
+
+
+def sample_job_functions(pipeline, n_items, rng):
+    alternatives = list(pipeline.alternative_to_field)
+    fillers = ["and", "Senior", "Lead", "Other", "Services", "Support"]
+    job_functions = []
+    for _ in range(n_items):
+        words = rng.sample(alternatives, k=rng.randint(1, 3))
+        words += rng.sample(fillers, k=rng.randint(0, 2))
+        rng.shuffle(words)
+        job_functions.append(" ".join(word.title() for word in words))
+    return job_functions
+
+
+def run(label, function, job_functions):
+    start = time.perf_counter()
+    results = [function(job_function) for job_function in job_functions]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {len(job_functions) / elapsed:>14,.0f} items/sec")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--country", default="finland")
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--extra-synonyms", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    add_input_argument(parser)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pipeline = LinkedinJobSearchPipeline(country_name=args.country)
+    if args.extra_synonyms:
+        add_synonyms(pipeline, args.extra_synonyms, rng)
+    print(f"alternatives: {len(pipeline.alternative_to_field)}")
+    if args.input:
+        job_functions = read_jobs(args.input, args.items, ["job_function"])
+        job_functions = job_functions["job_function"].tolist()
+    else:
+        job_functions = sample_job_functions(pipeline, args.items, rng)
+
+    before = run(
+        "before", lambda jf: legacy_normalize_job_function(pipeline, jf), job_functions
+    )
+    after = run("after", pipeline.normalize_job_function, job_functions)
+
+    mismatches = sum(1 for old, new in zip(before, after) if old != new)
+    print(f"mismatches: {mismatches} / {len(job_functions)}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark for LinkedinJobSearchPipeline.normalize_location.
+
+Compares the hash-indexed resolver against the previous implementation, which
+ran a pandas boolean mask over the whole cities_and_regions table for every
+token, and checks that both return the same result for every location.
+
+Run from src/linkedin_job_search so the relative resource paths resolve:
+
+    python -m benchmarks.normalize_location --country finland --items 20000
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.generated_jobs import add_input_argument, read_jobs
+from linkedin_job_search.pipelines import LinkedinJobSearchPipeline
+
+
+def legacy_normalize_location(pipeline, location):
+    location = pipeline.normalize_location_text(location)
+    location = location.lower()
+    location = location.replace("sub region", "")
+    location = location.replace("northen", "north")
+    location = location.replace("southern", "south")
+    location = location.replace("savonia", "savo")
+    location_parts = location.split()
+    table = pipeline.cities_and_regions
+    city_match, region_match, country_match = None, None, None
+
+    for part in location_parts:
+        city_row = table[table["city"].str.lower() == part]
+        if not city_row.empty:
+            city_match = city_row.iloc[0]["city"]
+            region_match = city_row.iloc[0]["region_en"]
+            country_match = city_row.iloc[0]["country"]
+            break
+
+    if city_match is None:
+        num_parts = len(location_parts)
+        if num_parts > 3:
+            candidates = [" ".join(location_parts[1 : num_parts - 1])]
+        elif num_parts == 3:
+            candidates = [" ".join(location_parts[: num_parts - 1])]
+        else:
+            candidates = location_parts
+        for candidate in candidates:
+            region_row = table[
+                (table["region_fi"].str.lower() == candidate)
+                | (table["region_en"].str.lower() == candidate)
+            ]
+            if not region_row.empty:
+                city_match = "Unspecified"
+                region_match = region_row.iloc[0]["region_en"]
+                country_match = region_row.iloc[0]["country"]
+                break
+
+    if city_match is None and region_match is None:
+        if "finland" in location_parts:
+            city_match = "Unspecified"
+            region_match = "Unspecified"
+            country_match = "Finland"
+        else:
+            city_match = "Unspecified"
+            region_match = "Unspecified"
+            country_match = "Unspecified"
+
+    return city_match, region_match, country_match
+
+
+def sample_locations(table, country_name, n_items, seed):
+    """Builds location strings in the shapes LinkedIn returns them in, with
+    commas already stripped as process_item does."""
+    rng = random.Random(seed)
+    rows = table.to_dict("records")
+    templates = [
+        lambda row: f"{row['city']} {row['region_fi']} {country_name}",
+        lambda row: f"{row['region_en']} {country_name}",
+        lambda row: f"{row['region_fi']} Sub Region {country_name}",
+        lambda row: f"Greater {row['city']} Metropolitan Area",
+        lambda row: f"{country_name}",
+        lambda row: "Remote",
+    ]
+    return [rng.choice(templates)(rng.choice(rows)) for _ in range(n_items)]
+
+
+def run(label, function, locations):
+    start = time.perf_counter()
+    results = [function(location) for location in locations]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {len(locations) / elapsed:>14,.0f} items/sec")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--country", default="finland")
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    add_input_argument(parser)
+    args = parser.parse_args()
+
+    pipeline = LinkedinJobSearchPipeline(country_name=args.country)
+    if args.input:
+        locations = read_jobs(args.input, args.items, ["location"])["location"].tolist()
+    else:
+        locations = sample_locations(
+            pipeline.cities_and_regions,
+            args.country.capitalize(),
+            args.items,
+            args.seed,
+        )
+
+    before = run(
+        "before", lambda loc: legacy_normalize_location(pipeline, loc), locations
+    )
+    after = run("after", pipeline.normalize_location, locations)
+
+    mismatches = sum(1 for old, new in zip(before, after) if old != new)
+    print(f"mismatches: {mismatches} / {len(locations)}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
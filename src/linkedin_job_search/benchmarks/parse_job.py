@@ -0,0 +1,118 @@
+"""
+Benchmark for the field extraction of JobScraperSpider.parse_job.
+
+Before, parse_job evaluated nine XPath expressions from the root of every
+job page, each compiled from its string on every response and each walking
+down from the core-rail section again. Now the expressions are compiled once,
+the top card and the job criteria list are located once per page and the
+fields are looked up relative to them. Both are timed per page on the job
+pages of benchmarks.parse_replay, and their items are checked to be
+identical.
+
+Run from src/linkedin_job_search:
+
+    python -m benchmarks.parse_job --items 2000
+    python -m benchmarks.parse_job --input ../../data/synthetic_jobs.parquet --items 20000
+"""
+
+import argparse
+import time
+
+from benchmarks.generated_jobs import add_input_argument
+from benchmarks.parse_replay import (
+    fixture_pages,
+    generated_pages,
+    make_responses,
+    recorded_pages,
+)
+from linkedin_job_search.spiders.job_scraper import JobScraperSpider
+
+CORE_RAIL = './/main/section[contains(@class, "core-rail")]'
+TOP_CARD = (
+    CORE_RAIL + '/div/section[contains(@class, "top-card-layout")]'
+    '/div/div[contains(@class, "entity-info-container")]/div'
+)
+JOB_CRITERIA = (
+    CORE_RAIL + '/div/div[contains(@class, "details")]'
+    '/section[contains(@class, "description")]/div/ul'
+)
+
+
+def legacy_parse_job(response):
+    """The item parse_job extracted before the precompiled XPath expressions."""
+    return {
+        "title": response.xpath(TOP_CARD + "/h1/text()").get(),
+        "company": response.xpath(
+            TOP_CARD + '/h4/div[1]/span[@class="topcard__flavor"]/a/text()'
+        ).get(),
+        "location": response.xpath(
+            TOP_CARD + '/h4/div[1]/span[contains(@class, "bullet")]/text()'
+        ).get(),
+        "date_posted": response.xpath(
+            TOP_CARD + '/h4/div[2]/span[contains(@class, "posted-time-ago")]/text()'
+        ).get(),
+        "seniority_level": response.xpath(JOB_CRITERIA + "/li[1]/span/text()").get(),
+        "employment_type": response.xpath(JOB_CRITERIA + "/li[2]/span/text()").get(),
+        "job_function": response.xpath(JOB_CRITERIA + "/li[3]/span/text()").get(),
+        "industries": response.xpath(JOB_CRITERIA + "/li[4]/span/text()").get(),
+        "description": response.xpath(
+            CORE_RAIL + '/div[contains(@class, "details")]'
+            '/div[contains(@class, "details")]'
+            '/section[contains(@class, "description")]'
+            '/div[contains(@class, "core-section-container")]'
+            '/div[contains(@class, "description")]/section/div'
+        ).get(),
+        "job_url": response.meta["job_url"],
+    }
+
+
+def timed_extraction(extract, responses, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = [extract(response) for response in responses]
+        best = min(best, time.perf_counter() - start)
+    return best, items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--country", default="finland")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--httpcache", help="A Scrapy HTTP cache directory to replay.")
+    add_input_argument(parser)
+    args = parser.parse_args()
+
+    spider = JobScraperSpider(country=args.country, period="past_24_hours")
+    if args.httpcache:
+        pages = recorded_pages(args.httpcache, spider.name)
+    elif args.input:
+        pages = generated_pages(args.input, args.items, spider.base_url)
+    else:
+        pages = fixture_pages(args.items, spider.base_url)
+    _, responses = make_responses(pages)
+    # Parse the pages up front, as both extractions share the response's tree
+    for response in responses:
+        response.selector
+
+    before_time, expected = timed_extraction(legacy_parse_job, responses, args.repeat)
+    after_time, items = timed_extraction(
+        lambda response: next(spider.parse_job(response)), responses, args.repeat
+    )
+    # Pages without a title are retried rather than extracted, by both
+    expected = [item for item in expected if item["title"] is not None]
+    items = [item for item in items if isinstance(item, dict)]
+    assert items == expected, "parse_job extracted different items"
+
+    print(f"{len(responses)} job pages")
+    print(
+        f"  before {before_time / len(responses) * 1e6:>8.1f} us/page"
+        f"   after {after_time / len(responses) * 1e6:>8.1f} us/page"
+        f"   x{before_time / after_time:.1f}"
+    )
+    print("  identical items")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Replays recorded LinkedIn responses through the spider and the pipelines, offline.
+
+Listing pages go through JobScraperSpider.parse and job pages through
+JobScraperSpider.parse_job, whose items then go through
+LinkedinJobSearchPipeline and PostgresPipeline, the latter on a stand-in
+connection with no latency (see benchmarks.postgres_writer), so only the
+CPU cost of each stage is measured. The throughput of each stage and of
+the whole replay is reported in pages/sec and items/sec. Building the lxml
+tree of a page is timed apart from the XPath extraction of the callbacks,
+and the description cleanup, location resolution and job-function
+classification apart from the rest of the normalize pipeline.
+
+The responses come from, in order of preference:
+- --httpcache: a Scrapy HTTP cache recorded by a real crawl, e.g.
+      scrapy crawl job_scraper -a country=finland -a period=past_24_hours \\
+          -s HTTPCACHE_ENABLED=True
+  which stores them under .scrapy/httpcache (HTTPCACHE_GZIP is supported);
+- --input: job pages rendered from the postings of a file written by
+  tools/generate_jobs.py, and listing pages linking to them;
+- the listing and job page fixtures of the tests, repeated --items times.
+
+Run from src/linkedin_job_search so the relative resource paths resolve:
+
+    python -m benchmarks.parse_replay --items 2000
+    python -m benchmarks.parse_replay --input ../../data/synthetic_jobs.parquet --items 20000
+    python -m benchmarks.parse_replay --httpcache .scrapy/httpcache
+"""
+
+import argparse
+import datetime
+import functools
+import gzip
+import html
+import pickle
+import time
+from pathlib import Path
+
+import scrapy
+from benchmarks.generated_jobs import add_input_argument, read_jobs
+from benchmarks.postgres_writer import open_pipeline
+from linkedin_job_search.pipelines import LinkedinJobSearchPipeline
+from linkedin_job_search.spiders.job_scraper import JobScraperSpider
+from scrapy.http import HtmlResponse
+
+FIXTURES_DIR = Path(__file__).parent.parent / "tests" / "fixtures"
+JOBS_PER_LISTING_PAGE = 10
+
+LISTING_ITEM = """
+      <li>
+        <div>
+          <a href="{url}?position={position}&pageNum=0">{title}</a>
+        </div>
+      </li>"""
+
+JOB_PAGE = """<html>
+  <body>
+    <main>
+      <section class="core-rail">
+        <div>
+          <section class="top-card-layout">
+            <div>
+              <div class="entity-info-container">
+                <div>
+                  <h1>{title}</h1>
+                  <h4>
+                    <div>
+                      <span class="topcard__flavor"><a>{company}</a></span>
+                      <span class="bullet">{location}</span>
+                    </div>
+                    <div>
+                      <span class="posted-time-ago">{time_ago}</span>
+                    </div>
+                  </h4>
+                </div>
+              </div>
+            </div>
+          </section>
+          <div class="details">
+            <section class="description">
+              <div>
+                <ul>
+                  <li><span>{seniority_level}</span></li>
+                  <li><span>{employment_type}</span></li>
+                  <li><span>{job_function}</span></li>
+                  <li><span>{industries}</span></li>
+                </ul>
+              </div>
+            </section>
+          </div>
+        </div>
+        <div class="details">
+          <div class="details">
+            <section class="description">
+              <div class="core-section-container">
+                <div class="description">
+                  <section>
+                    {description}
+                  </section>
+                </div>
+              </div>
+            </section>
+          </div>
+        </div>
+      </section>
+    </main>
+  </body>
+</html>"""
+
+
+def is_listing_url(url):
+    return "seeMoreJobPostings" in url
+
+
+def recorded_pages(httpcache_dir, spider_name):
+    """The (url, body) of the responses in a Scrapy filesystem HTTP cache."""
+    pages = []
+    for meta_path in sorted(Path(httpcache_dir, spider_name).glob("*/*/pickled_meta")):
+        with open(meta_path, "rb") as file:
+            gzipped = file.read(2) == b"\x1f\x8b"
+        open_file = gzip.open if gzipped else open
+        with open_file(meta_path, "rb") as file:
+            metadata = pickle.load(file)
+        if metadata["status"] != 200:
+            continue
+        with open_file(meta_path.parent / "response_body", "rb") as file:
+            pages.append((metadata["url"], file.read()))
+    return pages
+
+
+def time_ago(date_posted, now):
+    days = (now - date_posted).days
+    if days >= 7:
+        return f"{days // 7} weeks ago"
+    if days >= 1:
+        return f"{days} days ago"
+    return f"{max((now - date_posted).seconds // 3600, 1)} hours ago"
+
+
+def generated_pages(input_path, n_items, listing_url):
+    """Job pages rendered from generated postings, and the listing pages linking to them."""
+    jobs = read_jobs(
+        input_path,
+        n_items,
+        [
+            "date_posted",
+            "title",
+            "company",
+            "location",
+            "seniority_level",
+            "employment_type",
+            "job_function",
+            "industries",
+            "description",
+            "job_url",
+        ],
+    ).to_dict("records")
+    now = datetime.datetime.now()
+    job_pages = [
+        (
+            job["job_url"],
+            JOB_PAGE.format(
+                **{
+                    key: html.escape(value)
+                    for key, value in job.items()
+                    if key not in ("description", "date_posted")
+                },
+                time_ago=time_ago(
+                    datetime.datetime.fromisoformat(job["date_posted"]), now
+                ),
+                description=job["description"],
+            ).encode("utf-8"),
+        )
+        for job in jobs
+    ]
+    listing_pages = [
+        (
+            listing_url,
+            (
+                "<html><body><ul>"
+                + "".join(
+                    LISTING_ITEM.format(
+                        url=job["job_url"],
+                        position=position + 1,
+                        title=html.escape(job["title"]),
+                    )
+                    for position, job in enumerate(
+                        jobs[start : start + JOBS_PER_LISTING_PAGE]
+                    )
+                )
+                + "\n    </ul></body></html>"
+            ).encode("utf-8"),
+        )
+        for start in range(0, len(jobs), JOBS_PER_LISTING_PAGE)
+    ]
+    return listing_pages + job_pages
+
+
+def fixture_pages(n_items, listing_url):
+    """The listing and job page fixtures of the tests, n_items job pages in all."""
+    listing = (FIXTURES_DIR / "job_listing.html").read_bytes()
+    job_page = (FIXTURES_DIR / "job_detail.html").read_bytes()
+    n_listings = -(-n_items // listing.count(b"<li>"))
+    return [(listing_url, listing)] * n_listings + [
+        (f"https://www.linkedin.com/jobs/view/{index}", job_page)
+        for index in range(n_items)
+    ]
+
+
+def make_responses(pages):
+    listings, jobs = [], []
+    for url, body in pages:
+        if is_listing_url(url):
+            meta, responses = {"url": url}, listings
+        else:
+            meta, responses = {"job_url": url}, jobs
+        responses.append(
+            HtmlResponse(
+                url=url,
+                request=scrapy.Request(url=url, meta=meta),
+                body=body,
+                encoding="utf-8",
+            )
+        )
+    return listings, jobs
+
+
+class Stage:
+    def __init__(self, name, unit):
+        self.name = name
+        self.unit = unit
+        self.count = 0
+        self.elapsed = 0.0
+
+    def __call__(self, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        self.elapsed += time.perf_counter() - start
+        self.count += 1
+        return result
+
+    def timing(self, function):
+        """function, timed as this stage whenever it is called."""
+        return functools.partial(self, function)
+
+    def report(self):
+        rate = self.count / self.elapsed if self.elapsed else float("inf")
+        print(
+            f"{self.name:<22} {self.count:>8} {self.unit:<6} {self.elapsed:>9.3f}s"
+            f" {rate:>14,.0f} {self.unit}/sec"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--country", default="finland")
+    parser.add_argument("--period", default="past_24_hours")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--httpcache", help="A Scrapy HTTP cache directory to replay.")
+    add_input_argument(parser)
+    args = parser.parse_args()
+
+    spider = JobScraperSpider(country=args.country, period=args.period)
+    if args.httpcache:
+        pages = recorded_pages(args.httpcache, spider.name)
+    elif args.input:
+        pages = generated_pages(args.input, args.items, spider.base_url)
+    else:
+        pages = fixture_pages(args.items, spider.base_url)
+    if not pages:
+        parser.error(f"no recorded {spider.name} responses in {args.httpcache}")
+    listings, jobs = make_responses(pages)
+
+    location_pipeline = LinkedinJobSearchPipeline(country_name=args.country)
+    postgres_pipeline = open_pipeline(args.batch_size, stand_in=True, latency=0)
+    html_stage = Stage("html parsing", "pages")
+    parse_stage = Stage("parse xpath", "pages")
+    parse_job_stage = Stage("parse_job xpath", "pages")
+    normalize_stage = Stage("normalize pipeline", "items")
+    # The steps of the normalize pipeline, called by normalize_item
+    normalize_steps = [
+        (Stage("  description", "items"), "normalize_description"),
+        (Stage("  location", "items"), "normalize_location"),
+        (Stage("  job function", "items"), "normalize_job_function"),
+    ]
+    for stage, name in normalize_steps:
+        setattr(location_pipeline, name, stage.timing(getattr(location_pipeline, name)))
+    postgres_stage = Stage("postgres pipeline", "items")
+
+    start = time.perf_counter()
+    for response in listings + jobs:
+        # Builds the lxml tree the callbacks' XPath expressions run on
+        html_stage(getattr, response, "selector")
+    job_requests = 0
+    for response in listings:
+        for request in parse_stage(list, spider.parse(response)):
+            job_requests += request.callback == spider.parse_job
+    items = []
+    for response in jobs:
+        items += parse_job_stage(list, spider.parse_job(response))
+    items = [item for item in items if isinstance(item, dict)]
+    for item in items:
+        normalize_stage(location_pipeline.process_item, item, spider)
+    for item in items:
+        postgres_stage(postgres_pipeline.process_item, item, spider)
+    # The last, partial batch
+    flush_start = time.perf_counter()
+    postgres_pipeline.flush()
+    postgres_stage.elapsed += time.perf_counter() - flush_start
+    elapsed = time.perf_counter() - start
+
+    other_fields = Stage("  other fields", "items")
+    other_fields.count = normalize_stage.count
+    other_fields.elapsed = normalize_stage.elapsed - sum(
+        stage.elapsed for stage, _ in normalize_steps
+    )
+    print(
+        f"{len(listings)} listing pages ({job_requests} job requests),"
+        f" {len(jobs)} job pages, {len(items)} items"
+    )
+    for stage in (
+        html_stage,
+        parse_stage,
+        parse_job_stage,
+        normalize_stage,
+        *(stage for stage, _ in normalize_steps),
+        other_fields,
+        postgres_stage,
+    ):
+        stage.report()
+    print(
+        f"{'total':<22} {len(listings) + len(jobs):>8} pages  {elapsed:>9.3f}s"
+        f" {(len(listings) + len(jobs)) / elapsed:>14,.0f} pages/sec"
+        f" {len(items) / elapsed:>10,.0f} items/sec"
+    )
+    postgres_pipeline.close_spider(spider)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Benchmark for PostgresPipeline write throughput at different batch sizes.
+
+A batch size of 1 writes every job posting in its own INSERT ... ON CONFLICT
+statement and transaction.
+
+By default the benchmark writes to the database configured in configs/.env.
+Use a disposable database: rows are inserted into the real `jobs` table under
+a unique benchmark URL prefix and deleted again afterwards. With --stand-in no
+database is needed; every round-trip to the server is replaced by a fixed
+--latency-ms sleep, which is what dominates the per-item write path.
+
+Run from src/linkedin_job_search:
+
+    python -m benchmarks.postgres_writer --items 2000
+    python -m benchmarks.postgres_writer --stand-in --latency-ms 1 --items 2000
+"""
+
+import argparse
+import datetime
+import time
+import uuid
+from contextlib import ExitStack
+from unittest import mock
+
+from benchmarks.generated_jobs import add_input_argument, read_jobs
+from linkedin_job_search import pipelines
+from linkedin_job_search.pipelines import JOB_COLUMNS, PostgresPipeline
+
+STAND_IN_SECRETS = {
+    "POSTGRES_USER": "stand_in",
+    "POSTGRES_PASSWORD": "stand_in",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_DBNAME": "stand_in",
+}
+
+
+class StandInCursor:
+    rowcount = 0
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, params=None):
+        self.connection.round_trip()
+
+    def fetchone(self):
+        return (None,)
+
+    def fetchall(self):
+        return []
+
+    def mogrify(self, template, args):
+        return repr(args).encode("utf-8")
+
+    def close(self):
+        pass
+
+
+class StandInConnection:
+    """Just enough of a psycopg2 connection for PostgresPipeline and
+    execute_values, paying a fixed latency per server round-trip."""
+
+    encoding = "UTF8"
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.round_trips = 0
+
+    def round_trip(self):
+        self.round_trips += 1
+        time.sleep(self.latency)
+
+    def cursor(self):
+        return StandInCursor(self)
+
+    def commit(self):
+        self.round_trip()
+
+    def rollback(self):
+        self.round_trip()
+
+    def close(self):
+        pass
+
+
+def read_items(input_path, n_items, url_prefix):
+    """The first n_items postings of a file written by tools/generate_jobs.py,
+    under the benchmark URL prefix."""
+    df = read_jobs(input_path, n_items, list(JOB_COLUMNS))
+    df["job_url"] = [f"{url_prefix}{index}" for index in range(len(df))]
+    return df.to_dict("records")
+
+
+def make_items(n_items, url_prefix):
+    date_posted = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return [
+        {
+            "date_posted": date_posted,
+            "title": "Software Engineer",
+            "company": "Acme Oy",
+            "location": "Helsinki Uusimaa Finland",
+            "city": "Helsinki",
+            "region": "Uusimaa",
+            "country": "Finland",
+            "seniority_level": "Mid-Senior level",
+            "employment_type": "Full-time",
+            "job_function": "Engineering",
+            "job_fields": '["Software Development"]',
+            "industries": "IT Services",
+            "description": "Build things. " * 100,
+            "job_url": f"{url_prefix}{index}",
+        }
+        for index in range(n_items)
+    ]
+
+
+def open_pipeline(batch_size, stand_in, latency):
+    """A PostgresPipeline connected to the database, or to a StandInConnection."""
+    with ExitStack() as stack:
+        if stand_in:
+            connection = StandInConnection(latency)
+            stack.enter_context(
+                mock.patch.object(
+                    pipelines, "dotenv_values", return_value=STAND_IN_SECRETS
+                )
+            )
+            stack.enter_context(
+                mock.patch.object(
+                    pipelines.psycopg2, "connect", return_value=connection
+                )
+            )
+        pipeline = PostgresPipeline(batch_size=batch_size, flush_interval=float("inf"))
+        pipeline.open_spider(spider=None)
+    return pipeline
+
+
+def run(batch_size, items, url_prefix, stand_in, latency):
+    pipeline = open_pipeline(batch_size, stand_in, latency)
+
+    start = time.perf_counter()
+    for item in items:
+        pipeline.process_item(item, spider=None)
+    pipeline.flush()
+    elapsed = time.perf_counter() - start
+
+    if not stand_in:
+        pipeline.cursor.execute(
+            "DELETE FROM jobs WHERE job_url LIKE %s", (url_prefix + "%",)
+        )
+    pipeline.close_spider(spider=None)
+    return len(items) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--stand-in", action="store_true")
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    add_input_argument(parser)
+    args = parser.parse_args()
+
+    for batch_size in args.batch_sizes:
+        url_prefix = f"https://benchmark.invalid/{uuid.uuid4()}/"
+        if args.input:
+            items = read_items(args.input, args.items, url_prefix)
+        else:
+            items = make_items(args.items, url_prefix)
+        rows_per_second = run(
+            batch_size, items, url_prefix, args.stand_in, args.latency_ms / 1000
+        )
+        print(f"batch_size={batch_size:<6} {rows_per_second:>12,.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    main()
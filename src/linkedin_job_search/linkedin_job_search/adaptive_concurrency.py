@@ -0,0 +1,103 @@
+import math
+import time
+
+# The statuses LinkedIn answers with when it rate limits a client: 429 Too
+# Many Requests, and its own 999 for requests it takes for a bot's
+THROTTLED_STATUSES = (429, 999)
+
+
+class AimdRate:
+    """
+    The rate, in requests per second, at which to download from one
+    downloader slot, adjusted additive-increase/multiplicative-decrease.
+
+    Every response that shows no sign of throttling adds `increase` to the
+    rate, up to 1 / min_delay. A throttled response, a download error, a
+    login wall while the smoothed share of login walls is above
+    login_wall_threshold, or a smoothed latency above target_latency
+    multiplies it by decrease_factor, down to 1 / max_delay. The responses to
+    the requests already in flight report the same congestion, so the rate
+    is decreased at most once per round trip.
+
+    The slot applies the rate as its delay, 1 / rate, and as the concurrency
+    that keeps that many requests per second going at the current latency.
+    """
+
+    def __init__(
+        self,
+        rate,
+        min_delay=1.0,
+        max_delay=60.0,
+        max_concurrency=8,
+        increase=0.02,
+        decrease_factor=0.5,
+        target_latency=5.0,
+        login_wall_threshold=0.15,
+        smoothing=0.1,
+        clock=time.monotonic,
+    ):
+        self.max_rate = 1 / min_delay
+        self.min_rate = 1 / max_delay
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+        self.max_concurrency = max_concurrency
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.target_latency = target_latency
+        self.login_wall_threshold = login_wall_threshold
+        self.smoothing = smoothing
+        self.clock = clock
+        self.latency = None
+        self.login_wall_rate = 0.0
+        self.last_decrease = -math.inf
+        self.decreases = 0
+
+    @property
+    def delay(self):
+        return 1 / self.rate
+
+    @property
+    def concurrency(self):
+        if self.latency is None:
+            return 1
+        return min(self.max_concurrency, max(1, math.ceil(self.rate * self.latency)))
+
+    def smooth(self, average, value):
+        return average + self.smoothing * (value - average)
+
+    def observe(self, status, latency=None, login_wall=False):
+        """
+        Adjust the rate to a response.
+
+        Returns:
+        str: Why the response was taken as a sign of throttling, or None.
+        """
+        if latency is not None:
+            self.latency = (
+                latency if self.latency is None else self.smooth(self.latency, latency)
+            )
+        self.login_wall_rate = self.smooth(self.login_wall_rate, float(login_wall))
+
+        if status in THROTTLED_STATUSES:
+            reason = f"status_{status}"
+        elif login_wall and self.login_wall_rate > self.login_wall_threshold:
+            reason = "login_wall"
+        elif self.latency is not None and self.latency > self.target_latency:
+            reason = "latency"
+        else:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            return None
+        self.decrease()
+        return reason
+
+    def observe_error(self):
+        """Adjust the rate to a download that failed, e.g. timed out."""
+        self.decrease()
+        return "download_error"
+
+    def decrease(self):
+        now = self.clock()
+        if now - self.last_decrease < max(self.delay, self.latency or 0):
+            return
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self.last_decrease = now
+        self.decreases += 1
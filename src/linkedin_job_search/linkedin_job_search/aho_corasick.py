@@ -0,0 +1,57 @@
+from collections import deque
+
+
+class AhoCorasick:
+    """
+    A multi-pattern substring matcher built once from a list of patterns.
+
+    find_all() walks the text a single time and reports every pattern that
+    occurs in it, including overlapping ones and patterns that are prefixes or
+    suffixes of each other. It gives the same answer as testing
+    `pattern in text` for each pattern, without the per-pattern scan.
+    """
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        for index, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                child = self.goto[node].get(char)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto[node][char] = child
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                node = child
+            self.output[node].append(index)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find_all(self, text):
+        """
+        Returns the set of indices (into the patterns given at construction)
+        of all patterns occurring in text.
+        """
+        found = set(self.output[0])
+        goto, fail, output = self.goto, self.fail, self.output
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
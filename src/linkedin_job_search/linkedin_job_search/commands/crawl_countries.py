@@ -0,0 +1,246 @@
+import json
+import logging
+import math
+import os
+import time
+
+from scrapy.commands import ScrapyCommand
+from scrapy.crawler import Crawler
+from scrapy.exceptions import UsageError
+from scrapy.utils.defer import deferred_from_coro
+from twisted.internet import defer
+
+from linkedin_job_search.spiders.job_scraper import JobScraperSpider
+
+# The crawl stats shown per country in the summary, with their column titles
+SUMMARY_STATS = (
+    ("items", "item_scraped_count"),
+    ("inserted", "postgres/rows_inserted"),
+    ("duplicates", "postgres/rows_deduplicated"),
+    ("skipped", "incremental/skipped_job_requests"),
+    ("errors", "log_count/ERROR"),
+)
+
+
+def load_countries():
+    config_file = os.path.join(os.getcwd(), "../../configs/scrapy_config.json")
+    with open(config_file) as f:
+        return json.load(f)["countries"]
+
+
+def has_resources(country_name):
+    resources_dir = os.path.join(os.getcwd(), f"../../resources/{country_name.lower()}")
+    return all(
+        os.path.exists(f"{resources_dir}/{resource}_{country_name.lower()}.json")
+        for resource in ("cities_and_regions", "job_fields")
+    )
+
+
+def select_countries(countries, names):
+    """
+    The countries of configs/scrapy_config.json to crawl.
+
+    Args:
+    countries (list): The countries of the config, with their name, geo_id and
+        optionally the settings to crawl them with.
+    names (str): Comma-separated country names, or None for every country the
+        resources directory has the cities and job fields of.
+
+    Returns:
+    list: The selected countries, in the order given.
+    """
+    if names is None:
+        return [country for country in countries if has_resources(country["name"])]
+    by_name = {country["name"].lower(): country for country in countries}
+    selected = []
+    for name in names.split(","):
+        name = name.strip().lower()
+        if name not in by_name:
+            raise UsageError(f"Country '{name}' not found in configuration.")
+        if by_name[name] not in selected:
+            selected.append(by_name[name])
+    missing = [
+        country["name"] for country in selected if not has_resources(country["name"])
+    ]
+    if missing:
+        raise UsageError(
+            f"No cities and job fields under resources/ for: {', '.join(missing)}"
+        )
+    return selected
+
+
+def country_time_budget(deadline, n_countries, concurrent_countries):
+    """The seconds each country may crawl for, so that every country gets its
+    turn before the deadline when they run concurrent_countries at a time."""
+    waves = math.ceil(n_countries / concurrent_countries)
+    return deadline / waves
+
+
+def country_settings(settings, country, time_budget):
+    """
+    The settings to crawl a country with: the settings of the command, the
+    settings of the country in configs/scrapy_config.json on top, and the
+    time budget unless either sets CLOSESPIDER_TIMEOUT.
+    """
+    settings = settings.copy()
+    settings.set("CLOSESPIDER_TIMEOUT", time_budget, priority="project")
+    settings.setdict(country.get("settings", {}), priority="spider")
+    # The crawlers run side by side, so each keeps its own files
+    for name in (
+        "INCREMENTAL_STATE_FILE",
+        "PAGE_RETRY_DEAD_LETTER_FILE",
+        "POSTGRES_DEAD_LETTER_FILE",
+    ):
+        path = settings.get(name)
+        if path:
+            root, ext = os.path.splitext(path)
+            settings.set(
+                name,
+                f"{root}_{country['name'].lower()}{ext}",
+                priority=settings.getpriority(name),
+            )
+    # and its own job directory, to resume its own crawl from
+    jobdir = settings.get("JOBDIR")
+    if jobdir:
+        settings.set(
+            "JOBDIR",
+            os.path.join(jobdir, country["name"].lower()),
+            priority=settings.getpriority("JOBDIR"),
+        )
+    return settings
+
+
+def summary_lines(results):
+    """The per-country summary of a run, one line per country after a header."""
+    header = f"{'country':<24} {'status':<22}" + "".join(
+        f" {title:>10}" for title, _ in SUMMARY_STATS
+    )
+    lines = [header + f" {'minutes':>8}"]
+    for name, result in results.items():
+        stats = result.get("stats", {})
+        lines.append(
+            f"{name:<24} {result['status']:<22}"
+            + "".join(f" {stats.get(key, 0):>10}" for _, key in SUMMARY_STATS)
+            + f" {result.get('elapsed', 0) / 60:>8.1f}"
+        )
+    return lines
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+
+    def syntax(self):
+        return "[options]"
+
+    def short_desc(self):
+        return "Run job_scraper for several countries in one process"
+
+    def long_desc(self):
+        return (
+            "Run job_scraper for several countries in one process and reactor, "
+            "a few countries at a time, each within its share of the deadline, "
+            "and print a summary per country."
+        )
+
+    def add_options(self, parser):
+        super().add_options(parser)
+        parser.add_argument(
+            "--countries",
+            help="comma-separated countries, as named in configs/scrapy_config.json "
+            "(default: every country with resources)",
+        )
+        parser.add_argument("--period", default="past_2_hours")
+        parser.add_argument(
+            "--concurrent-countries",
+            type=int,
+            default=4,
+            help="how many countries to crawl at a time (default: 4)",
+        )
+        parser.add_argument(
+            "--deadline",
+            type=float,
+            default=40,
+            help="minutes after which the crawls still running are closed and the "
+            "countries not started are skipped (default: 40)",
+        )
+
+    def run(self, args, opts):
+        if args:
+            raise UsageError("crawl_countries takes no positional arguments")
+        countries = select_countries(load_countries(), opts.countries)
+        if not countries:
+            raise UsageError("No countries to crawl")
+        deadline = opts.deadline * 60
+        time_budget = country_time_budget(
+            deadline, len(countries), opts.concurrent_countries
+        )
+        logging.info(
+            f"Crawling {len(countries)} countries, {opts.concurrent_countries} at "
+            f"a time, for at most {time_budget / 60:.1f} minutes each"
+        )
+
+        self.results = {
+            country["name"]: {"status": "not started"} for country in countries
+        }
+        self.deadline_passed = False
+        semaphore = defer.DeferredSemaphore(opts.concurrent_countries)
+        crawls = [
+            semaphore.run(self.crawl_country, country, opts.period, time_budget)
+            for country in countries
+        ]
+        defer.DeferredList(crawls).addBoth(self.finish)
+
+        from twisted.internet import reactor
+
+        self.deadline_call = reactor.callLater(deadline, self.stop_at_deadline)
+        self.crawler_process.start(stop_after_crawl=False)
+
+    def crawl_country(self, country, period, time_budget):
+        if self.deadline_passed:
+            return None
+        name = country["name"]
+        crawler = Crawler(
+            JobScraperSpider, country_settings(self.settings, country, time_budget)
+        )
+        started = time.monotonic()
+        self.results[name]["status"] = "running"
+
+        def finished(result):
+            self.results[name] = {
+                "status": crawler.stats.get_value("finish_reason", "finished"),
+                "stats": crawler.stats.get_stats(),
+                "elapsed": time.monotonic() - started,
+            }
+
+        def failed(failure):
+            logging.error(f"Crawl of {name} failed: {failure.getErrorMessage()}")
+            self.results[name] = {
+                "status": "failed",
+                "stats": crawler.stats.get_stats() if crawler.stats else {},
+                "elapsed": time.monotonic() - started,
+            }
+
+        crawl = deferred_from_coro(
+            self.crawler_process.crawl(crawler, country=name, period=period)
+        )
+        return crawl.addCallbacks(finished, failed)
+
+    def stop_at_deadline(self):
+        logging.warning("Deadline reached, closing the crawls still running")
+        self.deadline_passed = True
+        deferred_from_coro(self.crawler_process.stop())
+
+    def finish(self, _):
+        from twisted.internet import reactor
+
+        if self.deadline_call.active():
+            self.deadline_call.cancel()
+        for line in summary_lines(self.results):
+            print(line)
+        if any(result["status"] == "failed" for result in self.results.values()):
+            self.exitcode = 1
+        # Every crawl may have failed to start before the reactor did
+        if reactor.running:
+            reactor.stop()
+        else:
+            reactor.callWhenRunning(reactor.stop)
@@ -0,0 +1,60 @@
+import html
+import re
+
+import lxml.html
+from bs4 import BeautifulSoup
+
+# Elements whose text BeautifulSoup's get_text() leaves out
+NON_TEXT_ELEMENTS = ("script", "style", "template")
+
+MARKUP = re.compile(
+    r"<(script|style|template)\b[^>]*>.*?</\1\s*>"
+    r"|<!--.*?-->"
+    r"""|<[a-zA-Z/!?](?:"[^"]*"|'[^']*'|[^'">])*>""",
+    re.DOTALL | re.IGNORECASE,
+)
+
+
+def beautifulsoup_text(description):
+    """
+    The text of an HTML job description, whitespace collapsed to single
+    spaces, from a BeautifulSoup tree built with the pure-Python html.parser.
+    The other cleaners return the same text.
+    """
+    soup = BeautifulSoup(description, "html.parser")
+
+    cleaned_text = soup.get_text(separator=" ", strip=True)
+
+    cleaned_text = " ".join(cleaned_text.split())
+    return cleaned_text
+
+
+def lxml_text(description):
+    """
+    The text of an HTML job description from an lxml tree. Faster than
+    beautifulsoup_text and as forgiving of malformed HTML, though what a
+    malformed description reads as may differ between the two parsers.
+    """
+    root = lxml.html.fragment_fromstring(description, create_parent="div")
+    # Emptied rather than removed, so the text after them stays a separate string
+    for element in root.iter(*NON_TEXT_ELEMENTS):
+        element.clear(keep_tail=True)
+    return " ".join(" ".join(root.itertext()).split())
+
+
+def tokenizer_text(description):
+    """
+    The text of an HTML job description, from a single pass that replaces
+    tags, comments and non-text elements with spaces, without building a
+    tree. The fastest cleaner, and exact for well-formed HTML such as the
+    descriptions parse_job serializes with lxml, where a literal `<` in text
+    is always escaped.
+    """
+    return " ".join(html.unescape(MARKUP.sub(" ", description)).split())
+
+
+DESCRIPTION_CLEANERS = {
+    "beautifulsoup": beautifulsoup_text,
+    "lxml": lxml_text,
+    "tokenizer": tokenizer_text,
+}
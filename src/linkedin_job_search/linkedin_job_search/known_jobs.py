@@ -0,0 +1,92 @@
+import datetime
+import logging
+import os
+
+import psycopg2
+from dotenv import dotenv_values
+
+
+class KnownJobStore:
+    """
+    The set of job URLs already scraped within the last lookback_hours, used
+    by incremental crawls to skip detail pages that are already stored.
+
+    Without a state_file the URLs are read from the `jobs` table in
+    PostgreSQL, which PostgresPipeline keeps up to date, by the time their
+    rows were inserted (stored_at), or by their posting time for the rows
+    inserted before that column was added. With a state_file
+    they are kept in a local tab-separated file of `<timestamp>\\t<job_url>`
+    lines instead, and the URLs recorded during the crawl are written back
+    to it by save().
+    """
+
+    def __init__(self, state_file=None, lookback_hours=24):
+        self.state_file = state_file
+        self.lookback_hours = lookback_hours
+        self.seen_at = {}
+
+    def cutoff(self):
+        return datetime.datetime.now() - datetime.timedelta(hours=self.lookback_hours)
+
+    def load(self):
+        if self.state_file:
+            self.seen_at = self.load_from_file()
+        else:
+            self.seen_at = self.load_from_postgres()
+        logging.info(f"Loaded {len(self.seen_at)} known job URLs")
+        return set(self.seen_at)
+
+    def load_from_postgres(self):
+        secrets = dotenv_values(os.path.join(os.getcwd(), "../../configs/.env"))
+        conn = psycopg2.connect(
+            dbname=secrets["POSTGRES_DBNAME"],
+            user=secrets["POSTGRES_USER"],
+            password=secrets["POSTGRES_PASSWORD"],
+            host=secrets["POSTGRES_HOST"],
+            port=secrets["POSTGRES_PORT"],
+        )
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT job_url, MAX(COALESCE(stored_at, date_posted))
+                    FROM jobs
+                    WHERE COALESCE(stored_at, date_posted) >= %s
+                    GROUP BY job_url;
+                    """,
+                    (self.cutoff(),),
+                )
+                return dict(cursor.fetchall())
+        finally:
+            conn.close()
+
+    def load_from_file(self):
+        seen_at = {}
+        if not os.path.exists(self.state_file):
+            return seen_at
+        cutoff = self.cutoff()
+        with open(self.state_file) as file:
+            for line in file:
+                timestamp, _, job_url = line.rstrip("\n").partition("\t")
+                if not job_url:
+                    continue
+                timestamp = datetime.datetime.fromisoformat(timestamp)
+                if timestamp >= cutoff:
+                    seen_at[job_url] = max(timestamp, seen_at.get(job_url, timestamp))
+        return seen_at
+
+    def record(self, job_url):
+        self.seen_at[job_url] = datetime.datetime.now()
+
+    def save(self):
+        # PostgreSQL is kept current by PostgresPipeline; only the local file
+        # needs writing. Entries older than the lookback window are dropped.
+        if not self.state_file:
+            return
+        cutoff = self.cutoff()
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, "w") as file:
+            for job_url, timestamp in self.seen_at.items():
+                if timestamp >= cutoff:
+                    file.write(f"{timestamp.isoformat()}\t{job_url}\n")
+        os.replace(tmp_file, self.state_file)
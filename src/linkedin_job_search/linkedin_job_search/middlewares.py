@@ -1,4 +1,11 @@
+import time
+
 from scrapy import signals
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet.task import deferLater
+
+from linkedin_job_search.adaptive_concurrency import AimdRate
+from linkedin_job_search.retry_budget import DELAY_META_KEY
 
 
 class LinkedinJobSearchSpiderMiddleware:
@@ -47,14 +54,33 @@ class LinkedinJobSearchSpiderMiddleware:
 
 
 class LinkedinJobSearchDownloaderMiddleware:
+    """
+    With ADAPTIVE_CONCURRENCY_ENABLED, adapts the delay and concurrency of
+    each downloader slot to how LinkedIn responds, from an AimdRate per slot
+    that is decreased by 429 and 999 responses, login walls, slow responses
+    and download errors, and increased by every other response. The rate,
+    delay, concurrency, smoothed latency and login-wall rate of each slot,
+    and the responses taken as throttling per reason, are recorded in the
+    crawl stats under adaptive_concurrency/<slot>/.
+    """
+
     # Not all methods need to be defined. If a method is not defined,
     # scrapy acts as if the downloader middleware does not modify the
     # passed objects.
 
+    def __init__(self, crawler=None):
+        self.crawler = crawler
+        self.enabled = crawler is not None and crawler.settings.getbool(
+            "ADAPTIVE_CONCURRENCY_ENABLED"
+        )
+        self.rates = {}
+        # The clock of the rates, which time their decreases
+        self.clock = time.monotonic
+
     @classmethod
     def from_crawler(cls, crawler):
         # This method is used by Scrapy to create your spiders.
-        s = cls()
+        s = cls(crawler)
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
         return s
 
@@ -77,6 +103,13 @@ class LinkedinJobSearchDownloaderMiddleware:
         # - return a Response object
         # - return a Request object
         # - or raise IgnoreRequest
+        # Responses from the response cache say nothing of the server's load
+        if self.enabled and "cached" not in response.flags:
+            login_wall = b"Join LinkedIn" in response.body
+            latency = request.meta.get("download_latency")
+            self.adapt(
+                request, lambda rate: rate.observe(response.status, latency, login_wall)
+            )
         return response
 
     def process_exception(self, request, exception, spider):
@@ -87,7 +120,70 @@ class LinkedinJobSearchDownloaderMiddleware:
         # - return None: continue processing this exception
         # - return a Response object: stops process_exception() chain
         # - return a Request object: stops process_exception() chain
-        pass
+        if self.enabled:
+            self.adapt(request, AimdRate.observe_error)
+        return None
+
+    def new_rate(self):
+        settings = self.crawler.settings
+        download_delay = settings.getfloat("DOWNLOAD_DELAY")
+        return AimdRate(
+            rate=1 / download_delay if download_delay else float("inf"),
+            min_delay=settings.getfloat("ADAPTIVE_CONCURRENCY_MIN_DELAY", 1.0),
+            max_delay=settings.getfloat("ADAPTIVE_CONCURRENCY_MAX_DELAY", 60.0),
+            max_concurrency=settings.getint("ADAPTIVE_CONCURRENCY_MAX_CONCURRENCY", 8),
+            increase=settings.getfloat("ADAPTIVE_CONCURRENCY_RATE_INCREASE", 0.02),
+            decrease_factor=settings.getfloat(
+                "ADAPTIVE_CONCURRENCY_DECREASE_FACTOR", 0.5
+            ),
+            target_latency=settings.getfloat(
+                "ADAPTIVE_CONCURRENCY_TARGET_LATENCY", 5.0
+            ),
+            login_wall_threshold=settings.getfloat(
+                "ADAPTIVE_CONCURRENCY_LOGIN_WALL_THRESHOLD", 0.15
+            ),
+            clock=self.clock,
+        )
+
+    def adapt(self, request, observe):
+        key = request.meta.get("download_slot")
+        slot = self.crawler.engine.downloader.slots.get(key)
+        if slot is None:
+            return
+        if key not in self.rates:
+            self.rates[key] = self.new_rate()
+        rate = self.rates[key]
+        reason = observe(rate)
+        slot.delay = rate.delay
+        slot.concurrency = rate.concurrency
+
+        stats = self.crawler.stats
+        prefix = f"adaptive_concurrency/{key}"
+        if reason:
+            stats.inc_value(f"{prefix}/throttled/{reason}")
+        stats.set_value(f"{prefix}/rate", round(rate.rate, 3))
+        stats.set_value(f"{prefix}/delay", round(rate.delay, 3))
+        stats.set_value(f"{prefix}/concurrency", rate.concurrency)
+        stats.set_value(f"{prefix}/decrease_count", rate.decreases)
+        stats.set_value(f"{prefix}/login_wall_rate", round(rate.login_wall_rate, 3))
+        if rate.latency is not None:
+            stats.set_value(f"{prefix}/latency", round(rate.latency, 3))
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class RetryBackoffDownloaderMiddleware:
+    """
+    Holds back the pages the spider retries, for the backoff delay their
+    RetryBudget set in their meta, before they are downloaded. A request
+    held back takes up one of the CONCURRENT_REQUESTS meanwhile.
+    """
+
+    async def process_request(self, request, spider):
+        delay = request.meta.get(DELAY_META_KEY)
+        if delay:
+            from twisted.internet import reactor
+
+            await maybe_deferred_to_future(deferLater(reactor, delay))
+        return None
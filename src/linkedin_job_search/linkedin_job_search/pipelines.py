@@ -1,23 +1,87 @@
 import calendar
+import collections
 import datetime
 import json
 import logging
+import multiprocessing
 import os
+import time
 import unicodedata
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 
 import pandas as pd
 import psycopg2
-from bs4 import BeautifulSoup
 from dotenv import dotenv_values
+from psycopg2.extras import execute_values
+from twisted.internet import defer, task
+from twisted.python.failure import Failure
+
+from linkedin_job_search.aho_corasick import AhoCorasick
+from linkedin_job_search.description_cleaners import DESCRIPTION_CLEANERS
+
+JOB_COLUMNS = (
+    "date_posted",
+    "title",
+    "company",
+    "location",
+    "city",
+    "region",
+    "country",
+    "seniority_level",
+    "employment_type",
+    "job_function",
+    "job_fields",
+    "industries",
+    "description",
+    "job_url",
+)
+
+# The LinkedinJobSearchPipeline of a normalization worker process
+worker_pipeline = None
+
+
+def init_normalize_worker(country_name, description_cleaner):
+    global worker_pipeline
+    worker_pipeline = LinkedinJobSearchPipeline(country_name, description_cleaner)
+
+
+def normalize_in_worker(item):
+    return worker_pipeline.normalize_item(item)
 
 
 class LinkedinJobSearchPipeline:
-    def __init__(self, country_name):
+    """
+    Normalizes the scraped fields of a job posting and derives its city,
+    region, country and job fields.
+
+    By default every item is normalized in the reactor thread, blocking
+    downloads and callbacks meanwhile. With workers > 0 the items are
+    normalized in a pool of worker processes (or threads, with
+    executor="thread"), each building its own pipeline, and process_item
+    returns a Deferred. At most max_in_flight items are handed to the pool
+    at a time; the rest wait for their turn. With preserve_order, the
+    Deferreds fire in the order the items came in, whichever finishes first.
+    """
+
+    def __init__(
+        self,
+        country_name,
+        description_cleaner="beautifulsoup",
+        workers=0,
+        executor="process",
+        max_in_flight=None,
+        preserve_order=True,
+    ):
+        self.country_name = country_name
+        self.description_cleaner = description_cleaner
         config_file_cities_and_regions = os.path.join(
             os.getcwd(),
             f"../../resources/{country_name.lower()}/cities_and_regions_{country_name.lower()}.json",
         )
         self.cities_and_regions = pd.read_json(config_file_cities_and_regions)
+        self.city_index, self.region_index = self.build_location_index(
+            self.cities_and_regions
+        )
 
         config_file_job_fields = os.path.join(
             os.getcwd(),
@@ -29,12 +93,116 @@ class LinkedinJobSearchPipeline:
         for field in job_fields:
             for alt in field["alternatives"]:
                 self.alternative_to_field[alt.lower()] = field["name"]
+        self.alternative_fields = list(self.alternative_to_field.values())
+        self.alternative_matcher = AhoCorasick(list(self.alternative_to_field))
+
+        if description_cleaner not in DESCRIPTION_CLEANERS:
+            raise ValueError(
+                f"Description cleaner '{description_cleaner}' not found, "
+                f"expected one of {sorted(DESCRIPTION_CLEANERS)}."
+            )
+        self.clean_description = DESCRIPTION_CLEANERS[description_cleaner]
+
+        if executor not in ("process", "thread"):
+            raise ValueError(
+                f"Executor '{executor}' not found, expected 'process' or 'thread'."
+            )
+        self.workers = workers
+        self.executor_type = executor
+        self.max_in_flight = max_in_flight or 4 * workers
+        self.preserve_order = preserve_order
+        self.executor = None
 
     @classmethod
     def from_crawler(cls, crawler):
-        return cls(country_name=crawler.spider.country_name)
+        return cls(
+            country_name=crawler.spider.country_name,
+            description_cleaner=crawler.settings.get(
+                "DESCRIPTION_CLEANER", "beautifulsoup"
+            ),
+            workers=crawler.settings.getint("NORMALIZE_WORKERS", 0),
+            executor=crawler.settings.get("NORMALIZE_EXECUTOR", "process"),
+            max_in_flight=crawler.settings.getint("NORMALIZE_MAX_IN_FLIGHT", 0),
+            preserve_order=crawler.settings.getbool("NORMALIZE_PRESERVE_ORDER", True),
+        )
+
+    def open_spider(self, spider):
+        if self.workers <= 0:
+            return
+        if self.executor_type == "process":
+            # Spawned rather than forked, as the reactor may already run threads
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_normalize_worker,
+                initargs=(self.country_name, self.description_cleaner),
+            )
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        self.semaphore = defer.DeferredSemaphore(self.max_in_flight)
+        self.previous_item = defer.succeed(None)
+        logging.info(
+            f"Normalizing items in {self.workers} worker {self.executor_type}(es), "
+            f"at most {self.max_in_flight} at a time"
+        )
+
+    def close_spider(self, spider):
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
 
     def process_item(self, item, spider):
+        if self.executor is None:
+            return self.normalize_item(item)
+        if self.preserve_order:
+            return self.semaphore.run(self.submit_in_order, item)
+        return self.semaphore.run(self.submit, item)
+
+    def submit_in_order(self, item):
+        # Each item is passed on once it is normalized and the item before it
+        # has been passed on, whether either of them failed or not. It stays
+        # in flight until then, so the items held back count towards the bound.
+        previous, self.previous_item = self.previous_item, defer.Deferred()
+        passed_on = self.previous_item
+        in_order = defer.Deferred()
+
+        def pass_on(result):
+            if isinstance(result, Failure):
+                in_order.errback(result)
+            else:
+                in_order.callback(result)
+            passed_on.callback(None)
+
+        self.submit(item).addBoth(
+            lambda result: previous.addCallback(lambda _: pass_on(result))
+        )
+        return in_order
+
+    def submit(self, item):
+        from twisted.internet import reactor
+
+        try:
+            if self.executor_type == "process":
+                future = self.executor.submit(normalize_in_worker, item)
+            else:
+                future = self.executor.submit(self.normalize_item, item)
+        except Exception as e:
+            # e.g. a broken pool; failed like the items already in it, from the
+            # reactor loop, rather than synchronously for every waiting item
+            future = Future()
+            future.set_exception(e)
+        normalized = defer.Deferred()
+
+        def resolve(future):
+            if future.exception() is not None:
+                normalized.errback(Failure(future.exception()))
+            else:
+                normalized.callback(future.result())
+
+        future.add_done_callback(lambda future: reactor.callFromThread(resolve, future))
+        return normalized
+
+    def normalize_item(self, item):
         item["title"] = (
             item["title"].strip().replace("\n", "").replace(",", "").strip()
             if item["title"]
@@ -113,12 +281,7 @@ class LinkedinJobSearchPipeline:
         return date.replace(year=year, month=month, day=day)
 
     def normalize_description(self, description):
-        soup = BeautifulSoup(description, "html.parser")
-
-        cleaned_text = soup.get_text(separator=" ", strip=True)
-
-        cleaned_text = " ".join(cleaned_text.split())
-        return cleaned_text
+        return self.clean_description(description)
 
     def normalize_location(self, location):
         location = self.normalize_location_text(location)
@@ -131,13 +294,8 @@ class LinkedinJobSearchPipeline:
         city_match, region_match, country_match = None, None, None
 
         for part in location_parts:
-            city_row = self.cities_and_regions[
-                self.cities_and_regions["city"].str.lower() == part
-            ]
-            if not city_row.empty:
-                city_match = city_row.iloc[0]["city"]
-                region_match = city_row.iloc[0]["region_en"]
-                country_match = city_row.iloc[0]["country"]
+            if part in self.city_index:
+                city_match, region_match, country_match = self.city_index[part]
                 break
 
         # If no city match, check for region match
@@ -145,50 +303,17 @@ class LinkedinJobSearchPipeline:
             num_parts = len(location_parts)
             if num_parts > 3:
                 # Join the middle parts for region match
-                potential_region = " ".join(location_parts[1 : num_parts - 1])
-                region_row = self.cities_and_regions[
-                    (
-                        self.cities_and_regions["region_fi"].str.lower()
-                        == potential_region
-                    )
-                    | (
-                        self.cities_and_regions["region_en"].str.lower()
-                        == potential_region
-                    )
-                ]
-                if not region_row.empty:
-                    city_match = "Unspecified"
-                    region_match = region_row.iloc[0]["region_en"]
-                    country_match = region_row.iloc[0]["country"]
-
+                potential_regions = [" ".join(location_parts[1 : num_parts - 1])]
             elif num_parts == 3:
                 # Join the middle parts for region match
-                potential_region = " ".join(location_parts[: num_parts - 1])
-                region_row = self.cities_and_regions[
-                    (
-                        self.cities_and_regions["region_fi"].str.lower()
-                        == potential_region
-                    )
-                    | (
-                        self.cities_and_regions["region_en"].str.lower()
-                        == potential_region
-                    )
-                ]
-                if not region_row.empty:
-                    city_match = "Unspecified"
-                    region_match = region_row.iloc[0]["region_en"]
-                    country_match = region_row.iloc[0]["country"]
+                potential_regions = [" ".join(location_parts[: num_parts - 1])]
             else:
-                for part in location_parts:
-                    region_row = self.cities_and_regions[
-                        (self.cities_and_regions["region_fi"].str.lower() == part)
-                        | (self.cities_and_regions["region_en"].str.lower() == part)
-                    ]
-                    if not region_row.empty:
-                        city_match = "Unspecified"
-                        region_match = region_row.iloc[0]["region_en"]
-                        country_match = region_row.iloc[0]["country"]
-                        break
+                potential_regions = location_parts
+            for potential_region in potential_regions:
+                if potential_region in self.region_index:
+                    city_match = "Unspecified"
+                    region_match, country_match = self.region_index[potential_region]
+                    break
 
         # If no city or region match, check for country
         if city_match is None and region_match is None:
@@ -203,6 +328,22 @@ class LinkedinJobSearchPipeline:
 
         return city_match, region_match, country_match
 
+    def build_location_index(self, cities_and_regions):
+        # Keyed on the lowercased names; the first row wins on duplicates,
+        # the same row a boolean mask over the table would pick with iloc[0].
+        city_index, region_index = {}, {}
+        for row in cities_and_regions.to_dict("records"):
+            if isinstance(row["city"], str):
+                city_index.setdefault(
+                    row["city"].lower(), (row["city"], row["region_en"], row["country"])
+                )
+            for region_name in (row["region_fi"], row["region_en"]):
+                if isinstance(region_name, str):
+                    region_index.setdefault(
+                        region_name.lower(), (row["region_en"], row["country"])
+                    )
+        return city_index, region_index
+
     def normalize_location_text(self, text):
         if isinstance(text, str):
             text = text.replace("-", " ")
@@ -220,23 +361,80 @@ class LinkedinJobSearchPipeline:
         if job_function_lower in self.alternative_to_field:
             matched_fields.append(self.alternative_to_field[job_function_lower])
         else:
-            for alt, field_name in self.alternative_to_field.items():
-                if alt in job_function_lower and field_name not in matched_fields:
-                    matched_fields.append(field_name)
+            # Sorting the matched indices keeps the fields in the order their
+            # alternatives appear in job_fields_<country>.json.
+            matches = self.alternative_matcher.find_all(job_function_lower)
+            matched_fields = list(
+                dict.fromkeys(
+                    self.alternative_fields[index] for index in sorted(matches)
+                )
+            )
 
         return json.dumps(matched_fields if matched_fields else ["Other"])
 
 
+# The open connection to each database, by (host, port, dbname, user), and
+# the number of pipelines writing through it
+shared_connections = {}
+connection_users = collections.Counter()
+
+
 class PostgresPipeline:
-    def __init__(self):
+    def __init__(
+        self,
+        batch_size=100,
+        flush_interval=30,
+        dead_letter_file=None,
+        duplicate_window_hours=2,
+        stats=None,
+    ):
         secrets = dotenv_values(os.path.join(os.getcwd(), "../../configs/.env"))
         self.user = secrets["POSTGRES_USER"]
         self.password = secrets["POSTGRES_PASSWORD"]
         self.host = secrets["POSTGRES_HOST"]
         self.port = secrets["POSTGRES_PORT"]
         self.dbname = secrets["POSTGRES_DBNAME"]
+        self.conn_key = (self.host, self.port, self.dbname, self.user)
+
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        # process_item only checks the flush interval when an item comes in,
+        # so a slow crawl is flushed on a timer as well
+        self.flush_loop = task.LoopingCall(self.flush)
+        self.dead_letter_file = dead_letter_file
+        self.duplicate_window_hours = duplicate_window_hours
+
+        self.stats = stats
+        self.rows_inserted = 0
+        self.rows_deduplicated = 0
+        self.rows_failed = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            batch_size=crawler.settings.getint("POSTGRES_BATCH_SIZE", 100),
+            flush_interval=crawler.settings.getfloat("POSTGRES_FLUSH_INTERVAL", 30),
+            dead_letter_file=crawler.settings.get("POSTGRES_DEAD_LETTER_FILE"),
+            duplicate_window_hours=crawler.settings.getfloat(
+                "POSTGRES_DUPLICATE_WINDOW_HOURS", 2
+            ),
+            stats=crawler.stats,
+        )
 
     def open_spider(self, spider):
+        self.connect()
+        self.flush_loop.start(self.flush_interval, now=False)
+
+    def connect(self):
+        # The crawlers of one process (see the crawl_countries command) write
+        # through a single connection, which the first of them sets up
+        if self.conn_key in shared_connections:
+            self.conn = shared_connections[self.conn_key]
+            connection_users[self.conn_key] += 1
+            self.cursor = self.conn.cursor()
+            return
         try:
             self.conn = psycopg2.connect(
                 dbname=self.dbname,
@@ -263,72 +461,180 @@ class PostgresPipeline:
                     job_fields TEXT,
                     industries TEXT,
                     description TEXT,
-                    job_url TEXT
+                    job_url TEXT,
+                    stored_at TIMESTAMP DEFAULT LOCALTIMESTAMP
                 );
             """)
 
             self.conn.commit()
+
+            self.migrate_stored_at()
+            self.migrate_unique_job_key()
         except psycopg2.Error as e:
             logging.log(logging.ERROR, f"Failed to connect to PostgreSQL: {e}")
             raise e
+        shared_connections[self.conn_key] = self.conn
+        connection_users[self.conn_key] = 1
+
+    def migrate_stored_at(self):
+        # When each row was inserted, which incremental crawls look known jobs
+        # up by (see KnownJobStore). The rows of tables created before the
+        # column existed are left NULL rather than all given the time of the
+        # migration.
+        self.cursor.execute("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'jobs' AND column_name = 'stored_at';
+        """)
+        if self.cursor.fetchone() is not None:
+            return
+
+        self.cursor.execute("ALTER TABLE jobs ADD COLUMN stored_at TIMESTAMP;")
+        self.cursor.execute(
+            "ALTER TABLE jobs ALTER COLUMN stored_at SET DEFAULT LOCALTIMESTAMP;"
+        )
+        self.conn.commit()
+
+    def migrate_unique_job_key(self):
+        # A job posting is stored once per job URL and posting day. Tables
+        # created before the key existed are deduplicated first, keeping the
+        # earliest inserted row, since the unique index cannot be built over
+        # duplicates.
+        self.cursor.execute("SELECT to_regclass('jobs_job_url_posted_day_key');")
+        if self.cursor.fetchone()[0] is not None:
+            return
+
+        self.cursor.execute("""
+            DELETE FROM jobs later
+            USING jobs earlier
+            WHERE later.ctid > earlier.ctid
+            AND later.job_url = earlier.job_url
+            AND later.date_posted::date = earlier.date_posted::date;
+        """)
+        logging.info(f"Removed {self.cursor.rowcount} duplicate jobs before migration")
+        self.cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS jobs_job_url_posted_day_key
+            ON jobs (job_url, (date_posted::date));
+        """)
+        self.conn.commit()
 
     def close_spider(self, spider):
+        if self.flush_loop.running:
+            self.flush_loop.stop()
         if self.conn:
+            self.flush()
             self.conn.commit()
             self.cursor.close()
-            self.conn.close()
-            logging.log(logging.DEBUG, "Closed PostgreSQL connection")
+            connection_users[self.conn_key] -= 1
+            if connection_users[self.conn_key] <= 0:
+                del connection_users[self.conn_key]
+                if shared_connections.get(self.conn_key) is self.conn:
+                    del shared_connections[self.conn_key]
+                self.conn.close()
+                logging.log(logging.DEBUG, "Closed PostgreSQL connection")
+        logging.info(
+            f"Inserted {self.rows_inserted} jobs, "
+            f"skipped {self.rows_deduplicated} duplicates, "
+            f"failed to insert {self.rows_failed}"
+        )
 
     def process_item(self, item, spider):
-        try:
-            # Calculate the 2-hour cutoff for deduplication
-            two_hours_ago = datetime.datetime.now() - datetime.timedelta(hours=2)
-
-            # Check if the job URL already exists within the past 2 hours
-            self.cursor.execute(
-                """
-                SELECT 1
-                FROM jobs
-                WHERE job_url = %s
-                AND date_posted >= %s
-                LIMIT 1;
-                """,
-                (item["job_url"], two_hours_ago),
-            )
-
-            # If a duplicate exists, skip insertion
-            if self.cursor.fetchone():
-                logging.debug(
-                    f"Duplicate job skipped (same URL within past 2 hours): {item['job_url']}"
-                )
-                return item
-
-            # Insert new job
-            self.cursor.execute(
-                """
-                INSERT INTO jobs (date_posted,title,company,location,city,region,country,seniority_level,employment_type,job_function,job_fields,industries,description,job_url)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """,
-                (
-                    item["date_posted"],
-                    item["title"],
-                    item["company"],
-                    item["location"],
-                    item["city"],
-                    item["region"],
-                    item["country"],
-                    item["seniority_level"],
-                    item["employment_type"],
-                    item["job_function"],
-                    item["job_fields"],
-                    item["industries"],
-                    item["description"],
-                    item["job_url"],
-                ),
-            )
+        self.buffer.append(item)
+        if (
+            len(self.buffer) >= self.batch_size
+            or time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush()
+        return item
 
-            self.conn.commit()
+    def flush(self):
+        items, self.buffer = self.buffer, []
+        self.last_flush = time.monotonic()
+        if not items:
+            return
 
+        rows = [tuple(item[column] for column in JOB_COLUMNS) for item in items]
+        failed = 0
+        try:
+            inserted = self.insert(rows)
         except psycopg2.Error as e:
-            logging.error(f"Error inserting data: {e}")
-        return item
+            self.conn.rollback()
+            logging.error(f"Error inserting a batch of {len(rows)} jobs: {e}")
+            # Row by row, so that only the rows the database rejects are lost
+            inserted = 0
+            for item, row in zip(items, rows):
+                try:
+                    inserted += self.insert([row])
+                except psycopg2.Error as e:
+                    self.conn.rollback()
+                    self.dead_letter(item, e)
+                    failed += 1
+
+        deduplicated = len(rows) - inserted - failed
+        if deduplicated:
+            logging.debug(f"Duplicate jobs skipped: {deduplicated}")
+        self.rows_inserted += inserted
+        self.rows_deduplicated += deduplicated
+        if self.stats is not None:
+            self.stats.inc_value("postgres/rows_inserted", inserted)
+            self.stats.inc_value("postgres/rows_deduplicated", deduplicated)
+
+    def insert(self, rows):
+        """Insert rows in one transaction, returning how many were inserted."""
+        # Duplicates (same job URL on the same posting day), whether already
+        # stored or repeated within the batch, are left to the unique index to
+        # reject. A job posted "N hours ago" is dated when it is scraped, so
+        # the same posting scraped on both sides of midnight gets two posting
+        # days; a stored row of the job URL dated within
+        # duplicate_window_hours of the new one rejects it as well.
+        columns = ",".join(JOB_COLUMNS)
+        # The VALUES of execute_values are text, cast back to the column types
+        values = ",".join(
+            (
+                f"batch.{column}::timestamp"
+                if column == "date_posted"
+                else f"batch.{column}"
+            )
+            for column in JOB_COLUMNS
+        )
+        window = f"INTERVAL '{float(self.duplicate_window_hours)} hours'"
+        inserted = execute_values(
+            self.cursor,
+            f"""
+            INSERT INTO jobs ({columns})
+            SELECT {values} FROM (VALUES %s) AS batch ({columns})
+            WHERE NOT EXISTS (
+                SELECT 1 FROM jobs
+                WHERE jobs.job_url = batch.job_url
+                AND jobs.date_posted
+                BETWEEN batch.date_posted::timestamp - {window}
+                AND batch.date_posted::timestamp + {window}
+            )
+            ON CONFLICT (job_url, (date_posted::date)) DO NOTHING
+            RETURNING 1
+            """,
+            rows,
+            page_size=len(rows),
+            fetch=True,
+        )
+        self.conn.commit()
+        return len(inserted)
+
+    def dead_letter(self, item, error):
+        """Record an item the database rejected, in dead_letter_file if set."""
+        logging.error(f"Failed to insert {item['job_url']}: {error}")
+        self.rows_failed += 1
+        if self.stats is not None:
+            self.stats.inc_value("postgres/rows_failed")
+        if self.dead_letter_file:
+            with open(self.dead_letter_file, "a") as file:
+                file.write(
+                    json.dumps(
+                        {
+                            **{column: item[column] for column in JOB_COLUMNS},
+                            "error": str(error).strip(),
+                            "failed_at": datetime.datetime.now().isoformat(),
+                        },
+                        default=str,
+                    )
+                    + "\n"
+                )
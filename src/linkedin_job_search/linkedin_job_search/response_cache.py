@@ -0,0 +1,207 @@
+import logging
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+from urllib.parse import urlsplit, urlunsplit
+
+from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
+from scrapy.exceptions import NotConfigured
+from scrapy.extensions.httpcache import DummyPolicy, rfc1123_to_epoch
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
+
+from linkedin_job_search.retry_budget import ATTEMPTS_META_KEY
+
+
+def normalize_job_url(url):
+    """
+    The job URL the cache keys a job page by: on www.linkedin.com, without
+    its query, fragment or trailing slash, as the same job is linked from
+    country subdomains and with tracking parameters.
+    """
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.endswith(".linkedin.com"):
+        host = "www.linkedin.com"
+    return urlunsplit(("https", host, parts.path.rstrip("/"), "", ""))
+
+
+def cache_key(request):
+    if "job_url" in request.meta:
+        return normalize_job_url(request.meta["job_url"])
+    return request.url
+
+
+class SqliteCacheStorage:
+    """
+    Cached responses in a single SQLite file, each compressed with zlib,
+    keyed by normalized job URL for the job pages and by URL otherwise.
+
+    Once the responses take up more than max_mb megabytes, the least
+    recently used are deleted until they take up less than nine tenths of
+    that. Several crawlers of one process, as with crawl_countries, can share
+    the file.
+    """
+
+    def __init__(self, settings):
+        self.path = data_path(settings.get("RESPONSE_CACHE_FILE", "responses.sqlite3"))
+        self.max_size = settings.getfloat("RESPONSE_CACHE_MAX_MB", 500) * 1024 * 1024
+        self.connection = None
+        self.total_size = 0
+
+    def open_spider(self, spider):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(self.path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            """)
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at "
+            "ON responses (accessed_at);"
+        )
+        self.total_size = self.stored_size()
+        logging.info(
+            f"Response cache {self.path}: {self.total_size / 1024 / 1024:.1f} MB"
+        )
+
+    def close_spider(self, spider):
+        self.connection.close()
+
+    def stored_size(self):
+        (size,) = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses;"
+        ).fetchone()
+        return size
+
+    def retrieve_response(self, spider, request):
+        key = cache_key(request)
+        row = self.connection.execute(
+            "SELECT data FROM responses WHERE key = ?;", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.connection.execute(
+            "UPDATE responses SET accessed_at = ? WHERE key = ?;", (time.time(), key)
+        )
+        data = pickle.loads(zlib.decompress(row[0]))
+        headers = Headers(data["headers"])
+        respcls = responsetypes.from_args(
+            headers=headers, url=data["url"], body=data["body"]
+        )
+        return respcls(
+            url=data["url"], headers=headers, status=data["status"], body=data["body"]
+        )
+
+    def store_response(self, spider, request, response):
+        data = zlib.compress(
+            pickle.dumps(
+                {
+                    "status": response.status,
+                    "url": response.url,
+                    "headers": dict(response.headers),
+                    "body": response.body,
+                },
+                protocol=4,
+            )
+        )
+        self.connection.execute(
+            "INSERT OR REPLACE INTO responses (key, data, size, accessed_at) "
+            "VALUES (?, ?, ?, ?);",
+            (cache_key(request), data, len(data), time.time()),
+        )
+        self.total_size += len(data)
+        if self.total_size > self.max_size:
+            # The other crawlers sharing the file store responses as well
+            self.total_size = self.stored_size()
+            if self.total_size > self.max_size:
+                self.evict(self.total_size - 0.9 * self.max_size)
+
+    def evict(self, size):
+        """Delete the least recently used responses, at least size bytes."""
+        keys, evicted = [], 0
+        for key, entry_size in self.connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at;"
+        ):
+            if evicted >= size:
+                break
+            keys.append((key,))
+            evicted += entry_size
+        self.connection.executemany("DELETE FROM responses WHERE key = ?;", keys)
+        self.total_size -= evicted
+        logging.debug(f"Evicted {len(keys)} responses from the response cache")
+
+
+class JobPagePolicy(DummyPolicy):
+    """
+    Caches the job pages, and the listing pages with
+    RESPONSE_CACHE_LISTINGS, unless they came back behind the login wall.
+
+    A cached page is used as is for RESPONSE_CACHE_TTL seconds after the date
+    it was downloaded (forever with 0). Then it is revalidated with a
+    conditional request if the server sent an ETag or a Last-Modified
+    header, and kept if it answers 304 Not Modified, or downloaded again
+    otherwise. The pages the spider retries are always downloaded again, as
+    the page it was given did not have its content.
+    """
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.ttl = settings.getfloat("RESPONSE_CACHE_TTL", 86400)
+        self.cache_listings = settings.getbool("RESPONSE_CACHE_LISTINGS")
+
+    def should_cache_request(self, request):
+        if "job_url" not in request.meta and not self.cache_listings:
+            return False
+        return super().should_cache_request(request)
+
+    def should_cache_response(self, response, request):
+        return response.status == 200 and b"Join LinkedIn" not in response.body
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        if ATTEMPTS_META_KEY in request.meta:
+            return False
+        if not self.ttl:
+            return True
+        date = rfc1123_to_epoch(cachedresponse.headers.get(b"Date"))
+        if date is not None and time.time() - date < self.ttl:
+            return True
+        etag = cachedresponse.headers.get(b"ETag")
+        if etag:
+            request.headers[b"If-None-Match"] = etag
+        last_modified = cachedresponse.headers.get(b"Last-Modified")
+        if last_modified:
+            request.headers[b"If-Modified-Since"] = last_modified
+        return False
+
+    def is_cached_response_valid(self, cachedresponse, response, request):
+        return response.status == 304
+
+
+class ResponseCacheMiddleware(HttpCacheMiddleware):
+    """
+    Scrapy's HTTP cache with the JobPagePolicy and SqliteCacheStorage above,
+    enabled with RESPONSE_CACHE_ENABLED so that HTTPCACHE_ENABLED still turns
+    on the plain HTTP cache that benchmarks.parse_replay replays. It comes
+    after HttpCompressionMiddleware, so the responses it stores and checks
+    for the login wall are decompressed. With RESPONSE_CACHE_IGNORE_MISSING,
+    the cacheable pages missing from the cache are not downloaded, to re-run
+    a crawl offline.
+    """
+
+    def __init__(self, settings, stats):
+        if not settings.getbool("RESPONSE_CACHE_ENABLED"):
+            raise NotConfigured
+        self.policy = JobPagePolicy(settings)
+        self.storage = SqliteCacheStorage(settings)
+        self.ignore_missing = settings.getbool("RESPONSE_CACHE_IGNORE_MISSING")
+        self.stats = stats
@@ -0,0 +1,96 @@
+import datetime
+import json
+import logging
+import random
+
+# The request meta the retries are counted and delayed with. Distinct from
+# Scrapy's retry_times, which RetryMiddleware counts download errors with.
+ATTEMPTS_META_KEY = "page_retry_attempts"
+DELAY_META_KEY = "page_retry_delay"
+
+
+class RetryBudget:
+    """
+    The retries of the pages that came back without their content: the login
+    wall, an empty listing or a job page without a title.
+
+    Each URL is retried at most max_retries times, the number of retries so
+    far travelling with the request in its meta. The n-th retry waits for
+    a random delay between half and all of base_delay * 2 ** (n - 1) seconds,
+    capped at max_delay, which RetryBackoffDownloaderMiddleware holds the
+    request back for. Once its retries are spent, the request is given up on
+    and recorded in dead_letters, and appended to dead_letter_file as a JSON
+    line if set. Retries and dead letters are counted per reason with
+    inc_stat, the spider's, under page_retry/.
+    """
+
+    def __init__(
+        self,
+        max_retries=8,
+        base_delay=5.0,
+        max_delay=300.0,
+        dead_letter_file=None,
+        inc_stat=None,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.dead_letter_file = dead_letter_file
+        self.inc_stat = inc_stat or (lambda key: None)
+        self.dead_letters = []
+
+    @classmethod
+    def from_settings(cls, settings, inc_stat=None):
+        return cls(
+            max_retries=settings.getint("PAGE_RETRY_TIMES", 8),
+            base_delay=settings.getfloat("PAGE_RETRY_BACKOFF_BASE", 5.0),
+            max_delay=settings.getfloat("PAGE_RETRY_BACKOFF_MAX", 300.0),
+            dead_letter_file=settings.get("PAGE_RETRY_DEAD_LETTER_FILE"),
+            inc_stat=inc_stat,
+        )
+
+    def backoff(self, retries):
+        delay = min(self.max_delay, self.base_delay * 2 ** (retries - 1))
+        return random.uniform(delay / 2, delay)
+
+    def retry(self, response, request, reason):
+        """
+        The request to fetch the page of response again with, delayed by the
+        backoff of its retry, or None if the page was given up on.
+
+        Args:
+        response (scrapy.http.Response): The page that came back without its
+            content.
+        request (scrapy.Request): The request to retry it with.
+        reason (str): Why it is retried, e.g. "login_wall".
+        """
+        retries = response.meta.get(ATTEMPTS_META_KEY, 0) + 1
+        if retries > self.max_retries:
+            self.dead_letter(response, reason, retries - 1)
+            return None
+        request.meta[ATTEMPTS_META_KEY] = retries
+        request.meta[DELAY_META_KEY] = self.backoff(retries)
+        self.inc_stat("page_retry/count")
+        self.inc_stat(f"page_retry/reason_count/{reason}")
+        logging.debug(
+            f"Retrying {response.url} ({reason}), retry {retries} of "
+            f"{self.max_retries} in {request.meta[DELAY_META_KEY]:.1f}s"
+        )
+        return request
+
+    def dead_letter(self, response, reason, retries):
+        logging.warning(
+            f"Giving up on {response.url} ({reason}) after {retries} retries"
+        )
+        self.inc_stat("page_retry/dead_letter_count")
+        self.inc_stat(f"page_retry/dead_letter/{reason}")
+        dead_letter = {
+            "url": response.url,
+            "reason": reason,
+            "retries": retries,
+            "given_up_at": datetime.datetime.now().isoformat(),
+        }
+        self.dead_letters.append(dead_letter)
+        if self.dead_letter_file:
+            with open(self.dead_letter_file, "a") as file:
+                file.write(json.dumps(dead_letter) + "\n")
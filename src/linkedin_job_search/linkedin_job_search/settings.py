@@ -4,6 +4,7 @@ BOT_NAME = "linkedin_job_search"
 
 SPIDER_MODULES = ["linkedin_job_search.spiders"]
 NEWSPIDER_MODULE = "linkedin_job_search.spiders"
+COMMANDS_MODULE = "linkedin_job_search.commands"
 
 ROBOTSTXT_OBEY = False
 
@@ -19,7 +20,12 @@ SPIDER_MIDDLEWARES = {
 }
 
 DOWNLOADER_MIDDLEWARES = {
-    "linkedin_job_search.middlewares.LinkedinJobSearchDownloaderMiddleware": 543,
+    # After RetryMiddleware (550), so that it sees the 429 responses before
+    # they are retried
+    "linkedin_job_search.middlewares.LinkedinJobSearchDownloaderMiddleware": 560,
+    # Before HttpCompressionMiddleware (590), so that it caches decompressed pages
+    "linkedin_job_search.response_cache.ResponseCacheMiddleware": 580,
+    "linkedin_job_search.middlewares.RetryBackoffDownloaderMiddleware": 545,
 }
 
 ITEM_PIPELINES = {
@@ -27,6 +33,103 @@ ITEM_PIPELINES = {
     "linkedin_job_search.pipelines.PostgresPipeline": 400,
 }
 
+# PostgresPipeline buffers items and writes them in one transaction per batch,
+# once POSTGRES_BATCH_SIZE items are buffered or POSTGRES_FLUSH_INTERVAL
+# seconds have passed since the last write, and on spider close. A batch the
+# database rejects is written again row by row, and the rows it still rejects
+# are counted as postgres/rows_failed and appended to POSTGRES_DEAD_LETTER_FILE
+# as JSON lines, if set.
+POSTGRES_BATCH_SIZE = 100
+POSTGRES_FLUSH_INTERVAL = 30
+POSTGRES_DEAD_LETTER_FILE = None
+
+# A job is stored once per job URL and posting day, and not again when its URL
+# was stored with a date_posted within POSTGRES_DUPLICATE_WINDOW_HOURS of it, as
+# the same posting scraped on both sides of midnight is dated on two days.
+POSTGRES_DUPLICATE_WINDOW_HOURS = 2
+
+# How LinkedinJobSearchPipeline turns the HTML job descriptions into text:
+# "beautifulsoup", "lxml" or "tokenizer" (see description_cleaners.py). All
+# three give the same text for the descriptions parse_job serializes.
+DESCRIPTION_CLEANER = "lxml"
+
+# With NORMALIZE_WORKERS > 0, LinkedinJobSearchPipeline normalizes items in
+# that many worker processes ("process") or threads ("thread") instead of the
+# reactor thread. At most NORMALIZE_MAX_IN_FLIGHT items (default: 4 per worker)
+# are in the pool or held back at a time; with NORMALIZE_PRESERVE_ORDER, items
+# reach PostgresPipeline in the order they were scraped.
+NORMALIZE_WORKERS = 0
+NORMALIZE_EXECUTOR = "process"
+NORMALIZE_MAX_IN_FLIGHT = 0
+NORMALIZE_PRESERVE_ORDER = True
+
+# Incremental crawls skip job detail pages whose URL was already stored within
+# the last INCREMENTAL_LOOKBACK_HOURS hours, however long ago the job was
+# posted. Known URLs are read from
+# PostgreSQL, or from INCREMENTAL_STATE_FILE (a local file the spider keeps
+# up to date) when it is set.
+INCREMENTAL_CRAWL = False
+INCREMENTAL_LOOKBACK_HOURS = 24
+INCREMENTAL_STATE_FILE = None
+
+# With LISTING_WINDOW > 1, the spider requests that many listing pages at once,
+# LISTING_PAGE_SIZE results apart, instead of one after the other (see
+# JobScraperSpider.start_requests). The page size must not exceed the number of
+# jobs LinkedIn returns per page, or jobs between the pages are missed.
+LISTING_WINDOW = 1
+LISTING_PAGE_SIZE = 10
+
+# Pages that come back behind the login wall, empty or without a job title are
+# retried at most PAGE_RETRY_TIMES times per URL, the n-th retry after a random
+# delay between half and all of PAGE_RETRY_BACKOFF_BASE * 2 ** (n - 1) seconds,
+# capped at PAGE_RETRY_BACKOFF_MAX (see RetryBudget). The pages given up on are
+# appended to PAGE_RETRY_DEAD_LETTER_FILE, when it is set.
+PAGE_RETRY_TIMES = 8
+PAGE_RETRY_BACKOFF_BASE = 5
+PAGE_RETRY_BACKOFF_MAX = 300
+PAGE_RETRY_DEAD_LETTER_FILE = None
+
+# The serial listing polls its last, empty page until the jobs it listed are
+# scraped, the n-th poll after LISTING_END_POLL_DELAY * 2 ** (n - 1) seconds,
+# capped at LISTING_END_POLL_MAX_DELAY, and stops once the polls would have
+# waited LISTING_END_POLL_MAX_WAIT seconds in all. These polls are not
+# PAGE_RETRY retries.
+LISTING_END_POLL_DELAY = 5
+LISTING_END_POLL_MAX_DELAY = 60
+LISTING_END_POLL_MAX_WAIT = 600
+
+# With ADAPTIVE_CONCURRENCY_ENABLED, LinkedinJobSearchDownloaderMiddleware adapts
+# the delay and concurrency of each domain to its responses (see AimdRate),
+# starting from DOWNLOAD_DELAY. The rate grows by ADAPTIVE_CONCURRENCY_RATE_INCREASE
+# requests per second with every normal response, up to one request every
+# ADAPTIVE_CONCURRENCY_MIN_DELAY seconds, and is multiplied by
+# ADAPTIVE_CONCURRENCY_DECREASE_FACTOR by a 429 or 999 response, a download error,
+# a smoothed latency above ADAPTIVE_CONCURRENCY_TARGET_LATENCY, or a login wall
+# while more than ADAPTIVE_CONCURRENCY_LOGIN_WALL_THRESHOLD of the responses are,
+# down to one request every ADAPTIVE_CONCURRENCY_MAX_DELAY seconds. Not to be
+# combined with AutoThrottle, which sets the same delays.
+ADAPTIVE_CONCURRENCY_ENABLED = False
+ADAPTIVE_CONCURRENCY_MIN_DELAY = 1
+ADAPTIVE_CONCURRENCY_MAX_DELAY = 60
+ADAPTIVE_CONCURRENCY_MAX_CONCURRENCY = 8
+ADAPTIVE_CONCURRENCY_RATE_INCREASE = 0.02
+ADAPTIVE_CONCURRENCY_DECREASE_FACTOR = 0.5
+ADAPTIVE_CONCURRENCY_TARGET_LATENCY = 5
+ADAPTIVE_CONCURRENCY_LOGIN_WALL_THRESHOLD = 0.15
+
+# With RESPONSE_CACHE_ENABLED, job pages are cached in RESPONSE_CACHE_FILE (an
+# SQLite file under .scrapy/), keyed by normalized job URL, and served from it
+# for RESPONSE_CACHE_TTL seconds (forever with 0), then revalidated. Listing
+# pages are cached as well with RESPONSE_CACHE_LISTINGS. The least recently used
+# pages are evicted once the cache takes up more than RESPONSE_CACHE_MAX_MB. With
+# RESPONSE_CACHE_IGNORE_MISSING, pages missing from the cache are not downloaded.
+RESPONSE_CACHE_ENABLED = False
+RESPONSE_CACHE_FILE = "responses.sqlite3"
+RESPONSE_CACHE_TTL = 86400
+RESPONSE_CACHE_MAX_MB = 500
+RESPONSE_CACHE_LISTINGS = False
+RESPONSE_CACHE_IGNORE_MISSING = False
+
 REQUEST_FINGERPRINTER_IMPLEMENTATION = "2.7"
 TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
 FEED_EXPORT_ENCODING = "utf-8"
@@ -1,8 +1,82 @@
 import json
 import logging
 import os
+import pickle
+import shutil
+import time
 
 import scrapy
+from lxml import etree
+from scrapy import signals
+from scrapy.extensions.spiderstate import SpiderState
+from scrapy.utils.job import job_dir
+
+from linkedin_job_search.known_jobs import KnownJobStore
+from linkedin_job_search.retry_budget import DELAY_META_KEY, RetryBudget
+
+# The fields of a job page, compiled once and evaluated on the lxml tree of
+# every response. The top card and the job criteria list are located once per
+# page and the fields are looked up relative to them.
+CORE_RAIL = './/main/section[contains(@class, "core-rail")]'
+TOP_CARD_XPATH = etree.XPath(
+    CORE_RAIL + '/div/section[contains(@class, "top-card-layout")]'
+    '/div/div[contains(@class, "entity-info-container")]/div'
+)
+TITLE_XPATH = etree.XPath("h1/text()", smart_strings=False)
+COMPANY_XPATH = etree.XPath(
+    'h4/div[1]/span[@class="topcard__flavor"]/a/text()', smart_strings=False
+)
+LOCATION_XPATH = etree.XPath(
+    'h4/div[1]/span[contains(@class, "bullet")]/text()', smart_strings=False
+)
+TIME_AGO_XPATH = etree.XPath(
+    'h4/div[2]/span[contains(@class, "posted-time-ago")]/text()', smart_strings=False
+)
+JOB_CRITERIA_XPATH = etree.XPath(
+    CORE_RAIL + '/div/div[contains(@class, "details")]'
+    '/section[contains(@class, "description")]/div/ul'
+)
+SENIORITY_LEVEL_XPATH = etree.XPath("li[1]/span/text()", smart_strings=False)
+EMPLOYMENT_TYPE_XPATH = etree.XPath("li[2]/span/text()", smart_strings=False)
+JOB_FUNCTION_XPATH = etree.XPath("li[3]/span/text()", smart_strings=False)
+INDUSTRIES_XPATH = etree.XPath("li[4]/span/text()", smart_strings=False)
+DESCRIPTION_XPATH = etree.XPath(
+    CORE_RAIL + '/div[contains(@class, "details")]/div[contains(@class, "details")]'
+    '/section[contains(@class, "description")]'
+    '/div[contains(@class, "core-section-container")]'
+    '/div[contains(@class, "description")]/section/div'
+)
+
+
+def first_match(xpath, containers):
+    """The first result of xpath in any of the containers, in document order, or
+    None, like Selector.xpath(...).get() on the whole path."""
+    for container in containers:
+        results = xpath(container)
+        if results:
+            return results[0]
+    return None
+
+
+# What the spider keeps in its JOBDIR state when a crawl is interrupted, to
+# resume from there along with the requests of the scheduler's queue
+FRONTIER_ATTRIBUTES = (
+    "counter",
+    "counter_job_based_on_scraped",
+    "next_listing_start",
+    "listing_exhausted",
+    "requested_job_urls",
+    "started_at",
+)
+
+# What the scheduler and the duplicate filter keep in JOBDIR, discarded with
+# a frontier that is not to be resumed
+JOBDIR_QUEUE_FILES = ("requests.queue", "requests.seen")
+
+# The request meta the polls of the end of the serial listing, and the seconds
+# they have waited in all, are counted with
+LISTING_POLLS_META_KEY = "listing_end_polls"
+LISTING_WAITED_META_KEY = "listing_end_waited"
 
 
 class JobScraperSpider(scrapy.Spider):
@@ -48,45 +122,263 @@ class JobScraperSpider(scrapy.Spider):
 
         self.user_agent = self.config.get("user_agent", "default-user-agent")
 
-        self.base_url = f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords=&location={self.country_name}&geoId={self.geo_id}&f_TPR={self.period_code}&trk=public_jobs_jobs-search-bar_search-submit&start={self.counter}&original_referer="
+        self.base_url = self.listing_url(self.counter)
         self.next_page_url_job_listing = self.base_url
 
+        self.known_job_store = None
+        self.known_job_urls = set()
+
+        # The listing window, see start_requests
+        self.next_listing_start = 0
+        self.listing_exhausted = False
+        self.requested_job_urls = set()
+        # When the crawl started, kept by a resumed crawl
+        self.started_at = time.time()
+
+        # Replaced by one configured from the settings in from_crawler
+        self.retry_budget = RetryBudget(inc_stat=self.inc_stat)
+        # The end of the serial listing is polled after these delays, see
+        # poll_end_of_listing; also set from the settings in from_crawler
+        self.listing_poll_delay = 5.0
+        self.listing_poll_max_delay = 60.0
+        self.listing_poll_max_wait = 600.0
+
+    def listing_url(self, start):
+        return f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords=&location={self.country_name}&geoId={self.geo_id}&f_TPR={self.period_code}&trk=public_jobs_jobs-search-bar_search-submit&start={start}&original_referer="
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.retry_budget = RetryBudget.from_settings(
+            crawler.settings, inc_stat=spider.inc_stat
+        )
+        spider.listing_poll_delay = crawler.settings.getfloat(
+            "LISTING_END_POLL_DELAY", 5.0
+        )
+        spider.listing_poll_max_delay = crawler.settings.getfloat(
+            "LISTING_END_POLL_MAX_DELAY", 60.0
+        )
+        spider.listing_poll_max_wait = crawler.settings.getfloat(
+            "LISTING_END_POLL_MAX_WAIT", 600.0
+        )
+        crawler.signals.connect(spider.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(spider.spider_closed, signal=signals.spider_closed)
+        jobdir = job_dir(crawler.settings)
+        if jobdir:
+            # Before the scheduler opens the queue kept in JOBDIR
+            spider.discard_stale_frontier(jobdir)
+        return spider
+
+    def period_seconds(self):
+        """The length of the period's time window, or None for any_time."""
+        return int(self.period_code[1:]) if self.period_code else None
+
+    def spider_opened(self, spider):
+        if self.settings.getbool("INCREMENTAL_CRAWL"):
+            self.known_job_store = KnownJobStore(
+                state_file=self.settings.get("INCREMENTAL_STATE_FILE"),
+                lookback_hours=self.settings.getfloat("INCREMENTAL_LOOKBACK_HOURS", 24),
+            )
+            self.known_job_urls = self.known_job_store.load()
+
+    def spider_closed(self, spider, reason="finished"):
+        if self.known_job_store:
+            self.known_job_store.save()
+        # spider.state only exists with JOBDIR set, and is saved there once the
+        # spider_closed handlers of the spider have run
+        if hasattr(self, "state"):
+            self.save_frontier(reason)
+
+    def save_frontier(self, reason):
+        """
+        Keep in the spider state what an interrupted crawl needs to resume.
+
+        The requests not sent yet are kept in JOBDIR by the scheduler, and
+        the spider is only closed once the responses of those already sent
+        have been parsed, so with the counters and the listing offset the
+        crawl resumes without downloading any page twice. A crawl that
+        finished has nothing to resume, and the next run starts from the
+        first listing page.
+        """
+        if reason == "finished":
+            self.state.pop("frontier", None)
+            return
+        self.state["frontier"] = {
+            "country": self.country_name,
+            "period": self.period,
+            **{name: getattr(self, name) for name in FRONTIER_ATTRIBUTES},
+        }
+        logging.info(
+            f"Crawl closed ({reason}) after {self.counter} listed jobs, "
+            "saved to resume"
+        )
+
+    def stale_frontier_reason(self, frontier):
+        """
+        Why the frontier of an interrupted crawl is not to be resumed, or None.
+
+        It is resumed by a crawl of the same country and period only, and
+        while it started within the period's time window: after that, the
+        listing offsets it kept have been pushed down by the postings newer
+        than the window, which the listing starting over from its first page
+        gets instead.
+        """
+        crawled = (frontier.get("country"), frontier.get("period"))
+        if crawled != (self.country_name, self.period):
+            return f"it crawled {crawled[0]} for {crawled[1]}"
+        age = time.time() - frontier.get("started_at", 0)
+        window = self.period_seconds()
+        if window is not None and age > window:
+            return f"it started {age / 60:.0f} minutes ago, before the {self.period} window"
+        return None
+
+    def discard_stale_frontier(self, jobdir):
+        """
+        Start over when the crawl interrupted in jobdir is not to be resumed,
+        see stale_frontier_reason: its spider state and the requests the
+        scheduler kept are deleted before they are loaded.
+        """
+        state_file = SpiderState(jobdir).statefn
+        if not os.path.exists(state_file):
+            return
+        with open(state_file, "rb") as f:
+            frontier = pickle.load(f).get("frontier")
+        if not frontier:
+            return
+        reason = self.stale_frontier_reason(frontier)
+        if reason is None:
+            return
+        logging.warning(f"Not resuming the crawl in {jobdir}, as {reason}")
+        os.remove(state_file)
+        for name in JOBDIR_QUEUE_FILES:
+            path = os.path.join(jobdir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+
+    def resume_frontier(self, frontier):
+        for name in FRONTIER_ATTRIBUTES:
+            setattr(self, name, frontier[name])
+        self.listing_page_size = self.settings.getint("LISTING_PAGE_SIZE", 10)
+        logging.info(f"Resuming the crawl after {self.counter} listed jobs")
+        self.inc_stat("frontier/resumed_crawls")
+
+    def inc_stat(self, key, count=1):
+        crawler = getattr(self, "crawler", None)
+        if crawler is not None:
+            crawler.stats.inc_value(key, count)
+
     def start_requests(self):
+        # With JOBDIR set, an interrupted crawl resumes where it was closed:
+        # its pending requests come back from the scheduler's queue in JOBDIR,
+        # so the listing does not start over from the first page.
+        frontier = getattr(self, "state", {}).get("frontier")
+        if frontier:
+            self.resume_frontier(frontier)
+            return
+        # By default each listing page is requested once the previous one has
+        # been parsed. With LISTING_WINDOW > 1, that many pages, at offsets
+        # LISTING_PAGE_SIZE apart, are requested at once, and every non-empty
+        # page requests the next offset, until a page comes back empty.
+        listing_window = self.settings.getint("LISTING_WINDOW", 1)
+        if listing_window > 1:
+            self.listing_page_size = self.settings.getint("LISTING_PAGE_SIZE", 10)
+            for _ in range(listing_window):
+                yield self.next_listing_request()
+            return
         yield scrapy.Request(
             url=self.base_url,
             callback=self.parse,
             headers={"User-Agent": self.user_agent},
+            # Not filtered by the fingerprints of earlier runs kept in JOBDIR
+            dont_filter=True,
             meta={"url": self.base_url},
         )
 
-    def parse(self, response):
-        if self.counter == 0 and "Join LinkedIn" in response.text:
-            logging.log(logging.DEBUG, "LOGIN PROMPT DETECTED, RETRYING")
+    def next_listing_request(self):
+        start = self.next_listing_start
+        self.next_listing_start += self.listing_page_size
+        url = self.listing_url(start)
+        return scrapy.Request(
+            url=url,
+            callback=self.parse_listing_window,
+            headers={"User-Agent": self.user_agent},
+            dont_filter=True,
+            meta={"url": url, "start": start},
+        )
+
+    def parse_listing_window(self, response):
+        start = response.meta["start"]
+        urls = response.xpath("//li/div/a/@href").getall()
+        if "Join LinkedIn" in response.text or (len(urls) == 0 and start == 0):
+            logging.log(
+                logging.DEBUG, f"LISTING PAGE AT {start} DID NOT LOAD, RETRYING"
+            )
+            retry = self.retry_budget.retry(
+                response,
+                response.request.replace(dont_filter=True),
+                "login_wall" if "Join LinkedIn" in response.text else "empty_listing",
+            )
+            if retry:
+                yield retry
+            return
+        if len(urls) == 0:
+            # The end of the results; the pages still in flight beyond it come
+            # back empty as well
+            logging.log(logging.DEBUG, f"NO MORE JOBS AFTER {start}")
+            self.listing_exhausted = True
+            return
+
+        self.counter += len(urls)
+        for url in urls:
+            url = url[: url.find("?position")]
+            if url in self.known_job_urls:
+                self.counter_job_based_on_scraped += 1
+                self.inc_stat("incremental/skipped_job_requests")
+                continue
+            if url in self.requested_job_urls:
+                # Listed again by an overlapping page, as new postings push the
+                # results down; counted as scraped like the known URLs above.
+                self.counter_job_based_on_scraped += 1
+                self.inc_stat("listing/duplicate_job_urls")
+                continue
+            self.requested_job_urls.add(url)
             yield response.follow(
-                url=response.meta["url"],
-                callback=self.parse,
+                url=url,
+                callback=self.parse_job,
+                errback=self.job_failed,
                 headers={"User-Agent": self.user_agent},
                 dont_filter=True,
-                meta={"url": response.meta["url"]},
+                meta={"job_url": url},
             )
+
+        if not self.listing_exhausted:
+            yield self.next_listing_request()
+
+    def parse(self, response):
+        if self.counter == 0 and "Join LinkedIn" in response.text:
+            logging.log(logging.DEBUG, "LOGIN PROMPT DETECTED, RETRYING")
+            yield from self.retry_listing(response, "login_wall")
             return
         urls = response.xpath("//li/div/a/@href").getall()
         if len(urls) == 0 and self.counter == 0:
             logging.log(logging.DEBUG, "PAGE DID NOT LOAD CORRECTLY, RETRYING")
-            yield response.follow(
-                url=response.meta["url"],
-                callback=self.parse,
-                headers={"User-Agent": self.user_agent},
-                dont_filter=True,
-                meta={"url": response.meta["url"]},
-            )
+            yield from self.retry_listing(response, "empty_listing")
             return
         for url in urls:
             try:
                 url = url[: url.find("?position")]
+                if url in self.known_job_urls:
+                    # Already stored by an earlier run; count it as scraped so
+                    # the end-of-listing check below still adds up.
+                    self.counter_job_based_on_scraped += 1
+                    self.inc_stat("incremental/skipped_job_requests")
+                    continue
                 yield response.follow(
                     url=url,
                     callback=self.parse_job,
+                    errback=self.job_failed,
                     headers={"User-Agent": self.user_agent},
                     dont_filter=True,
                     meta={"job_url": url},
@@ -96,11 +388,17 @@ class JobScraperSpider(scrapy.Spider):
 
         self.counter += len(urls)
 
-        self.next_page_url_job_listing = f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords=&location={self.country_name}&geoId={self.geo_id}&f_TPR={self.period_code}&trk=public_jobs_jobs-search-bar_search-submit&start={self.counter}&original_referer="
+        self.next_page_url_job_listing = self.listing_url(self.counter)
 
-        if self.next_page_url_job_listing and not (
-            len(urls) == 0 and self.counter == self.counter_job_based_on_scraped
-        ):
+        if len(urls) == 0:
+            if self.counter != self.counter_job_based_on_scraped:
+                # The same page again, until the jobs listed so far are scraped
+                poll = self.poll_end_of_listing(response)
+                if poll:
+                    yield poll
+            return
+
+        if self.next_page_url_job_listing:
             try:
                 yield response.follow(
                     url=self.next_page_url_job_listing,
@@ -112,48 +410,115 @@ class JobScraperSpider(scrapy.Spider):
             except:
                 logging.log(logging.DEBUG, "SOMETHING HAS GONE WRONG")
 
+    def retry_listing(self, response, reason):
+        # The page at the current offset; meta["url"] is the first page's
+        retry = self.retry_budget.retry(
+            response,
+            response.follow(
+                url=self.listing_url(self.counter),
+                callback=self.parse,
+                headers={"User-Agent": self.user_agent},
+                dont_filter=True,
+                meta={"url": response.meta["url"]},
+            ),
+            reason,
+        )
+        if retry:
+            yield retry
+
+    def poll_end_of_listing(self, response):
+        # The end of the listing is expected to come back empty, so it is not
+        # retried through the RetryBudget, which would give up on it and stop
+        # watching the listing. Each poll waits twice as long as the previous
+        # one, up to listing_poll_max_delay, until a page lists jobs again or
+        # the polls have waited listing_poll_max_wait seconds in all.
+        polls = response.meta.get(LISTING_POLLS_META_KEY, 0) + 1
+        waited = response.meta.get(LISTING_WAITED_META_KEY, 0)
+        delay = min(
+            self.listing_poll_max_delay, self.listing_poll_delay * 2 ** (polls - 1)
+        )
+        if waited + delay > self.listing_poll_max_wait:
+            logging.info(
+                f"Stopped polling the end of the listing at {self.counter} after "
+                f"{waited:.0f}s, with {self.counter - self.counter_job_based_on_scraped}"
+                " listed jobs not scraped"
+            )
+            self.inc_stat("listing/end_poll_stopped")
+            return None
+        self.inc_stat("listing/end_polls")
+        logging.log(
+            logging.DEBUG,
+            f"NO NEW JOBS AT {self.counter} YET, POLLING AGAIN IN {delay:.0f}s",
+        )
+        return response.follow(
+            url=self.listing_url(self.counter),
+            callback=self.parse,
+            headers={"User-Agent": self.user_agent},
+            dont_filter=True,
+            meta={
+                "url": response.meta["url"],
+                LISTING_POLLS_META_KEY: polls,
+                LISTING_WAITED_META_KEY: waited + delay,
+                DELAY_META_KEY: delay,
+            },
+        )
+
+    def job_failed(self, failure):
+        # A job page that never reaches parse_job: an HTTP error status, a
+        # download error Scrapy stopped retrying, or a page missing from the
+        # response cache. Counted as scraped, like a page given up on in
+        # parse_job, so that the end of the serial listing is still detected.
+        self.counter_job_based_on_scraped += 1
+        self.inc_stat(f"job_page_failed/{failure.type.__name__}")
+        logging.debug(f"Job page failed: {failure.request.url} ({failure.value!r})")
+
     def parse_job(self, response):
-        title = response.xpath(
-            './/main/section[contains(@class, "core-rail")]/div/section[contains(@class, "top-card-layout")]/div/div[contains(@class, "entity-info-container")]/div/h1/text()'
-        ).get()
-        company = response.xpath(
-            './/main/section[contains(@class, "core-rail")]/div/section[contains(@class, "top-card-layout")]/div/div[contains(@class, "entity-info-container")]/div/h4/div[1]/span[@class="topcard__flavor"]/a/text()'
-        ).get()
-        location = response.xpath(
-            './/main/section[contains(@class, "core-rail")]/div/section[contains(@class, "top-card-layout")]/div/div[contains(@class, "entity-info-container")]/div/h4/div[1]/span[contains(@class, "bullet")]/text()'
-        ).get()
-        time_ago = response.xpath(
-            './/main/section[contains(@class, "core-rail")]/div/section[contains(@class, "top-card-layout")]/div/div[contains(@class, "entity-info-container")]/div/h4/div[2]/span[contains(@class, "posted-time-ago")]/text()'
-        ).get()
-        seniority_level = response.xpath(
-            './/main/section[contains(@class, "core-rail")]/div/div[contains(@class, "details")]/section[contains(@class, "description")]/div/ul/li[1]/span/text()'
-        ).get()
-        employment_type = response.xpath(
-            './/main/section[contains(@class, "core-rail")]/div/div[contains(@class, "details")]/section[contains(@class, "description")]/div/ul/li[2]/span/text()'
-        ).get()
-        job_function = response.xpath(
-            './/main/section[contains(@class, "core-rail")]/div/div[contains(@class, "details")]/section[contains(@class, "description")]/div/ul/li[3]/span/text()'
-        ).get()
-        industries = response.xpath(
-            './/main/section[contains(@class, "core-rail")]/div/div[contains(@class, "details")]/section[contains(@class, "description")]/div/ul/li[4]/span/text()'
-        ).get()
-        description = response.xpath(
-            './/main/section[contains(@class, "core-rail")]/div[contains(@class, "details")]/div[contains(@class, "details")]/section[contains(@class, "description")]/div[contains(@class, "core-section-container")]/div[contains(@class, "description")]/section/div'
-        ).get()
+        root = response.selector.root
+        top_cards = TOP_CARD_XPATH(root)
+        criteria = JOB_CRITERIA_XPATH(root)
+        title = first_match(TITLE_XPATH, top_cards)
+        company = first_match(COMPANY_XPATH, top_cards)
+        location = first_match(LOCATION_XPATH, top_cards)
+        time_ago = first_match(TIME_AGO_XPATH, top_cards)
+        seniority_level = first_match(SENIORITY_LEVEL_XPATH, criteria)
+        employment_type = first_match(EMPLOYMENT_TYPE_XPATH, criteria)
+        job_function = first_match(JOB_FUNCTION_XPATH, criteria)
+        industries = first_match(INDUSTRIES_XPATH, criteria)
+        descriptions = DESCRIPTION_XPATH(root)
+        description = (
+            etree.tostring(
+                descriptions[0], method="html", encoding="unicode", with_tail=False
+            )
+            if descriptions
+            else None
+        )
         if title is None:
             logging.log(
                 logging.DEBUG,
                 f"THIS PAGE IS NOT LOADING PROPERLY, RELOADING: {response.meta['job_url']}",
             )
-            yield response.follow(
-                url=response.meta["job_url"],
-                callback=self.parse_job,
-                headers={"User-Agent": self.user_agent},
-                dont_filter=True,
-                meta={"job_url": response.meta["job_url"]},
+            retry = self.retry_budget.retry(
+                response,
+                response.follow(
+                    url=response.meta["job_url"],
+                    callback=self.parse_job,
+                    errback=self.job_failed,
+                    headers={"User-Agent": self.user_agent},
+                    dont_filter=True,
+                    meta={"job_url": response.meta["job_url"]},
+                ),
+                "missing_title",
             )
+            if retry:
+                yield retry
+            else:
+                # Given up on, and counted as scraped so that the end of the
+                # listing is still detected
+                self.counter_job_based_on_scraped += 1
             return
         self.counter_job_based_on_scraped += 1
+        if self.known_job_store:
+            self.known_job_store.record(response.meta["job_url"])
 
         yield {
             "title": title,
@@ -10,8 +10,12 @@ source /path/to/conda/activate/script lja
 # Navigate to the Scrapy project directory
 cd /path/to/Linkedin_job_analysis/src/linkedin_job_search
 
-# Run the Scrapy spider, capped so a hang can't run past the next hourly trigger
-timeout 45m scrapy crawl job_scraper -a country=finland -a period=past_2_hours
+# Run the Scrapy spider, capped so a hang can't run past the next hourly trigger.
+# The past_2_hours window overlaps the previous run, so skip jobs already stored.
+# The countries share a 40-minute deadline, closing their crawls before the cap.
+# The next run starts over from the first listing page of the new window.
+# Add countries (with their resources) to the comma-separated list.
+timeout 45m scrapy crawl_countries --countries finland --period past_2_hours --deadline 40 -s INCREMENTAL_CRAWL=True
 
 # Deactivate the conda environment
 conda deactivate
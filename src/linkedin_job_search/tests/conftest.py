@@ -77,3 +77,16 @@ def fake_project(tmp_path, monkeypatch):
 
     monkeypatch.chdir(scrapy_dir)
     return tmp_path
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,75 @@
+import pytest
+
+from linkedin_job_search.adaptive_concurrency import AimdRate
+
+
+class TestAimdRate:
+    def test_normal_responses_increase_the_rate_additively(self, clock):
+        rate = AimdRate(rate=0.2, increase=0.05, clock=clock)
+
+        for _ in range(4):
+            assert rate.observe(200, latency=0.5) is None
+
+        assert rate.rate == pytest.approx(0.4)
+        assert rate.delay == pytest.approx(2.5)
+
+    def test_rate_is_capped_by_the_min_delay(self, clock):
+        rate = AimdRate(rate=0.95, min_delay=1, increase=0.1, clock=clock)
+
+        rate.observe(200, latency=0.5)
+
+        assert rate.rate == 1
+
+    @pytest.mark.parametrize("status", [429, 999])
+    def test_throttled_responses_decrease_the_rate_multiplicatively(
+        self, clock, status
+    ):
+        rate = AimdRate(rate=0.8, decrease_factor=0.5, clock=clock)
+
+        assert rate.observe(status, latency=0.5) == f"status_{status}"
+
+        assert rate.rate == pytest.approx(0.4)
+        assert rate.decreases == 1
+
+    def test_decreases_once_per_round_trip(self, clock):
+        rate = AimdRate(rate=0.8, decrease_factor=0.5, clock=clock)
+
+        rate.observe(429, latency=0.5)
+        clock.now += 1
+        rate.observe(429, latency=0.5)
+        clock.now += 2
+        rate.observe(429, latency=0.5)
+
+        assert rate.rate == pytest.approx(0.2)
+        assert rate.decreases == 2
+
+    def test_rate_is_floored_by_the_max_delay(self, clock):
+        rate = AimdRate(rate=0.02, max_delay=60, clock=clock)
+
+        rate.observe_error()
+
+        assert rate.delay == pytest.approx(60)
+
+    def test_occasional_login_wall_is_tolerated(self, clock):
+        rate = AimdRate(rate=0.5, login_wall_threshold=0.15, clock=clock)
+
+        assert rate.observe(200, latency=0.5, login_wall=True) is None
+        for _ in range(3):
+            clock.now += 10
+            rate.observe(200, latency=0.5, login_wall=True)
+
+        assert rate.login_wall_rate > 0.15
+        assert rate.decreases > 0
+
+    def test_slow_responses_decrease_the_rate(self, clock):
+        rate = AimdRate(rate=0.5, target_latency=5, clock=clock)
+
+        assert rate.observe(200, latency=8) == "latency"
+
+    def test_concurrency_keeps_the_rate_going_at_the_latency(self, clock):
+        rate = AimdRate(rate=1, max_concurrency=8, clock=clock)
+        assert rate.concurrency == 1
+
+        rate.observe(200, latency=3)
+
+        assert rate.concurrency == 3
@@ -0,0 +1,27 @@
+from linkedin_job_search.aho_corasick import AhoCorasick
+
+
+class TestAhoCorasick:
+    def test_finds_single_pattern(self):
+        matcher = AhoCorasick(["engineer"])
+        assert matcher.find_all("software engineer") == {0}
+
+    def test_no_match_returns_empty_set(self):
+        matcher = AhoCorasick(["account", "audit"])
+        assert matcher.find_all("astronaut") == set()
+
+    def test_finds_overlapping_and_nested_patterns(self):
+        patterns = ["he", "she", "his", "hers"]
+        matcher = AhoCorasick(patterns)
+        assert matcher.find_all("ushers") == {0, 1, 3}
+
+    def test_finds_patterns_sharing_a_prefix(self):
+        matcher = AhoCorasick(["account", "accounting", "ting"])
+        assert matcher.find_all("accounting") == {0, 1, 2}
+
+    def test_agrees_with_substring_checks(self):
+        patterns = ["admin", "dmin", "min", "consult", "sult", "sales", "ale"]
+        text = "administrative consulting and wholesales"
+        matcher = AhoCorasick(patterns)
+        expected = {i for i, pattern in enumerate(patterns) if pattern in text}
+        assert matcher.find_all(text) == expected
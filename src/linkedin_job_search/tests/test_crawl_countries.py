@@ -0,0 +1,129 @@
+import os
+
+import pytest
+from scrapy.exceptions import UsageError
+from scrapy.settings import Settings
+
+from linkedin_job_search.commands.crawl_countries import (
+    country_settings,
+    country_time_budget,
+    load_countries,
+    select_countries,
+    summary_lines,
+)
+
+
+class TestSelectCountries:
+    def test_defaults_to_the_countries_with_resources(self, fake_project):
+        countries = select_countries(load_countries(), None)
+
+        assert [country["name"] for country in countries] == ["Finland"]
+
+    def test_selects_by_name_once(self, fake_project):
+        countries = select_countries(load_countries(), "FINLAND, finland")
+
+        assert [country["geo_id"] for country in countries] == ["100456013"]
+
+    def test_unknown_country_raises(self, fake_project):
+        with pytest.raises(UsageError, match="'atlantis' not found"):
+            select_countries(load_countries(), "finland,atlantis")
+
+    def test_country_without_resources_raises(self, fake_project):
+        with pytest.raises(UsageError, match="resources/ for: Sweden"):
+            select_countries(load_countries(), "finland,sweden")
+
+
+class TestCountryTimeBudget:
+    def test_splits_the_deadline_between_the_waves_of_countries(self):
+        assert country_time_budget(2400, 1, 4) == 2400
+        assert country_time_budget(2400, 4, 4) == 2400
+        assert country_time_budget(2400, 5, 4) == 1200
+        assert country_time_budget(2400, 12, 4) == 800
+
+
+class TestCountrySettings:
+    def test_applies_the_time_budget(self):
+        settings = country_settings(Settings(), {"name": "Finland"}, 600)
+
+        assert settings.getfloat("CLOSESPIDER_TIMEOUT") == 600
+
+    def test_command_line_timeout_wins_over_the_budget(self):
+        command_settings = Settings()
+        command_settings.set("CLOSESPIDER_TIMEOUT", 60, priority="cmdline")
+
+        settings = country_settings(command_settings, {"name": "Finland"}, 600)
+
+        assert settings.getfloat("CLOSESPIDER_TIMEOUT") == 60
+
+    def test_country_settings_win_over_the_project_settings(self):
+        project_settings = Settings({"DOWNLOAD_DELAY": 5}, priority="project")
+        country = {
+            "name": "Finland",
+            "settings": {"DOWNLOAD_DELAY": 2, "CLOSESPIDER_TIMEOUT": 300},
+        }
+
+        settings = country_settings(project_settings, country, 600)
+
+        assert settings.getfloat("DOWNLOAD_DELAY") == 2
+        assert settings.getfloat("CLOSESPIDER_TIMEOUT") == 300
+        assert project_settings.getfloat("DOWNLOAD_DELAY") == 5
+
+    def test_each_country_keeps_its_own_state_file(self):
+        project_settings = Settings({"INCREMENTAL_STATE_FILE": "/tmp/known_jobs.tsv"})
+
+        settings = country_settings(project_settings, {"name": "Finland"}, 600)
+
+        assert settings.get("INCREMENTAL_STATE_FILE") == "/tmp/known_jobs_finland.tsv"
+
+    @pytest.mark.parametrize(
+        "name", ["PAGE_RETRY_DEAD_LETTER_FILE", "POSTGRES_DEAD_LETTER_FILE"]
+    )
+    def test_each_country_keeps_its_own_dead_letter_file(self, name):
+        project_settings = Settings({name: "/tmp/dead_letters.jsonl"})
+
+        settings = country_settings(project_settings, {"name": "Finland"}, 600)
+
+        assert settings.get(name) == "/tmp/dead_letters_finland.jsonl"
+
+    def test_each_country_keeps_its_own_job_directory(self):
+        project_settings = Settings({"JOBDIR": "crawls"})
+
+        settings = country_settings(project_settings, {"name": "Finland"}, 600)
+
+        assert settings.get("JOBDIR") == os.path.join("crawls", "finland")
+
+
+class TestSummaryLines:
+    def test_one_line_per_country(self):
+        results = {
+            "Finland": {
+                "status": "finished",
+                "stats": {"item_scraped_count": 120, "postgres/rows_inserted": 100},
+                "elapsed": 300,
+            },
+            "Sweden": {"status": "not started"},
+        }
+
+        header, finland, sweden = summary_lines(results)
+
+        assert header.split() == [
+            "country",
+            "status",
+            "items",
+            "inserted",
+            "duplicates",
+            "skipped",
+            "errors",
+            "minutes",
+        ]
+        assert finland.split() == [
+            "Finland",
+            "finished",
+            "120",
+            "100",
+            "0",
+            "0",
+            "0",
+            "5.0",
+        ]
+        assert sweden.split()[:3] == ["Sweden", "not", "started"]
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import pytest
+
+from linkedin_job_search.description_cleaners import (
+    DESCRIPTION_CLEANERS,
+    beautifulsoup_text,
+)
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+DESCRIPTIONS = [
+    "<div><p>Build <b>things</b>.</p></div>",
+    "<p>Build   <b>things</b>.</p>",
+    "plain text",
+    "",
+    "<div><p>About</p><ul><li>one</li><li>two</li></ul><br>end</div>",
+    "<div>fish &amp; chips&nbsp;&lt;3 &#228;&#x00e4; &euro;</div>",
+    "<div>a<!-- a comment -->b</div>",
+    "<div>before<script>var x = '<p>';</script>after<style>p {}</style></div>",
+    '<div><a href="https://example.com/?a=1&amp;b=2" title="x>y">link</a></div>',
+    "<div>\n  line\tbreaks\n\n  and spaces  </div>",
+    "<div>Ääkköset ja €uro</div>",
+]
+
+
+@pytest.mark.parametrize("name", sorted(DESCRIPTION_CLEANERS))
+@pytest.mark.parametrize("description", DESCRIPTIONS)
+def test_cleaners_match_beautifulsoup(name, description):
+    cleaner = DESCRIPTION_CLEANERS[name]
+
+    assert cleaner(description) == beautifulsoup_text(description)
+
+
+@pytest.mark.parametrize("name", sorted(DESCRIPTION_CLEANERS))
+def test_cleaners_match_beautifulsoup_on_the_job_page_fixture(name):
+    page = (FIXTURES_DIR / "job_detail.html").read_text()
+
+    assert DESCRIPTION_CLEANERS[name](page) == beautifulsoup_text(page)
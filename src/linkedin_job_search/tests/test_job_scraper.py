@@ -1,9 +1,21 @@
+import datetime
+import pickle
+import time
 from pathlib import Path
+from unittest.mock import MagicMock
 
 import pytest
 import scrapy
 from scrapy.http import HtmlResponse
-
+from scrapy.exceptions import IgnoreRequest
+from scrapy.settings import Settings
+from twisted.python.failure import Failure
+
+from linkedin_job_search.retry_budget import (
+    ATTEMPTS_META_KEY,
+    DELAY_META_KEY,
+    RetryBudget,
+)
 from linkedin_job_search.spiders.job_scraper import JobScraperSpider
 
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
@@ -84,6 +96,92 @@ class TestParse:
         assert len(pagination_requests) == 1
         assert "start=2" in pagination_requests[0].url
 
+    def test_retries_are_delayed_and_bounded(self, spider):
+        spider.retry_budget = RetryBudget(max_retries=2)
+        url = spider.base_url
+        response = make_response(url, "login_wall.html", meta={"url": url})
+
+        retry = list(spider.parse(response))[0]
+        retry = list(spider.parse(make_response(url, "login_wall.html", retry.meta)))
+        given_up = list(
+            spider.parse(make_response(url, "login_wall.html", retry[0].meta))
+        )
+
+        assert retry[0].meta[ATTEMPTS_META_KEY] == 2
+        assert retry[0].meta[DELAY_META_KEY] > 0
+        assert given_up == []
+        assert spider.retry_budget.dead_letters[0]["reason"] == "login_wall"
+
+    def test_end_of_listing_is_polled_at_its_offset_while_jobs_are_pending(
+        self, spider
+    ):
+        url = spider.base_url
+        spider.counter = 5
+        spider.counter_job_based_on_scraped = 3
+        response = make_response(
+            spider.listing_url(5), "empty_listing.html", meta={"url": url}
+        )
+
+        results = list(spider.parse(response))
+
+        assert [r.url for r in results] == [spider.listing_url(5)]
+        assert results[0].meta["url"] == url
+
+    def test_end_of_listing_is_polled_with_its_own_backoff_and_no_budget(self, spider):
+        spider.retry_budget = RetryBudget(max_retries=1)
+        spider.listing_poll_delay = 5
+        spider.listing_poll_max_delay = 12
+        url = spider.base_url
+        spider.counter = 5
+        spider.counter_job_based_on_scraped = 3
+        meta = {"url": url}
+        delays = []
+
+        for _ in range(4):
+            (poll,) = spider.parse(
+                make_response(spider.listing_url(5), "empty_listing.html", meta)
+            )
+            meta = poll.meta
+            delays.append(meta[DELAY_META_KEY])
+
+        assert delays == [5, 10, 12, 12]
+        assert ATTEMPTS_META_KEY not in meta
+        assert spider.retry_budget.dead_letters == []
+
+    def test_end_of_listing_polls_stop_after_the_max_wait(self, spider):
+        spider.listing_poll_delay = 5
+        spider.listing_poll_max_delay = 60
+        spider.listing_poll_max_wait = 40
+        spider.counter = 5
+        spider.counter_job_based_on_scraped = 3
+        meta = {"url": spider.base_url}
+        delays = []
+
+        while True:
+            polls = list(
+                spider.parse(
+                    make_response(spider.listing_url(5), "empty_listing.html", meta)
+                )
+            )
+            if not polls:
+                break
+            meta = polls[0].meta
+            delays.append(meta[DELAY_META_KEY])
+
+        assert delays == [5, 10, 20]
+
+    def test_job_pages_that_fail_count_as_scraped(self, spider):
+        url = spider.base_url
+        job_request = list(
+            spider.parse(make_response(url, "job_listing.html", meta={"url": url}))
+        )[0]
+        failure = Failure(IgnoreRequest("Not in the response cache"))
+        failure.request = job_request
+
+        job_request.errback(failure)
+
+        assert spider.counter_job_based_on_scraped == 1
+
     def test_no_more_pages_stops_pagination(self, spider):
         url = spider.base_url
         spider.counter = 5
@@ -95,6 +193,112 @@ class TestParse:
         assert results == []
 
 
+@pytest.fixture
+def window_spider(spider):
+    spider.crawler = MagicMock()
+    spider.settings = Settings({"LISTING_WINDOW": 3, "LISTING_PAGE_SIZE": 10})
+    return spider
+
+
+def listing_window_response(spider, start, fixture_name):
+    url = spider.listing_url(start)
+    return make_response(url, fixture_name, meta={"url": url, "start": start})
+
+
+class TestListingWindow:
+    def test_requests_the_window_of_offsets_at_once(self, window_spider):
+        requests = list(window_spider.start_requests())
+
+        assert [r.meta["start"] for r in requests] == [0, 10, 20]
+        assert "start=0&" in requests[0].url
+        assert "start=20&" in requests[2].url
+        assert all(r.callback == window_spider.parse_listing_window for r in requests)
+
+    def test_is_off_by_default(self, spider):
+        spider.settings = Settings()
+
+        requests = list(spider.start_requests())
+
+        assert len(requests) == 1
+        assert requests[0].callback == spider.parse
+
+    def test_non_empty_page_requests_the_next_offset(self, window_spider):
+        list(window_spider.start_requests())
+        response = listing_window_response(window_spider, 10, "job_listing.html")
+
+        results = list(window_spider.parse_listing_window(response))
+
+        job_requests = [r for r in results if r.callback == window_spider.parse_job]
+        listing_requests = [
+            r for r in results if r.callback == window_spider.parse_listing_window
+        ]
+        assert [r.url for r in job_requests] == [
+            "https://www.linkedin.com/jobs/view/111",
+            "https://www.linkedin.com/jobs/view/222",
+        ]
+        assert all(r.errback == window_spider.job_failed for r in job_requests)
+        assert [r.meta["start"] for r in listing_requests] == [30]
+        assert window_spider.counter == 2
+
+    def test_empty_page_closes_the_window(self, window_spider):
+        list(window_spider.start_requests())
+        empty = listing_window_response(window_spider, 20, "empty_listing.html")
+        listing = listing_window_response(window_spider, 10, "job_listing.html")
+
+        assert list(window_spider.parse_listing_window(empty)) == []
+        results = list(window_spider.parse_listing_window(listing))
+
+        assert all(r.callback == window_spider.parse_job for r in results)
+        assert window_spider.listing_exhausted
+
+    def test_empty_first_page_and_login_wall_are_retried(self, window_spider):
+        list(window_spider.start_requests())
+        empty = listing_window_response(window_spider, 0, "empty_listing.html")
+        login_wall = listing_window_response(window_spider, 10, "login_wall.html")
+
+        for response in (empty, login_wall):
+            results = list(window_spider.parse_listing_window(response))
+
+            assert len(results) == 1
+            assert results[0].url == response.url
+            assert results[0].meta["start"] == response.meta["start"]
+        assert not window_spider.listing_exhausted
+
+    def test_job_urls_listed_by_overlapping_pages_are_requested_once(
+        self, window_spider
+    ):
+        list(window_spider.start_requests())
+        first = listing_window_response(window_spider, 0, "job_listing.html")
+        overlapping = listing_window_response(window_spider, 10, "job_listing.html")
+
+        list(window_spider.parse_listing_window(first))
+        results = list(window_spider.parse_listing_window(overlapping))
+
+        assert not [r for r in results if r.callback == window_spider.parse_job]
+        assert window_spider.counter == 4
+        assert window_spider.counter_job_based_on_scraped == 2
+        window_spider.crawler.stats.inc_value.assert_called_with(
+            "listing/duplicate_job_urls", 1
+        )
+
+    def test_counters_add_up_once_every_job_is_scraped(self, window_spider):
+        list(window_spider.start_requests())
+        job_requests = []
+        for start in (0, 10):
+            response = listing_window_response(window_spider, start, "job_listing.html")
+            job_requests += [
+                r
+                for r in window_spider.parse_listing_window(response)
+                if r.callback == window_spider.parse_job
+            ]
+
+        for request in job_requests:
+            response = make_response(request.url, "job_detail.html", meta=request.meta)
+            list(window_spider.parse_job(response))
+
+        assert window_spider.counter == window_spider.counter_job_based_on_scraped
+
+
 class TestParseJob:
     def test_extracts_all_fields(self, spider):
         job_url = "https://www.linkedin.com/jobs/view/111"
@@ -112,7 +316,7 @@ class TestParseJob:
         assert item["employment_type"] == "Full-time"
         assert item["job_function"] == "Engineering"
         assert item["industries"] == "IT Services"
-        assert "Build" in item["description"]
+        assert item["description"] == "<div><p>Build <b>things</b>.</p></div>"
         assert item["job_url"] == job_url
 
     def test_missing_title_retries_same_url(self, spider):
@@ -126,3 +330,208 @@ class TestParseJob:
         assert len(results) == 1
         assert results[0].url == job_url
         assert results[0].callback == spider.parse_job
+        assert results[0].errback == spider.job_failed
+
+    def test_job_page_given_up_on_counts_as_scraped(self, spider):
+        spider.retry_budget = RetryBudget(max_retries=2)
+        job_url = "https://www.linkedin.com/jobs/view/111"
+        response = make_response(
+            job_url,
+            "job_detail_missing_title.html",
+            meta={"job_url": job_url, ATTEMPTS_META_KEY: 2},
+        )
+
+        results = list(spider.parse_job(response))
+
+        assert results == []
+        assert spider.counter_job_based_on_scraped == 1
+        assert spider.retry_budget.dead_letters[0]["reason"] == "missing_title"
+
+
+class TestIncrementalCrawl:
+    def test_skips_known_job_urls_and_counts_them(self, spider):
+        spider.crawler = MagicMock()
+        spider.known_job_urls = {"https://www.linkedin.com/jobs/view/111"}
+        url = spider.base_url
+        response = make_response(url, "job_listing.html", meta={"url": url})
+
+        results = list(spider.parse(response))
+
+        job_requests = [r for r in results if r.callback == spider.parse_job]
+        assert [r.url for r in job_requests] == [
+            "https://www.linkedin.com/jobs/view/222"
+        ]
+        assert spider.counter_job_based_on_scraped == 1
+        spider.crawler.stats.inc_value.assert_called_once_with(
+            "incremental/skipped_job_requests", 1
+        )
+
+    def test_loads_known_urls_from_state_file_on_open(self, spider, tmp_path):
+        state_file = tmp_path / "known_jobs.tsv"
+        state_file.write_text(
+            f"{datetime.datetime.now().isoformat()}\t"
+            "https://www.linkedin.com/jobs/view/111\n"
+        )
+        spider.settings = Settings(
+            {"INCREMENTAL_CRAWL": True, "INCREMENTAL_STATE_FILE": str(state_file)}
+        )
+
+        spider.spider_opened(spider)
+
+        assert spider.known_job_urls == {"https://www.linkedin.com/jobs/view/111"}
+
+    def test_disabled_by_default(self, spider):
+        spider.settings = Settings({"INCREMENTAL_CRAWL": False})
+
+        spider.spider_opened(spider)
+
+        assert spider.known_job_store is None
+        assert spider.known_job_urls == set()
+
+    def test_scraped_urls_are_saved_on_close(self, spider, tmp_path):
+        state_file = tmp_path / "known_jobs.tsv"
+        spider.settings = Settings(
+            {"INCREMENTAL_CRAWL": True, "INCREMENTAL_STATE_FILE": str(state_file)}
+        )
+        spider.spider_opened(spider)
+        job_url = "https://www.linkedin.com/jobs/view/111"
+        response = make_response(job_url, "job_detail.html", meta={"job_url": job_url})
+
+        list(spider.parse_job(response))
+        spider.spider_closed(spider)
+
+        assert job_url in state_file.read_text()
+
+
+class TestFrontier:
+    def interrupted_spider(self, spider):
+        spider.crawler = MagicMock()
+        spider.settings = Settings()
+        spider.state = {}
+        url = spider.base_url
+        listing = make_response(url, "job_listing.html", meta={"url": url})
+        job_request, _, _ = list(spider.parse(listing))
+        response = make_response(
+            job_request.url, "job_detail.html", meta=job_request.meta
+        )
+        list(spider.parse_job(response))
+        spider.spider_closed(spider, reason="closespider_timeout")
+
+    def test_closed_crawl_keeps_its_counters(self, spider):
+        self.interrupted_spider(spider)
+
+        frontier = spider.state["frontier"]
+        assert frontier["counter"] == 2
+        assert frontier["counter_job_based_on_scraped"] == 1
+
+    def test_resumes_from_the_frontier_without_the_first_listing_page(
+        self, spider, fake_project
+    ):
+        self.interrupted_spider(spider)
+        resumed = JobScraperSpider(country="finland", period="past_2_hours")
+        resumed.crawler = MagicMock()
+        resumed.settings = Settings()
+        resumed.state = spider.state
+
+        # The pending requests come back from the scheduler's queue instead
+        assert list(resumed.start_requests()) == []
+        assert resumed.counter == 2
+        assert resumed.counter_job_based_on_scraped == 1
+        resumed.crawler.stats.inc_value.assert_called_once_with(
+            "frontier/resumed_crawls", 1
+        )
+
+    def test_resumed_window_continues_from_its_next_offset(
+        self, window_spider, fake_project
+    ):
+        window_spider.state = {}
+        list(window_spider.start_requests())
+        response = listing_window_response(window_spider, 0, "job_listing.html")
+        list(window_spider.parse_listing_window(response))
+        window_spider.spider_closed(window_spider, reason="shutdown")
+        resumed = JobScraperSpider(country="finland", period="past_2_hours")
+        resumed.crawler = MagicMock()
+        resumed.settings = window_spider.settings
+        resumed.state = window_spider.state
+
+        list(resumed.start_requests())
+
+        assert resumed.next_listing_request().meta["start"] == 40
+        assert resumed.requested_job_urls == window_spider.requested_job_urls
+
+    def test_finished_crawl_starts_over(self, spider):
+        self.interrupted_spider(spider)
+
+        spider.spider_closed(spider, reason="finished")
+        requests = list(spider.start_requests())
+
+        assert "frontier" not in spider.state
+        assert [r.url for r in requests] == [spider.base_url]
+
+    def test_first_listing_page_is_not_filtered_by_earlier_runs(self, spider):
+        spider.settings = Settings()
+
+        requests = list(spider.start_requests())
+
+        assert requests[0].dont_filter
+
+    def test_nothing_is_saved_without_jobdir(self, spider):
+        spider.spider_closed(spider, reason="shutdown")
+
+        assert not hasattr(spider, "state")
+
+    def interrupted_jobdir(self, spider, jobdir):
+        self.interrupted_spider(spider)
+        (jobdir / "requests.queue").mkdir(parents=True)
+        (jobdir / "requests.queue" / "p0").write_text("")
+        (jobdir / "requests.seen").write_text("")
+        with open(jobdir / "spider.state", "wb") as f:
+            pickle.dump(spider.state, f)
+
+    def test_frontier_records_what_it_crawled(self, spider):
+        self.interrupted_spider(spider)
+
+        frontier = spider.state["frontier"]
+        assert frontier["country"] == "Finland"
+        assert frontier["period"] == "past_2_hours"
+        assert time.time() - frontier["started_at"] < 60
+
+    def test_recent_frontier_is_kept(self, spider, tmp_path):
+        jobdir = tmp_path / "crawls" / "finland"
+        self.interrupted_jobdir(spider, jobdir)
+        resumed = JobScraperSpider(country="finland", period="past_2_hours")
+
+        resumed.discard_stale_frontier(str(jobdir))
+
+        assert sorted(path.name for path in jobdir.iterdir()) == [
+            "requests.queue",
+            "requests.seen",
+            "spider.state",
+        ]
+
+    @pytest.mark.parametrize(
+        "country, period, age",
+        [
+            ("sweden", "past_2_hours", 0),
+            ("finland", "past_24_hours", 0),
+            ("finland", "past_2_hours", 3 * 60 * 60),
+        ],
+    )
+    def test_frontier_of_another_crawl_or_window_is_discarded(
+        self, spider, tmp_path, country, period, age
+    ):
+        spider.started_at -= age
+        jobdir = tmp_path / "crawls" / "finland"
+        self.interrupted_jobdir(spider, jobdir)
+        other = JobScraperSpider(country=country, period=period)
+
+        other.discard_stale_frontier(str(jobdir))
+
+        assert list(jobdir.iterdir()) == []
+
+    def test_any_time_frontier_does_not_expire(self, fake_project):
+        spider = JobScraperSpider(country="finland", period="any_time")
+        spider.started_at -= 30 * 24 * 60 * 60
+        self.interrupted_spider(spider)
+
+        assert spider.stale_frontier_reason(spider.state["frontier"]) is None
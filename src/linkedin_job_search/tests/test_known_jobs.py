@@ -0,0 +1,67 @@
+import datetime
+from unittest.mock import MagicMock
+
+from linkedin_job_search import known_jobs
+from linkedin_job_search.known_jobs import KnownJobStore
+
+
+class TestKnownJobStoreFile:
+    def test_missing_state_file_loads_empty(self, tmp_path):
+        store = KnownJobStore(state_file=str(tmp_path / "known_jobs.tsv"))
+        assert store.load() == set()
+
+    def test_recorded_urls_round_trip_through_the_file(self, tmp_path):
+        state_file = str(tmp_path / "known_jobs.tsv")
+        store = KnownJobStore(state_file=state_file)
+        store.load()
+        store.record("https://www.linkedin.com/jobs/view/111")
+        store.save()
+
+        reloaded = KnownJobStore(state_file=state_file)
+        assert reloaded.load() == {"https://www.linkedin.com/jobs/view/111"}
+
+    def test_entries_older_than_lookback_are_ignored(self, tmp_path):
+        state_file = tmp_path / "known_jobs.tsv"
+        old = datetime.datetime.now() - datetime.timedelta(hours=30)
+        recent = datetime.datetime.now() - datetime.timedelta(hours=1)
+        state_file.write_text(
+            f"{old.isoformat()}\thttps://www.linkedin.com/jobs/view/old\n"
+            f"{recent.isoformat()}\thttps://www.linkedin.com/jobs/view/recent\n"
+        )
+
+        store = KnownJobStore(state_file=str(state_file), lookback_hours=24)
+
+        assert store.load() == {"https://www.linkedin.com/jobs/view/recent"}
+
+    def test_save_drops_expired_entries(self, tmp_path):
+        state_file = tmp_path / "known_jobs.tsv"
+        store = KnownJobStore(state_file=str(state_file), lookback_hours=24)
+        store.seen_at["https://www.linkedin.com/jobs/view/old"] = (
+            datetime.datetime.now() - datetime.timedelta(hours=30)
+        )
+        store.record("https://www.linkedin.com/jobs/view/new")
+
+        store.save()
+
+        assert "view/old" not in state_file.read_text()
+        assert "view/new" in state_file.read_text()
+
+
+class TestKnownJobStorePostgres:
+    def test_looks_up_urls_by_the_time_they_were_stored(
+        self, fake_project, monkeypatch
+    ):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [
+            ("https://www.linkedin.com/jobs/view/111", datetime.datetime.now())
+        ]
+        monkeypatch.setattr(known_jobs.psycopg2, "connect", lambda **kwargs: conn)
+
+        store = KnownJobStore(lookback_hours=24)
+
+        assert store.load() == {"https://www.linkedin.com/jobs/view/111"}
+        sql, (cutoff,) = cursor.execute.call_args.args
+        assert "WHERE COALESCE(stored_at, date_posted) >= %s" in sql
+        assert cutoff < datetime.datetime.now() - datetime.timedelta(hours=23)
+        conn.close.assert_called_once()
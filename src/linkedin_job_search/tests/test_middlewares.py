@@ -0,0 +1,199 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+import scrapy
+from scrapy.core.downloader import Slot
+from scrapy.http import HtmlResponse
+from scrapy.settings import Settings
+from scrapy.statscollectors import MemoryStatsCollector
+
+from linkedin_job_search.middlewares import LinkedinJobSearchDownloaderMiddleware
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+URL = "http://127.0.0.1/jobs"
+SLOT = "127.0.0.1"
+
+
+class RateLimit:
+    """Serves the job listing at most max_rate times per second of clock,
+    and answers the requests beyond that as throttle_with says: with a 429,
+    a 999 or the login wall."""
+
+    def __init__(self, clock, throttle_with, max_rate=100):
+        self.clock = clock
+        self.throttle_with = throttle_with
+        self.max_rate = max_rate
+        self.last_served = -float("inf")
+        self.throttled = 0
+
+    def serve(self):
+        now = self.clock()
+        if now - self.last_served >= 1 / self.max_rate:
+            self.last_served = now
+            return 200, "job_listing.html"
+        self.throttled += 1
+        if self.throttle_with == "login_wall":
+            return 200, "login_wall.html"
+        return self.throttle_with, "empty_listing.html"
+
+
+def make_response(status, fixture, latency=0.002):
+    request = scrapy.Request(
+        URL, meta={"download_slot": SLOT, "download_latency": latency}
+    )
+    body = (FIXTURES_DIR / fixture).read_bytes()
+    return request, HtmlResponse(URL, status=status, body=body, request=request)
+
+
+@pytest.fixture
+def middleware(clock):
+    crawler = MagicMock()
+    crawler.settings = Settings(
+        {
+            "ADAPTIVE_CONCURRENCY_ENABLED": True,
+            "DOWNLOAD_DELAY": 0.2,
+            "ADAPTIVE_CONCURRENCY_MIN_DELAY": 0.001,
+            "ADAPTIVE_CONCURRENCY_RATE_INCREASE": 5,
+        }
+    )
+    crawler.stats = MemoryStatsCollector(crawler)
+    crawler.engine.downloader.slots = {SLOT: Slot(8, 0.2, False)}
+    middleware = LinkedinJobSearchDownloaderMiddleware.from_crawler(crawler)
+    middleware.clock = clock
+    return middleware
+
+
+@pytest.mark.parametrize(
+    "throttle_with, reason",
+    [(429, "status_429"), (999, "status_999"), ("login_wall", "login_wall")],
+)
+def test_settles_below_the_rate_limit_of_the_server(
+    middleware, clock, throttle_with, reason
+):
+    rate_limit = RateLimit(clock, throttle_with)
+    slot = middleware.crawler.engine.downloader.slots[SLOT]
+    # Requests one at a time, each after the delay of the slot
+    for _ in range(200):
+        request, response = make_response(*rate_limit.serve())
+        clock.now += request.meta["download_latency"]
+        middleware.process_response(request, response, spider=None)
+        clock.now += slot.delay
+
+    stats = middleware.crawler.stats.get_stats()
+    rate = stats[f"adaptive_concurrency/{SLOT}/rate"]
+    assert stats[f"adaptive_concurrency/{SLOT}/throttled/{reason}"] > 0
+    assert stats[f"adaptive_concurrency/{SLOT}/decrease_count"] > 0
+    # Above the starting rate of 5 requests per second, around the limit of 100
+    assert 5 < rate < 2 * rate_limit.max_rate
+    assert slot.delay == pytest.approx(1 / rate, rel=0.01)
+    # Most requests are served once the rate has settled
+    assert 0 < rate_limit.throttled < 200 / 4
+
+
+def test_slows_down_on_a_download_error(middleware):
+    request, _ = make_response(200, "job_listing.html")
+    slot = middleware.crawler.engine.downloader.slots[SLOT]
+
+    middleware.process_exception(request, TimeoutError(), spider=None)
+
+    stats = middleware.crawler.stats.get_stats()
+    assert slot.delay == pytest.approx(0.4)
+    assert stats[f"adaptive_concurrency/{SLOT}/throttled/download_error"] == 1
+
+
+def test_ignores_cached_responses(middleware):
+    request, response = make_response(429, "empty_listing.html")
+    response.flags.append("cached")
+
+    middleware.process_response(request, response, spider=None)
+
+    assert middleware.rates == {}
+    assert middleware.crawler.engine.downloader.slots[SLOT].delay == 0.2
+
+
+def test_does_nothing_unless_enabled():
+    crawler = MagicMock()
+    crawler.settings = Settings({"ADAPTIVE_CONCURRENCY_ENABLED": False})
+    crawler.engine.downloader.slots = {SLOT: Slot(8, 5, False)}
+    middleware = LinkedinJobSearchDownloaderMiddleware.from_crawler(crawler)
+    request, response = make_response(429, "empty_listing.html")
+
+    assert middleware.process_response(request, response, spider=None) is response
+    assert crawler.engine.downloader.slots[SLOT].delay == 5
+
+
+class RateLimitedHandler(BaseHTTPRequestHandler):
+    """Answers as the RateLimit of the server, on the wall clock."""
+
+    def do_GET(self):
+        with self.server.lock:
+            status, fixture = self.server.rate_limit.serve()
+        body = (FIXTURES_DIR / fixture).read_bytes()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def rate_limited_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RateLimitedHandler)
+    server.lock = threading.Lock()
+    server.rate_limit = RateLimit(time.monotonic, 429, max_rate=20)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_slows_down_for_a_real_rate_limited_server(rate_limited_server):
+    """A smoke test over HTTP and the wall clock; the behaviour is covered on
+    the fake clock above, so only the direction of the rate is checked."""
+    crawler = MagicMock()
+    crawler.settings = Settings(
+        {
+            "ADAPTIVE_CONCURRENCY_ENABLED": True,
+            "DOWNLOAD_DELAY": 0.2,
+            "ADAPTIVE_CONCURRENCY_MIN_DELAY": 0.001,
+            "ADAPTIVE_CONCURRENCY_RATE_INCREASE": 20,
+        }
+    )
+    crawler.stats = MemoryStatsCollector(crawler)
+    crawler.engine.downloader.slots = {SLOT: Slot(8, 0.2, False)}
+    middleware = LinkedinJobSearchDownloaderMiddleware.from_crawler(crawler)
+    url = f"http://127.0.0.1:{rate_limited_server.server_port}/jobs"
+    slot = crawler.engine.downloader.slots[SLOT]
+
+    for _ in range(40):
+        start = time.monotonic()
+        try:
+            with urllib.request.urlopen(url, timeout=10) as response:
+                status, body = response.status, response.read()
+        except urllib.error.HTTPError as error:
+            status, body = error.code, error.read()
+        request = scrapy.Request(
+            url,
+            meta={"download_slot": SLOT, "download_latency": time.monotonic() - start},
+        )
+        response = HtmlResponse(url, status=status, body=body, request=request)
+        middleware.process_response(request, response, spider=None)
+        time.sleep(slot.delay)
+
+    stats = crawler.stats.get_stats()
+    assert rate_limited_server.rate_limit.throttled > 0
+    assert stats[f"adaptive_concurrency/{SLOT}/decrease_count"] > 0
+    assert slot.delay == pytest.approx(
+        1 / stats[f"adaptive_concurrency/{SLOT}/rate"], rel=0.01
+    )
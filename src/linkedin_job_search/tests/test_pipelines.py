@@ -1,11 +1,21 @@
 import datetime
 import json
+import re
+import time
 from unittest.mock import MagicMock
 
 import psycopg2
 import pytest
+from scrapy.settings import Settings
+from twisted.internet import task
 
-from linkedin_job_search.pipelines import LinkedinJobSearchPipeline, PostgresPipeline
+from linkedin_job_search import pipelines
+from linkedin_job_search.description_cleaners import lxml_text
+from linkedin_job_search.pipelines import (
+    JOB_COLUMNS,
+    LinkedinJobSearchPipeline,
+    PostgresPipeline,
+)
 
 
 @pytest.fixture
@@ -89,6 +99,28 @@ class TestNormalizeDescription:
         result = pipeline.normalize_description("<p>Build   <b>things</b>.</p>")
         assert result == "Build things ."
 
+    def test_uses_the_configured_cleaner(self, fake_project):
+        pipeline = LinkedinJobSearchPipeline(
+            country_name="finland", description_cleaner="tokenizer"
+        )
+        result = pipeline.normalize_description("<p>Build   <b>things</b>.</p>")
+        assert result == "Build things ."
+
+    def test_unknown_cleaner_raises(self, fake_project):
+        with pytest.raises(ValueError, match="Description cleaner 'regex' not found"):
+            LinkedinJobSearchPipeline(
+                country_name="finland", description_cleaner="regex"
+            )
+
+    def test_cleaner_is_read_from_settings(self, fake_project):
+        crawler = MagicMock()
+        crawler.spider.country_name = "finland"
+        crawler.settings = Settings({"DESCRIPTION_CLEANER": "lxml"})
+
+        pipeline = LinkedinJobSearchPipeline.from_crawler(crawler)
+
+        assert pipeline.clean_description is lxml_text
+
 
 class TestNormalizeLocation:
     def test_matches_known_city(self, pipeline):
@@ -102,6 +134,28 @@ class TestNormalizeLocation:
         assert region == "Uusimaa"
         assert country == "Finland"
 
+    def test_matches_multi_token_finnish_region(self, pipeline):
+        city, region, country = pipeline.normalize_location("Varsinais-Suomi Finland")
+        assert (city, region, country) == (
+            "Unspecified",
+            "Southwest Finland",
+            "Finland",
+        )
+
+    def test_matches_multi_token_region_with_surrounding_words(self, pipeline):
+        city, region, country = pipeline.normalize_location(
+            "Greater Southwest Finland Area"
+        )
+        assert (city, region, country) == (
+            "Unspecified",
+            "Southwest Finland",
+            "Finland",
+        )
+
+    def test_city_match_is_case_insensitive(self, pipeline):
+        city, region, country = pipeline.normalize_location("TAMPERE")
+        assert (city, region, country) == ("Tampere", "Pirkanmaa", "Finland")
+
     def test_matches_country_only(self, pipeline):
         city, region, country = pipeline.normalize_location("Finland")
         assert (city, region, country) == ("Unspecified", "Unspecified", "Finland")
@@ -120,6 +174,16 @@ class TestNormalizeJobFunction:
         result = json.loads(pipeline.normalize_job_function("Senior Software Engineer"))
         assert result == ["Software Development"]
 
+    def test_multiple_fields_keep_resource_file_order(self, pipeline):
+        result = json.loads(pipeline.normalize_job_function("Software Audit"))
+        assert result == ["Accounting", "Software Development"]
+
+    def test_field_is_listed_once_when_several_alternatives_match(self, pipeline):
+        result = json.loads(
+            pipeline.normalize_job_function("Software Engineering Developer")
+        )
+        assert result == ["Software Development"]
+
     def test_no_match_returns_other(self, pipeline):
         result = json.loads(pipeline.normalize_job_function("Astronaut"))
         assert result == ["Other"]
@@ -145,49 +209,388 @@ class TestProcessItem:
 
 
 @pytest.fixture
-def postgres_pipeline(fake_project):
-    return PostgresPipeline()
+def reactor_calls(monkeypatch):
+    """Collects the calls the workers hand to the reactor thread, so a test can
+    run them itself, in any order, the way the reactor would."""
+    from twisted.internet import reactor
+
+    calls = []
+    monkeypatch.setattr(
+        reactor,
+        "callFromThread",
+        lambda function, *args: calls.append((function, args)),
+    )
+    return calls
 
 
-class TestPostgresPipelineProcessItem:
-    def test_skips_insert_when_duplicate_found(self, postgres_pipeline):
-        postgres_pipeline.cursor = MagicMock()
-        postgres_pipeline.cursor.fetchone.return_value = (1,)
-        postgres_pipeline.conn = MagicMock()
+def worker_pipeline(**kwargs):
+    pipeline = LinkedinJobSearchPipeline(country_name="finland", workers=2, **kwargs)
+    pipeline.open_spider(spider=None)
+    return pipeline
 
-        postgres_pipeline.process_item(normalized_item(), spider=None)
 
-        insert_calls = [
-            call
-            for call in postgres_pipeline.cursor.execute.call_args_list
-            if "INSERT INTO jobs" in call.args[0]
+def process_items(pipeline, items):
+    """Feeds the items to the pipeline and returns the list that the results,
+    or the failures, are appended to as the Deferreds fire."""
+    results = []
+    for item in items:
+        pipeline.process_item(item, spider=None).addCallbacks(
+            results.append, lambda failure: results.append(failure.value)
+        )
+    return results
+
+
+class TestProcessItemInWorkers:
+    def test_items_are_passed_on_in_order(self, fake_project, reactor_calls):
+        pipeline = worker_pipeline(executor="thread")
+        items = [
+            raw_item(job_url=f"https://www.linkedin.com/jobs/view/{i}")
+            for i in range(3)
         ]
-        assert insert_calls == []
 
-    def test_inserts_when_no_duplicate(self, postgres_pipeline):
-        postgres_pipeline.cursor = MagicMock()
-        postgres_pipeline.cursor.fetchone.return_value = None
-        postgres_pipeline.conn = MagicMock()
+        results = process_items(pipeline, items)
+        pipeline.close_spider(spider=None)
+        for function, args in reversed(reactor_calls):
+            function(*args)
 
-        postgres_pipeline.process_item(normalized_item(), spider=None)
+        assert [result["job_url"] for result in results] == [
+            item["job_url"] for item in items
+        ]
+        assert all(result["city"] == "Helsinki" for result in results)
+
+    def test_items_are_passed_on_as_they_finish_without_preserve_order(
+        self, fake_project, reactor_calls
+    ):
+        pipeline = worker_pipeline(executor="thread", preserve_order=False)
+        items = [
+            raw_item(job_url=f"https://www.linkedin.com/jobs/view/{i}")
+            for i in range(3)
+        ]
 
-        insert_calls = [
-            call
-            for call in postgres_pipeline.cursor.execute.call_args_list
-            if "INSERT INTO jobs" in call.args[0]
+        results = process_items(pipeline, items)
+        pipeline.close_spider(spider=None)
+        finished = [args[0] for _, args in reactor_calls]
+        for function, args in reversed(reactor_calls):
+            function(*args)
+
+        assert [result["job_url"] for result in results] == [
+            future.result()["job_url"] for future in reversed(finished)
         ]
-        assert len(insert_calls) == 1
+
+    def test_failed_item_does_not_hold_back_the_next(self, fake_project, reactor_calls):
+        pipeline = worker_pipeline(executor="thread")
+        broken_item = raw_item()
+        del broken_item["title"]
+
+        results = process_items(pipeline, [broken_item, raw_item()])
+        pipeline.close_spider(spider=None)
+        for function, args in reversed(reactor_calls):
+            function(*args)
+
+        assert isinstance(results[0], KeyError)
+        assert results[1]["city"] == "Helsinki"
+
+    def test_in_flight_items_are_bounded(self, fake_project, reactor_calls):
+        pipeline = worker_pipeline(executor="thread", max_in_flight=2)
+
+        process_items(pipeline, [raw_item() for _ in range(3)])
+
+        assert pipeline.semaphore.tokens == 0
+        assert len(pipeline.semaphore.waiting) == 1
+        while not reactor_calls:
+            time.sleep(0.01)
+        function, args = reactor_calls[0]
+        function(*args)
+        assert len(pipeline.semaphore.waiting) == 0
+        pipeline.close_spider(spider=None)
+
+    def test_process_workers_build_their_own_pipeline(
+        self, fake_project, reactor_calls
+    ):
+        pipeline = worker_pipeline(description_cleaner="lxml")
+
+        results = process_items(pipeline, [raw_item()])
+        pipeline.close_spider(spider=None)
+        for function, args in reactor_calls:
+            function(*args)
+
+        assert results[0]["city"] == "Helsinki"
+        assert results[0]["description"] == "Build things ."
+
+    def test_unknown_executor_raises(self, fake_project):
+        with pytest.raises(ValueError, match="Executor 'fiber' not found"):
+            LinkedinJobSearchPipeline(country_name="finland", executor="fiber")
+
+
+@pytest.fixture
+def postgres_pipeline(fake_project):
+    pipeline = PostgresPipeline(batch_size=2, stats=MagicMock())
+    pipeline.cursor = MagicMock()
+    pipeline.conn = MagicMock()
+    return pipeline
+
+
+@pytest.fixture
+def inserted_rows(monkeypatch):
+    """Captures the rows PostgresPipeline hands to execute_values and plays
+    the part of the database: rows whose job URL and posting day are already
+    stored or earlier in the batch (the unique index), or whose job URL was
+    stored before the batch with a date_posted within the window of the
+    INSERT (its NOT EXISTS guard), come back as not inserted."""
+    rows = []
+
+    def fake_execute_values(cursor, sql, argslist, page_size=100, fetch=False):
+        assert "INSERT INTO jobs" in sql
+        assert "ON CONFLICT (job_url, (date_posted::date)) DO NOTHING" in sql
+        window = datetime.timedelta(
+            hours=float(re.search(r"INTERVAL '([\d.]+) hours'", sql).group(1))
+        )
+        url_index = JOB_COLUMNS.index("job_url")
+        date_index = JOB_COLUMNS.index("date_posted")
+
+        def key(row):
+            posted = datetime.datetime.fromisoformat(row[date_index])
+            return row[url_index], posted
+
+        stored = [key(row) for row in rows]
+        inserted = []
+        for row in argslist:
+            url, posted = key(row)
+            if any(
+                url == stored_url and abs(posted - stored_posted) <= window
+                for stored_url, stored_posted in stored
+            ) or any(
+                url == other_url and posted.date() == other_posted.date()
+                for other_url, other_posted in map(key, rows)
+            ):
+                continue
+            rows.append(row)
+            inserted.append((1,))
+        return inserted
+
+    monkeypatch.setattr(pipelines, "execute_values", fake_execute_values)
+    return rows
+
+
+class TestPostgresPipelineMigration:
+    def test_creates_unique_index_when_missing(self, postgres_pipeline):
+        postgres_pipeline.cursor.fetchone.return_value = (None,)
+
+        postgres_pipeline.migrate_unique_job_key()
+
+        statements = [
+            call.args[0] for call in postgres_pipeline.cursor.execute.call_args_list
+        ]
+        assert any("DELETE FROM jobs" in statement for statement in statements)
+        assert any("CREATE UNIQUE INDEX" in statement for statement in statements)
         postgres_pipeline.conn.commit.assert_called_once()
 
-    def test_swallows_db_error_on_insert(self, postgres_pipeline):
-        postgres_pipeline.cursor = MagicMock()
+    def test_is_a_no_op_when_index_exists(self, postgres_pipeline):
+        postgres_pipeline.cursor.fetchone.return_value = (
+            "jobs_job_url_posted_day_key",
+        )
+
+        postgres_pipeline.migrate_unique_job_key()
+
+        assert postgres_pipeline.cursor.execute.call_count == 1
+        postgres_pipeline.conn.commit.assert_not_called()
+
+    def test_adds_stored_at_column_without_filling_existing_rows(
+        self, postgres_pipeline
+    ):
         postgres_pipeline.cursor.fetchone.return_value = None
-        postgres_pipeline.cursor.execute.side_effect = [
-            None,
-            psycopg2.Error("boom"),
+
+        postgres_pipeline.migrate_stored_at()
+
+        statements = [
+            call.args[0] for call in postgres_pipeline.cursor.execute.call_args_list
         ]
-        postgres_pipeline.conn = MagicMock()
+        assert "ADD COLUMN stored_at TIMESTAMP;" in statements[1]
+        assert "SET DEFAULT LOCALTIMESTAMP" in statements[2]
+        postgres_pipeline.conn.commit.assert_called_once()
+
+    def test_keeps_existing_stored_at_column(self, postgres_pipeline):
+        postgres_pipeline.cursor.fetchone.return_value = (1,)
+
+        postgres_pipeline.migrate_stored_at()
+
+        assert postgres_pipeline.cursor.execute.call_count == 1
+        postgres_pipeline.conn.commit.assert_not_called()
+
+
+class TestPostgresPipelineProcessItem:
+    def test_buffers_until_batch_size_is_reached(
+        self, postgres_pipeline, inserted_rows
+    ):
+        postgres_pipeline.process_item(normalized_item(), spider=None)
+
+        assert inserted_rows == []
+
+        postgres_pipeline.process_item(
+            normalized_item(job_url="https://www.linkedin.com/jobs/view/456"),
+            spider=None,
+        )
+
+        assert len(inserted_rows) == 2
+        postgres_pipeline.conn.commit.assert_called_once()
+
+    def test_flushes_when_interval_has_elapsed(self, postgres_pipeline, inserted_rows):
+        postgres_pipeline.flush_interval = 0
+
+        postgres_pipeline.process_item(normalized_item(), spider=None)
+
+        assert len(inserted_rows) == 1
+
+    def test_inserts_with_on_conflict_and_no_read_before_write(
+        self, postgres_pipeline, inserted_rows
+    ):
+        postgres_pipeline.process_item(normalized_item(), spider=None)
+        postgres_pipeline.flush()
+
+        assert len(inserted_rows) == 1
+        assert inserted_rows[0][JOB_COLUMNS.index("job_url")] == (
+            "https://www.linkedin.com/jobs/view/123"
+        )
+        postgres_pipeline.cursor.execute.assert_not_called()
+        postgres_pipeline.conn.commit.assert_called_once()
+
+    def test_counts_deduplicated_rows(self, postgres_pipeline, inserted_rows):
+        postgres_pipeline.process_item(normalized_item(), spider=None)
+        postgres_pipeline.process_item(normalized_item(), spider=None)
+
+        assert len(inserted_rows) == 1
+        assert postgres_pipeline.rows_inserted == 1
+        assert postgres_pipeline.rows_deduplicated == 1
+        postgres_pipeline.stats.inc_value.assert_any_call(
+            "postgres/rows_deduplicated", 1
+        )
+
+    def test_job_scraped_on_both_sides_of_midnight_is_stored_once(
+        self, postgres_pipeline, inserted_rows
+    ):
+        # "1 hour ago" at 00:30 and "just now" at 23:30 the day before
+        postgres_pipeline.process_item(
+            normalized_item(date_posted="2026-07-01 23:30:00"), spider=None
+        )
+        postgres_pipeline.flush()
+        postgres_pipeline.process_item(
+            normalized_item(date_posted="2026-07-02 00:30:00"), spider=None
+        )
+        postgres_pipeline.flush()
+
+        assert len(inserted_rows) == 1
+        assert postgres_pipeline.rows_deduplicated == 1
+
+    def test_job_posted_again_beyond_the_window_is_stored(
+        self, postgres_pipeline, inserted_rows
+    ):
+        postgres_pipeline.process_item(
+            normalized_item(date_posted="2026-07-01 20:00:00"), spider=None
+        )
+        postgres_pipeline.flush()
+        postgres_pipeline.process_item(
+            normalized_item(date_posted="2026-07-02 00:30:00"), spider=None
+        )
+        postgres_pipeline.flush()
+
+        assert len(inserted_rows) == 2
+
+    def test_close_spider_flushes_buffered_items(
+        self, postgres_pipeline, inserted_rows
+    ):
+        postgres_pipeline.process_item(normalized_item(), spider=None)
+        postgres_pipeline.close_spider(spider=None)
+
+        assert len(inserted_rows) == 1
+        postgres_pipeline.conn.close.assert_called_once()
+
+    def test_swallows_db_error_on_insert(self, postgres_pipeline, monkeypatch):
+        def failing_execute_values(*args, **kwargs):
+            raise psycopg2.Error("boom")
+
+        monkeypatch.setattr(pipelines, "execute_values", failing_execute_values)
 
         result = postgres_pipeline.process_item(normalized_item(), spider=None)
+        postgres_pipeline.flush()
 
         assert result is not None
+        postgres_pipeline.conn.rollback.assert_called()
+        assert postgres_pipeline.buffer == []
+
+    def test_failed_batch_loses_only_the_rejected_rows(
+        self, postgres_pipeline, inserted_rows, monkeypatch, tmp_path
+    ):
+        dead_letter_file = tmp_path / "failed_jobs.jsonl"
+        postgres_pipeline.dead_letter_file = str(dead_letter_file)
+        postgres_pipeline.batch_size = 3
+        insert_rows = pipelines.execute_values
+
+        def rejecting_execute_values(cursor, sql, argslist, **kwargs):
+            if any(row[JOB_COLUMNS.index("title")] is None for row in argslist):
+                raise psycopg2.DataError("null value in column title")
+            return insert_rows(cursor, sql, argslist, **kwargs)
+
+        monkeypatch.setattr(pipelines, "execute_values", rejecting_execute_values)
+
+        for n, title in enumerate(["Engineer", None, "Designer"]):
+            postgres_pipeline.process_item(
+                normalized_item(
+                    title=title, job_url=f"https://www.linkedin.com/jobs/view/{n}"
+                ),
+                spider=None,
+            )
+
+        assert [row[JOB_COLUMNS.index("title")] for row in inserted_rows] == [
+            "Engineer",
+            "Designer",
+        ]
+        assert postgres_pipeline.rows_inserted == 2
+        assert postgres_pipeline.rows_deduplicated == 0
+        assert postgres_pipeline.rows_failed == 1
+        postgres_pipeline.stats.inc_value.assert_any_call("postgres/rows_failed")
+        (failed,) = [
+            json.loads(line) for line in dead_letter_file.read_text().splitlines()
+        ]
+        assert failed["job_url"] == "https://www.linkedin.com/jobs/view/1"
+        assert "null value" in failed["error"]
+
+    def test_flushes_on_a_timer_between_items(
+        self, postgres_pipeline, inserted_rows, monkeypatch
+    ):
+        clock = task.Clock()
+        postgres_pipeline.flush_loop.clock = clock
+        monkeypatch.setattr(postgres_pipeline, "connect", lambda: None)
+        postgres_pipeline.open_spider(spider=None)
+        postgres_pipeline.process_item(normalized_item(), spider=None)
+
+        clock.advance(postgres_pipeline.flush_interval)
+
+        assert len(inserted_rows) == 1
+        postgres_pipeline.close_spider(spider=None)
+        assert not postgres_pipeline.flush_loop.running
+
+
+class TestPostgresPipelineSharedConnection:
+    def test_pipelines_of_one_process_share_a_connection(
+        self, fake_project, monkeypatch
+    ):
+        conn = MagicMock()
+        conn.cursor.return_value.fetchone.return_value = (
+            "jobs_job_url_posted_day_key",
+        )
+        connect = MagicMock(return_value=conn)
+        monkeypatch.setattr(pipelines.psycopg2, "connect", connect)
+        first, second = PostgresPipeline(), PostgresPipeline()
+
+        first.open_spider(spider=None)
+        second.open_spider(spider=None)
+        first.close_spider(spider=None)
+
+        connect.assert_called_once()
+        assert second.conn is first.conn
+        conn.close.assert_not_called()
+
+        second.close_spider(spider=None)
+
+        conn.close.assert_called_once()
+        assert pipelines.shared_connections == {}
@@ -0,0 +1,204 @@
+from email.utils import formatdate
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+import scrapy
+from scrapy.http import HtmlResponse
+from scrapy.settings import Settings
+from scrapy.statscollectors import MemoryStatsCollector
+
+from linkedin_job_search.response_cache import (
+    JobPagePolicy,
+    ResponseCacheMiddleware,
+    SqliteCacheStorage,
+    normalize_job_url,
+)
+from linkedin_job_search.retry_budget import ATTEMPTS_META_KEY
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+JOB_URL = "https://www.linkedin.com/jobs/view/111"
+
+
+def job_request(job_url=JOB_URL, **meta):
+    return scrapy.Request(job_url, meta={"job_url": job_url, **meta})
+
+
+def job_response(request, fixture="job_detail.html", status=200, **headers):
+    headers.setdefault("Date", formatdate(usegmt=True))
+    return HtmlResponse(
+        request.url,
+        status=status,
+        headers=headers,
+        body=(FIXTURES_DIR / fixture).read_bytes(),
+        request=request,
+    )
+
+
+@pytest.fixture
+def cache_settings(tmp_path):
+    return Settings(
+        {
+            "RESPONSE_CACHE_ENABLED": True,
+            "RESPONSE_CACHE_FILE": str(tmp_path / "responses.sqlite3"),
+        }
+    )
+
+
+@pytest.fixture
+def storage(cache_settings):
+    storage = SqliteCacheStorage(cache_settings)
+    storage.open_spider(None)
+    yield storage
+    storage.close_spider(None)
+
+
+class TestNormalizeJobUrl:
+    def test_drops_the_query_fragment_and_trailing_slash(self):
+        assert (
+            normalize_job_url(
+                "https://www.linkedin.com/jobs/view/dev-at-acme-111/?refId=x&trk=y#top"
+            )
+            == "https://www.linkedin.com/jobs/view/dev-at-acme-111"
+        )
+
+    def test_country_subdomains_share_a_key(self):
+        assert normalize_job_url(
+            "https://FI.linkedin.com/jobs/view/dev-at-acme-111"
+        ) == normalize_job_url("https://www.linkedin.com/jobs/view/dev-at-acme-111")
+
+
+class TestSqliteCacheStorage:
+    def test_responses_round_trip_by_normalized_job_url(self, storage):
+        request = job_request()
+        storage.store_response(None, request, job_response(request))
+
+        cached = storage.retrieve_response(
+            None, job_request(JOB_URL + "?trk=public_jobs")
+        )
+
+        assert cached.status == 200
+        assert cached.body == (FIXTURES_DIR / "job_detail.html").read_bytes()
+        assert storage.retrieve_response(None, job_request(JOB_URL + "0")) is None
+
+    def test_entries_are_compressed(self, storage):
+        request = job_request()
+        response = job_response(request)
+        storage.store_response(None, request, response)
+
+        assert storage.stored_size() < len(response.body)
+
+    def test_evicts_the_least_recently_used_past_the_size_cap(self, storage):
+        urls = [f"{JOB_URL}{n}" for n in range(4)]
+        for url in urls[:3]:
+            request = job_request(url)
+            storage.store_response(None, request, job_response(request))
+        entry_size = storage.stored_size() / 3
+        storage.max_size = 3.5 * entry_size
+        storage.retrieve_response(None, job_request(urls[0]))
+
+        request = job_request(urls[3])
+        storage.store_response(None, request, job_response(request))
+
+        cached = [
+            url
+            for url in urls
+            if storage.retrieve_response(None, job_request(url)) is not None
+        ]
+        assert cached == [urls[0], urls[2], urls[3]]
+        assert storage.stored_size() <= storage.max_size
+
+    def test_persists_across_runs(self, cache_settings):
+        request = job_request()
+        first_run = SqliteCacheStorage(cache_settings)
+        first_run.open_spider(None)
+        first_run.store_response(None, request, job_response(request))
+        first_run.close_spider(None)
+
+        second_run = SqliteCacheStorage(cache_settings)
+        second_run.open_spider(None)
+
+        assert second_run.retrieve_response(None, job_request()) is not None
+        second_run.close_spider(None)
+
+
+class TestJobPagePolicy:
+    def test_caches_job_pages_only_by_default(self, cache_settings):
+        policy = JobPagePolicy(cache_settings)
+        listing = scrapy.Request("https://www.linkedin.com/jobs-guest/?start=0")
+
+        assert policy.should_cache_request(job_request())
+        assert not policy.should_cache_request(listing)
+        cache_settings.set("RESPONSE_CACHE_LISTINGS", True)
+        assert JobPagePolicy(cache_settings).should_cache_request(listing)
+
+    def test_does_not_cache_the_login_wall(self, cache_settings):
+        policy = JobPagePolicy(cache_settings)
+        request = job_request()
+
+        assert policy.should_cache_response(job_response(request), request)
+        assert not policy.should_cache_response(
+            job_response(request, "login_wall.html"), request
+        )
+
+    def test_fresh_within_the_ttl(self, cache_settings):
+        policy = JobPagePolicy(cache_settings)
+        request = job_request()
+
+        assert policy.is_cached_response_fresh(job_response(request), request)
+
+    def test_stale_page_is_revalidated_with_its_validators(self, cache_settings):
+        cache_settings.set("RESPONSE_CACHE_TTL", 3600)
+        policy = JobPagePolicy(cache_settings)
+        request = job_request()
+        cached = job_response(
+            request,
+            Date="Mon, 01 Jan 2024 00:00:00 GMT",
+            ETag='"abc"',
+            **{"Last-Modified": "Sun, 31 Dec 2023 00:00:00 GMT"},
+        )
+
+        assert not policy.is_cached_response_fresh(cached, request)
+        assert request.headers[b"If-None-Match"] == b'"abc"'
+        assert request.headers[b"If-Modified-Since"] == b"Sun, 31 Dec 2023 00:00:00 GMT"
+        assert policy.is_cached_response_valid(
+            cached, job_response(request, status=304), request
+        )
+        assert not policy.is_cached_response_valid(
+            cached, job_response(request), request
+        )
+
+    def test_retried_pages_are_downloaded_again(self, cache_settings):
+        policy = JobPagePolicy(cache_settings)
+        request = job_request(**{ATTEMPTS_META_KEY: 1})
+
+        assert not policy.is_cached_response_fresh(job_response(request), request)
+
+
+class TestResponseCacheMiddleware:
+    @pytest.fixture
+    def middleware(self, cache_settings):
+        crawler = MagicMock()
+        crawler.settings = cache_settings
+        crawler.stats = MemoryStatsCollector(crawler)
+        middleware = ResponseCacheMiddleware.from_crawler(crawler)
+        middleware.spider_opened(None)
+        yield middleware
+        middleware.spider_closed(None)
+
+    def test_second_request_for_a_job_page_is_served_from_the_cache(self, middleware):
+        request = job_request()
+        assert middleware.process_request(request) is None
+        middleware.process_response(request, job_response(request))
+
+        cached = middleware.process_request(job_request(JOB_URL + "?trk=x"))
+
+        assert "cached" in cached.flags
+        assert middleware.crawler.stats.get_value("httpcache/hit") == 1
+
+    def test_is_off_by_default(self):
+        crawler = MagicMock()
+        crawler.settings = Settings()
+
+        with pytest.raises(scrapy.exceptions.NotConfigured):
+            ResponseCacheMiddleware.from_crawler(crawler)
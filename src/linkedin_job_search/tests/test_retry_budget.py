@@ -0,0 +1,67 @@
+import json
+from unittest.mock import MagicMock
+
+import scrapy
+from scrapy.http import HtmlResponse
+
+from linkedin_job_search.retry_budget import (
+    ATTEMPTS_META_KEY,
+    DELAY_META_KEY,
+    RetryBudget,
+)
+
+URL = "https://www.linkedin.com/jobs/view/111"
+
+
+def make_response(retries=None):
+    meta = {} if retries is None else {ATTEMPTS_META_KEY: retries}
+    request = scrapy.Request(url=URL, meta=meta)
+    return HtmlResponse(url=URL, request=request, body=b"<html></html>")
+
+
+class TestRetryBudget:
+    def test_retries_carry_their_count_and_a_growing_delay(self):
+        budget = RetryBudget(max_retries=8, base_delay=5, max_delay=300)
+
+        first = budget.retry(make_response(), scrapy.Request(URL), "login_wall")
+        fourth = budget.retry(make_response(3), scrapy.Request(URL), "login_wall")
+
+        assert first.meta[ATTEMPTS_META_KEY] == 1
+        assert 2.5 <= first.meta[DELAY_META_KEY] <= 5
+        assert fourth.meta[ATTEMPTS_META_KEY] == 4
+        assert 20 <= fourth.meta[DELAY_META_KEY] <= 40
+
+    def test_delay_is_capped(self):
+        budget = RetryBudget(max_retries=20, base_delay=5, max_delay=60)
+
+        retry = budget.retry(make_response(15), scrapy.Request(URL), "login_wall")
+
+        assert 30 <= retry.meta[DELAY_META_KEY] <= 60
+
+    def test_gives_up_once_the_retries_are_spent(self, tmp_path):
+        dead_letter_file = tmp_path / "dead_letters.jsonl"
+        budget = RetryBudget(max_retries=3, dead_letter_file=str(dead_letter_file))
+
+        retry = budget.retry(make_response(3), scrapy.Request(URL), "missing_title")
+
+        assert retry is None
+        assert [
+            (dead_letter["url"], dead_letter["reason"], dead_letter["retries"])
+            for dead_letter in budget.dead_letters
+        ] == [(URL, "missing_title", 3)]
+        lines = dead_letter_file.read_text().splitlines()
+        assert json.loads(lines[0]) == budget.dead_letters[0]
+
+    def test_counts_retries_and_dead_letters_per_reason(self):
+        inc_stat = MagicMock()
+        budget = RetryBudget(max_retries=1, inc_stat=inc_stat)
+
+        budget.retry(make_response(), scrapy.Request(URL), "empty_listing")
+        budget.retry(make_response(1), scrapy.Request(URL), "login_wall")
+
+        assert [call.args[0] for call in inc_stat.call_args_list] == [
+            "page_retry/count",
+            "page_retry/reason_count/empty_listing",
+            "page_retry/dead_letter_count",
+            "page_retry/dead_letter/login_wall",
+        ]